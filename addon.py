@@ -1,19 +1,21 @@
 # -*- coding:utf-8 -*-
-from api import NetEase
+# Kodi 每次调用路由都会重新执行本文件：只在模块级导入轻量模块，
+# api（requests、Cryptodome）、qrcode、sqlite3 等在用到的函数中再导入
+import time
+# 开始执行本文件的时间（性能记录中的 imports 阶段从这里算起）
+_ADDON_STARTED = time.perf_counter()
 import xbmcplugin
 import xbmcaddon
 import xbmcgui
 import xbmc
-import sqlite3
 import re
 import sys
 import hashlib
-import time
 import os
 import xbmcvfs # type: ignore
-import qrcode # type: ignore
-from datetime import datetime
 import json
+import perf
+from settings import get_settings
 from cache import get_cache_db, get_play_history, add_play_history, clear_play_history, get_play_history_by_artist, get_play_history_by_album
 from urllib.parse import parse_qs, urlencode, unquote_plus
 
@@ -29,6 +31,8 @@ if not PY3:
 
 ADDON_ID = 'plugin.audio.music'
 ADDON = xbmcaddon.Addon()
+# 设置快照：每次调用只从 Kodi 读取一次
+settings = get_settings()
 
 def url_for(path, **kwargs):
     url = 'plugin://%s%s' % (ADDON_ID, path)
@@ -53,12 +57,60 @@ def _url_for(func_name, **kwargs):
             query_kwargs[k] = v
     return url_for(path, **query_kwargs)
 
-_ROUTE_PATHS = {'delete_thumbnails': '/delete_thumbnails/', 'login': '/login/', 'logout': '/logout/', 'login_sms': '/login_sms/', 'to_artist': '/to_artist/<artists>/', 'song_contextmenu': '/song_contextmenu/<action>/<meida_type>/<song_id>/<mv_id>/<sourceId>/<dt>/', 'play': '/play/<meida_type>/<song_id>/<mv_id>/<sourceId>/<dt>/<source>/', 'playlist_position': '/playlist_position/', 'playlist_focus_current': '/playlist_focus_current/', 'play_playlist_offset': '/play_playlist_offset/', 'history_by_album': '/history_by_album/', 'history': '/history/', 'history_filter': '/history_filter/<filter>/', 'index': '/', 'history_clear': '/history_clear/', 'history_play_all': '/history_play_all/', 'history_by_artist': '/history_by_artist/', 'history_group_artist': '/history_group_artist/<artist>/', 'history_group_album': '/history_group_album/<album>/', 'vip_timemachine': '/vip_timemachine/', 'vip_timemachine_week': '/vip_timemachine_week/<index>/', 'qrcode_login': '/qrcode_login/', 'mlog_category': '/mlog_category/', 'mlog': '/mlog/<cid>/<pagenum>/', 'top_mvs': '/top_mvs/<offset>/', 'new_songs': '/new_songs/', 'new_albums': '/new_albums/<offset>/', 'toplists': '/toplists/', 'top_artists': '/top_artists/', 'recommend_songs': '/recommend_songs/', 'play_recommend_songs': '/play_recommend_songs/<song_id>/<mv_id>/<dt>/', 'play_playlist_songs': '/play_playlist_songs/<playlist_id>/<song_id>/<mv_id>/<dt>/', 'history_recommend_songs': '/history_recommend_songs/<date>/', 'albums': '/albums/<artist_id>/<offset>/', 'album': '/album/<id>/', 'artist': '/artist/<id>/', 'similar_artist': '/similar_artist/<id>/<offset>/', 'artist_mvs': '/artist_mvs/<id>/<offset>/', 'hot_songs': '/hot_songs/<id>/', 'artist_songs': '/artist_songs/<id>/<offset>/', 'sublist': '/sublist/', 'song_purchased': '/song_purchased/<offset>/', 'dj_sublist': '/dj_sublist/<offset>/', 'djlist': '/djlist/<id>/<offset>/', 'digitalAlbum_purchased': '/digitalAlbum_purchased/', 'playlist_contextmenu': '/playlist_contextmenu/<action>/<id>/', 'video_sublist': '/video_sublist/', 'album_sublist': '/album_sublist/', 'follow_user': '/follow_user/<type>/<id>/', 'user': '/user/<id>/', 'history_recommend_dates': '/history_recommend_dates/', 'play_record': '/play_record/<uid>/', 'show_play_record': '/show_play_record/<uid>/<type>/', 'user_getfolloweds': '/user_getfolloweds/<uid>/<offset>/', 'user_getfollows': '/user_getfollows/<uid>/<offset>/', 'artist_sublist': '/artist_sublist/', 'search': '/search/', 'sea': '/sea/<type>/', 'personal_fm': '/personal_fm/', 'tunehub_search': '/tunehub_search/', 'tunehub_search_platform': '/tunehub_search_platform/<source>/', 'tunehub_aggregate_search': '/tunehub_aggregate_search/', 'tunehub_playlist': '/tunehub_playlist/', 'tunehub_playlist_platform': '/tunehub_playlist_platform/<source>/', 'tunehub_toplists': '/tunehub_toplists/', 'tunehub_toplists_platform': '/tunehub_toplists_platform/<source>/', 'favorite_toggle': '/favorite_toggle/<source>/<id>/<name>/<artist>/', 'favorites': '/favorites/', 'tunehub_toplist': '/tunehub_toplist/<source>/<id>/', 'tunehub_play': '/tunehub_play/<source>/<id>/<br>/', 'recommend_playlists': '/recommend_playlists/', 'playlist_tags': '/playlist_tags/', 'hot_playlists_by_tag': '/hot_playlists_by_tag/<category>/<offset>/', 'hot_playlists': '/hot_playlists/<offset>/', 'user_playlists': '/user_playlists/<uid>/', 'playlist': '/playlist/<ptype>/<id>/', 'cloud': '/cloud/<offset>/', 'song_comments': '/song_comments/<song_id>/<offset>/', 'load_more_comments': '/load_more_comments/<offset>/', 'trigger_comment_load': '/trigger_comment_load/', 'show_comment_replies': '/show_comment_replies/', 'comment_replies': '/comment_replies/<offset>/', 'hot_song_comments': '/hot_song_comments/', 'latest_song_comments': '/latest_song_comments/<offset>/', 'current_song_comments': '/current_song_comments/<offset>/', 'debug_song_info': '/debug_song_info/', 'clear_cache': '/clear_cache/', 'clear_expired_cache': '/clear_expired_cache/', 'preload_cache': '/preload_cache/', 'set_artist_info': '/set_artist_info/<artist_id>/', 'search_and_set_artist_info': '/search_and_set_artist_info/', 'open_album': '/open_album/', 'play_album': '/play_album/<album_id>/'}
+_ROUTE_PATHS = {'delete_thumbnails': '/delete_thumbnails/', 'login': '/login/', 'logout': '/logout/', 'login_sms': '/login_sms/', 'to_artist': '/to_artist/<artists>/', 'song_contextmenu': '/song_contextmenu/<action>/<meida_type>/<song_id>/<mv_id>/<sourceId>/<dt>/', 'play': '/play/<meida_type>/<song_id>/<mv_id>/<sourceId>/<dt>/<source>/', 'playlist_position': '/playlist_position/', 'playlist_focus_current': '/playlist_focus_current/', 'play_playlist_offset': '/play_playlist_offset/', 'history_by_album': '/history_by_album/', 'history': '/history/', 'history_filter': '/history_filter/<filter>/', 'index': '/', 'history_clear': '/history_clear/', 'history_play_all': '/history_play_all/', 'history_by_artist': '/history_by_artist/', 'history_group_artist': '/history_group_artist/<artist>/', 'history_group_album': '/history_group_album/<album>/', 'vip_timemachine': '/vip_timemachine/', 'vip_timemachine_week': '/vip_timemachine_week/<index>/', 'qrcode_login': '/qrcode_login/', 'mlog_category': '/mlog_category/', 'mlog': '/mlog/<cid>/<pagenum>/', 'top_mvs': '/top_mvs/<offset>/', 'new_songs': '/new_songs/', 'new_albums': '/new_albums/<offset>/', 'toplists': '/toplists/', 'top_artists': '/top_artists/', 'recommend_songs': '/recommend_songs/', 'play_recommend_songs': '/play_recommend_songs/<song_id>/<mv_id>/<dt>/', 'play_playlist_songs': '/play_playlist_songs/<playlist_id>/<song_id>/<mv_id>/<dt>/', 'history_recommend_songs': '/history_recommend_songs/<date>/', 'albums': '/albums/<artist_id>/<offset>/', 'album': '/album/<id>/', 'artist': '/artist/<id>/', 'similar_artist': '/similar_artist/<id>/<offset>/', 'artist_mvs': '/artist_mvs/<id>/<offset>/', 'hot_songs': '/hot_songs/<id>/', 'artist_songs': '/artist_songs/<id>/<offset>/', 'sublist': '/sublist/', 'song_purchased': '/song_purchased/<offset>/', 'dj_sublist': '/dj_sublist/<offset>/', 'djlist': '/djlist/<id>/<offset>/', 'digitalAlbum_purchased': '/digitalAlbum_purchased/', 'playlist_contextmenu': '/playlist_contextmenu/<action>/<id>/', 'video_sublist': '/video_sublist/', 'album_sublist': '/album_sublist/', 'follow_user': '/follow_user/<type>/<id>/', 'user': '/user/<id>/', 'history_recommend_dates': '/history_recommend_dates/', 'play_record': '/play_record/<uid>/', 'show_play_record': '/show_play_record/<uid>/<type>/', 'user_getfolloweds': '/user_getfolloweds/<uid>/<offset>/', 'user_getfollows': '/user_getfollows/<uid>/<offset>/', 'artist_sublist': '/artist_sublist/', 'search': '/search/', 'sea': '/sea/<type>/', 'personal_fm': '/personal_fm/', 'tunehub_search': '/tunehub_search/', 'tunehub_search_platform': '/tunehub_search_platform/<source>/', 'tunehub_aggregate_search': '/tunehub_aggregate_search/', 'tunehub_playlist': '/tunehub_playlist/', 'tunehub_playlist_platform': '/tunehub_playlist_platform/<source>/', 'tunehub_toplists': '/tunehub_toplists/', 'tunehub_toplists_platform': '/tunehub_toplists_platform/<source>/', 'favorite_toggle': '/favorite_toggle/<source>/<id>/<name>/<artist>/', 'favorites': '/favorites/', 'tunehub_toplist': '/tunehub_toplist/<source>/<id>/', 'tunehub_play': '/tunehub_play/<source>/<id>/<br>/', 'recommend_playlists': '/recommend_playlists/', 'playlist_tags': '/playlist_tags/', 'hot_playlists_by_tag': '/hot_playlists_by_tag/<category>/<offset>/', 'hot_playlists': '/hot_playlists/<offset>/', 'user_playlists': '/user_playlists/<uid>/', 'playlist': '/playlist/<ptype>/<id>/', 'cloud': '/cloud/<offset>/', 'song_comments': '/song_comments/<song_id>/<offset>/', 'load_more_comments': '/load_more_comments/<offset>/', 'trigger_comment_load': '/trigger_comment_load/', 'show_comment_replies': '/show_comment_replies/', 'comment_replies': '/comment_replies/<offset>/', 'hot_song_comments': '/hot_song_comments/', 'latest_song_comments': '/latest_song_comments/<offset>/', 'current_song_comments': '/current_song_comments/<offset>/', 'debug_song_info': '/debug_song_info/', 'clear_cache': '/clear_cache/', 'clear_expired_cache': '/clear_expired_cache/', 'preload_cache': '/preload_cache/', 'set_artist_info': '/set_artist_info/<artist_id>/', 'search_and_set_artist_info': '/search_and_set_artist_info/', 'open_album': '/open_album/', 'play_album': '/play_album/<album_id>/', 'perf_report': '/perf_report/', 'perf_report_clear': '/perf_report_clear/', 'profiles': '/profiles/', 'profile_stats': '/profile_stats/<name>/'}
+
+_ROUTE_PATH_PARAMS = {'delete_thumbnails': [], 'login': [], 'logout': [], 'login_sms': [], 'to_artist': ['artists'], 'song_contextmenu': ['action', 'meida_type', 'song_id', 'mv_id', 'sourceId', 'dt'], 'play': ['meida_type', 'song_id', 'mv_id', 'sourceId', 'dt', 'source'], 'playlist_position': [], 'playlist_focus_current': [], 'play_playlist_offset': [], 'history_by_album': [], 'history': [], 'history_filter': ['filter'], 'index': [], 'history_clear': [], 'history_play_all': [], 'history_by_artist': [], 'history_group_artist': ['artist'], 'history_group_album': ['album'], 'vip_timemachine': [], 'vip_timemachine_week': ['index'], 'qrcode_login': [], 'mlog_category': [], 'mlog': ['cid', 'pagenum'], 'top_mvs': ['offset'], 'new_songs': [], 'new_albums': ['offset'], 'toplists': [], 'top_artists': [], 'recommend_songs': [], 'play_recommend_songs': ['song_id', 'mv_id', 'dt'], 'play_playlist_songs': ['playlist_id', 'song_id', 'mv_id', 'dt'], 'history_recommend_songs': ['date'], 'albums': ['artist_id', 'offset'], 'album': ['id'], 'artist': ['id'], 'similar_artist': ['id', 'offset'], 'artist_mvs': ['id', 'offset'], 'hot_songs': ['id'], 'artist_songs': ['id', 'offset'], 'sublist': [], 'song_purchased': ['offset'], 'dj_sublist': ['offset'], 'djlist': ['id', 'offset'], 'digitalAlbum_purchased': [], 'playlist_contextmenu': ['action', 'id'], 'video_sublist': [], 'album_sublist': [], 'follow_user': ['type', 'id'], 'user': ['id'], 'history_recommend_dates': [], 'play_record': ['uid'], 'show_play_record': ['uid', 'type'], 'user_getfolloweds': ['uid', 'offset'], 'user_getfollows': ['uid', 'offset'], 'artist_sublist': [], 'search': [], 'sea': ['type'], 'personal_fm': [], 'tunehub_search': [], 'tunehub_search_platform': ['source'], 'tunehub_aggregate_search': [], 'tunehub_playlist': [], 'tunehub_playlist_platform': ['source'], 'tunehub_toplists': [], 'tunehub_toplists_platform': ['source'], 'favorite_toggle': ['source', 'id', 'name', 'artist'], 'favorites': [], 'tunehub_toplist': ['source', 'id'], 'tunehub_play': ['source', 'id', 'br'], 'recommend_playlists': [], 'playlist_tags': [], 'hot_playlists_by_tag': ['category', 'offset'], 'hot_playlists': ['offset'], 'user_playlists': ['uid'], 'playlist': ['ptype', 'id'], 'cloud': ['offset'], 'song_comments': ['song_id', 'offset'], 'load_more_comments': ['offset'], 'trigger_comment_load': [], 'show_comment_replies': [], 'comment_replies': ['offset'], 'hot_song_comments': [], 'latest_song_comments': ['offset'], 'current_song_comments': ['offset'], 'debug_song_info': [], 'clear_cache': [], 'clear_expired_cache': [], 'preload_cache': [], 'set_artist_info': ['artist_id'], 'search_and_set_artist_info': [], 'open_album': [], 'play_album': ['album_id'], 'perf_report': [], 'perf_report_clear': [], 'profiles': [], 'profile_stats': ['name']}
+
+
+
+# 需要再次解码的路径参数（整条路径解码后仍可能含有编码过的名称）
+_ROUTE_PARAM_CONVERTERS = {
+    'to_artist': {'artists': unquote_plus},
+    'history_filter': {'filter': unquote_plus},
+    'history_group_artist': {'artist': unquote_plus},
+    'history_group_album': {'album': unquote_plus},
+    'history_recommend_songs': {'date': unquote_plus},
+    'favorite_toggle': {'name': unquote_plus, 'artist': unquote_plus},
+    'hot_playlists_by_tag': {'category': unquote_plus},
+}
+
+# 可以省略的路径参数（兼容旧版本生成的地址）
+_ROUTE_PARAM_DEFAULTS = {
+    'play': {'source': 'netease'},
+    'similar_artist': {'offset': 0},
+    'song_comments': {'offset': '0'},
+    'tunehub_play': {'br': '320k'},
+}
+
+_router = None
+
+
+def get_router():
+    """
+    获取由 _ROUTE_PATHS 编译的路由表
+
+    Returns:
+        router.Router: 路由表
+    """
+    global _router
+    if _router is None:
+        from router import Router
+        _router = Router(_ROUTE_PATHS, globals(), converters=_ROUTE_PARAM_CONVERTERS,
+                         defaults=_ROUTE_PARAM_DEFAULTS)
+    return _router
+
 
-_ROUTE_PATH_PARAMS = {'delete_thumbnails': [], 'login': [], 'logout': [], 'login_sms': [], 'to_artist': ['artists'], 'song_contextmenu': ['action', 'meida_type', 'song_id', 'mv_id', 'sourceId', 'dt'], 'play': ['meida_type', 'song_id', 'mv_id', 'sourceId', 'dt', 'source'], 'playlist_position': [], 'playlist_focus_current': [], 'play_playlist_offset': [], 'history_by_album': [], 'history': [], 'history_filter': ['filter'], 'index': [], 'history_clear': [], 'history_play_all': [], 'history_by_artist': [], 'history_group_artist': ['artist'], 'history_group_album': ['album'], 'vip_timemachine': [], 'vip_timemachine_week': ['index'], 'qrcode_login': [], 'mlog_category': [], 'mlog': ['cid', 'pagenum'], 'top_mvs': ['offset'], 'new_songs': [], 'new_albums': ['offset'], 'toplists': [], 'top_artists': [], 'recommend_songs': [], 'play_recommend_songs': ['song_id', 'mv_id', 'dt'], 'play_playlist_songs': ['playlist_id', 'song_id', 'mv_id', 'dt'], 'history_recommend_songs': ['date'], 'albums': ['artist_id', 'offset'], 'album': ['id'], 'artist': ['id'], 'similar_artist': ['id', 'offset'], 'artist_mvs': ['id', 'offset'], 'hot_songs': ['id'], 'artist_songs': ['id', 'offset'], 'sublist': [], 'song_purchased': ['offset'], 'dj_sublist': ['offset'], 'djlist': ['id', 'offset'], 'digitalAlbum_purchased': [], 'playlist_contextmenu': ['action', 'id'], 'video_sublist': [], 'album_sublist': [], 'follow_user': ['type', 'id'], 'user': ['id'], 'history_recommend_dates': [], 'play_record': ['uid'], 'show_play_record': ['uid', 'type'], 'user_getfolloweds': ['uid', 'offset'], 'user_getfollows': ['uid', 'offset'], 'artist_sublist': [], 'search': [], 'sea': ['type'], 'personal_fm': [], 'tunehub_search': [], 'tunehub_search_platform': ['source'], 'tunehub_aggregate_search': [], 'tunehub_playlist': [], 'tunehub_playlist_platform': ['source'], 'tunehub_toplists': [], 'tunehub_toplists_platform': ['source'], 'favorite_toggle': ['source', 'id', 'name', 'artist'], 'favorites': [], 'tunehub_toplist': ['source', 'id'], 'tunehub_play': ['source', 'id', 'br'], 'recommend_playlists': [], 'playlist_tags': [], 'hot_playlists_by_tag': ['category', 'offset'], 'hot_playlists': ['offset'], 'user_playlists': ['uid'], 'playlist': ['ptype', 'id'], 'cloud': ['offset'], 'song_comments': ['song_id', 'offset'], 'load_more_comments': ['offset'], 'trigger_comment_load': [], 'show_comment_replies': [], 'comment_replies': ['offset'], 'hot_song_comments': [], 'latest_song_comments': ['offset'], 'current_song_comments': ['offset'], 'debug_song_info': [], 'clear_cache': [], 'clear_expired_cache': [], 'preload_cache': [], 'set_artist_info': ['artist_id'], 'search_and_set_artist_info': [], 'open_album': [], 'play_album': ['album_id']}
+def _log_route_time(name, kwargs, elapsed):
+    perf.get_recorder().add('handler', elapsed)
+    xbmc.log('plugin.audio.music: 路由 %s 耗时 %.1f ms' % (name, elapsed * 1000), xbmc.LOGDEBUG)
 
 
+@perf.timed('set_resolved_url')
+def _set_resolved_url(handle, succeeded, listitem):
+    xbmcplugin.setResolvedUrl(handle, succeeded, listitem)
 
+
+@perf.timed('add_directory_items')
 def add_directory_items(handle, items):
     """Convert xbmcswift2-style items list to xbmcplugin.addDirectoryItems format."""
     kodi_items = []
@@ -145,7 +197,46 @@ if 'logined' not in account:
 if 'first_run' not in account:
     account['first_run'] = True
 
-music = NetEase()
+class _LazyNetEase(object):
+    """
+    NetEase 客户端代理
+
+    后台服务（service.py）运行时，方法调用通过本机 socket 交给服务中常驻的 NetEase 客户端执行；
+    服务未运行或调用无法用 JSON 传递时，才导入 api 并在本进程创建 NetEase 实例（加载 cookie），
+    不访问网络的路由无需付出这部分开销
+    """
+
+    def __init__(self):
+        self._instance = None
+        self._service = None
+
+    def _get(self):
+        if self._instance is None:
+            from api import NetEase
+            self._instance = NetEase()
+        return self._instance
+
+    def _service_client(self):
+        if self._service is None:
+            from service import ServiceClient
+            self._service = ServiceClient(PROFILE) if settings.get_bool('enable_service') else False
+        return self._service
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not self._service_client():
+            return getattr(self._get(), name)
+
+        def call(*args, **kwargs):
+            from service import ServiceUnavailable
+            try:
+                return self._service.call(name, args, kwargs)
+            except ServiceUnavailable as e:
+                xbmc.log('plugin.audio.music: 在本进程中执行 %s (%s)' % (name, str(e)), xbmc.LOGDEBUG)
+            return getattr(self._get(), name)(*args, **kwargs)
+        return call
+
+
+music = _LazyNetEase()
 
 PROFILE = xbmc.translatePath(xbmcaddon.Addon().getAddonInfo('profile'))
 qrcode_path = os.path.join(PROFILE, 'qrcode')
@@ -482,14 +573,13 @@ def login_sms():
                             xbmcgui.NOTIFICATION_INFO, 800, False)
 
 
-#limit = int(ADDON.getSetting('number_of_songs_per_page'))
-limit = ADDON.getSetting('number_of_songs_per_page')
+limit = settings.get('number_of_songs_per_page')
 if limit == '':
     limit = 100
 else:
     limit = int(limit)
 
-quality = ADDON.getSetting('quality')
+quality = settings.get('quality')
 if quality == '0':
     level = 'standard'
 elif quality == '1':
@@ -511,7 +601,7 @@ elif quality == '8':
 else:
     level = 'standard'
 
-resolution = ADDON.getSetting('resolution')
+resolution = settings.get('resolution')
 if resolution == '0':
     r = 240
 elif resolution == '1':
@@ -736,12 +826,13 @@ def get_songs(songs, privileges=[], picUrl=None, source=''):
 
                     data['second_line'] += line
         else:
-            if ADDON.getSetting('show_album_name') == 'true':
+            if settings.get_bool('show_album_name'):
                 data['second_line'] = data['album_name']
         datas.append(data)
     return datas
 
 
+@perf.timed('build_items')
 def get_songs_items(datas, privileges=[], picUrl=None, offset=0, getmv=True, source='', sourceId=0, enable_index=True, widget='0'):
     songs = get_songs(datas, privileges, picUrl, source)
     items = []
@@ -783,11 +874,11 @@ def get_songs_items(datas, privileges=[], picUrl=None, offset=0, getmv=True, sou
     for play in songs:
         # 隐藏不能播放的歌曲（安全检查 privilege 是否为 None）
         priv = play.get('privilege') or {}
-        if priv.get('pl', None) == 0 and ADDON.getSetting('hide_songs') == 'true':
+        if priv.get('pl', None) == 0 and settings.get_bool('hide_songs'):
             continue
 
         # 显示序号
-        if ADDON.getSetting('show_index') == 'true' and enable_index:
+        if settings.get_bool('show_index') and enable_index:
             offset += 1
             if offset < 10:
                 str_offset = '0' + str(offset) + '.'
@@ -799,7 +890,7 @@ def get_songs_items(datas, privileges=[], picUrl=None, offset=0, getmv=True, sou
         ar_name = play['artist']
         mv_id = play['mv_id']
 
-        song_naming_format = ADDON.getSetting('song_naming_format')
+        song_naming_format = settings.get('song_naming_format')
         if song_naming_format == '0':
             label = str_offset + ar_name + ' - ' + play['name']
         elif song_naming_format == '1':
@@ -815,7 +906,7 @@ def get_songs_items(datas, privileges=[], picUrl=None, offset=0, getmv=True, sou
         if st is not None and st < 0:
             label = tag(label, 'grey')
         liked_songs = safe_get_storage('liked_songs')
-        if play['id'] in liked_songs['ids'] and ADDON.getSetting('like_tag') == 'true':
+        if play['id'] in liked_songs['ids'] and settings.get_bool('like_tag'):
             label = tag('♥ ') + label
 
         # 各种标签逻辑（原样保留）
@@ -824,14 +915,14 @@ def get_songs_items(datas, privileges=[], picUrl=None, offset=0, getmv=True, sou
             if st2 is not None and st2 < 0:
                 label = tag(label, 'grey')
             fee = priv.get('fee')
-            if fee == 1 and ADDON.getSetting('vip_tag') == 'true':
+            if fee == 1 and settings.get_bool('vip_tag'):
                 label += tag(' vip')
-            if priv.get('cs') and ADDON.getSetting('cloud_tag') == 'true':
+            if priv.get('cs') and settings.get_bool('cloud_tag'):
                 label += ' ☁'
             flag = priv.get('flag', 0)
-            if (flag & 64) > 0 and ADDON.getSetting('exclusive_tag') == 'true':
+            if (flag & 64) > 0 and settings.get_bool('exclusive_tag'):
                 label += tag(' 独家')
-            if ADDON.getSetting('sq_tag') == 'true':
+            if settings.get_bool('sq_tag'):
                 play_max = priv.get('playMaxBrLevel')
                 if play_max:
                     if play_max == 'hires':
@@ -848,11 +939,11 @@ def get_songs_items(datas, privileges=[], picUrl=None, offset=0, getmv=True, sou
                         label += tag(' 杜比全景声')
                 elif priv.get('maxbr', 0) >= 999000:
                     label += tag(' SQ')
-            if priv.get('preSell') == True and ADDON.getSetting('presell_tag') == 'true':
+            if priv.get('preSell') == True and settings.get_bool('presell_tag'):
                 label += tag(' 预售')
-            elif fee == 4 and priv.get('pl') == 0 and ADDON.getSetting('pay_tag') == 'true':
+            elif fee == 4 and priv.get('pl') == 0 and settings.get_bool('pay_tag'):
                 label += tag(' 付费')
-        if mv_id > 0 and ADDON.getSetting('mv_tag') == 'true':
+        if mv_id > 0 and settings.get_bool('mv_tag'):
             label += tag(' MV', 'green')
 
         if 'second_line' in play and play['second_line']:
@@ -864,7 +955,7 @@ def get_songs_items(datas, privileges=[], picUrl=None, offset=0, getmv=True, sou
         if play['album_name'] and play['album_id']:
             context_menu.append(('跳转到专辑: ' + play['album_name'], 'Container.Update(%s)' % _url_for('album', id=play['album_id'])))
 
-        if mv_id > 0 and ADDON.getSetting('mvfirst') == 'true' and getmv:
+        if mv_id > 0 and settings.get_bool('mvfirst') and getmv:
             # MV 优先的情况（原样保留）
             context_menu.extend([
                 ('播放歌曲', 'RunPlugin(%s)' % _url_for('song_contextmenu', action='play_song', meida_type='song',
@@ -907,7 +998,7 @@ def get_songs_items(datas, privileges=[], picUrl=None, offset=0, getmv=True, sou
                     play['id']), mv_id=str(mv_id), sourceId=str(sourceId), dt=str(play['dt']//1000))))
 
             # 歌曲不能播放时播放MV（原样保留）
-            if priv and priv.get('st') is not None and priv.get('st') < 0 and mv_id > 0 and ADDON.getSetting('auto_play_mv') == 'true':
+            if priv and priv.get('st') is not None and priv.get('st') < 0 and mv_id > 0 and settings.get_bool('auto_play_mv'):
                 items.append({
                     'label': label,
                     'path': _url_for('play', meida_type='song', song_id=str(play['id']), mv_id=str(mv_id), sourceId=str(sourceId), dt=str(play['dt']//1000), source='netease'),
@@ -1154,6 +1245,17 @@ def song_contextmenu(action, meida_type, song_id, mv_id, sourceId, dt):
             xbmc.executebuiltin('PlayMedia(%s)' % url)
 
 
+def start_prefetch(current_pos=None, song_id=None):
+    """在后台预取播放列表中接下来几首歌曲的播放地址"""
+    try:
+        from prefetch import Prefetcher, PREFETCH_DEFAULT_COUNT, PREFETCH_DEFAULT_WORKERS
+        count = int(settings.get('prefetch_count') or PREFETCH_DEFAULT_COUNT)
+        workers = int(settings.get('prefetch_workers') or PREFETCH_DEFAULT_WORKERS)
+        Prefetcher(music, level, count=count, workers=workers).start(current_pos=current_pos, song_id=song_id)
+    except Exception as e:
+        xbmc.log('[plugin.audio.music] Error starting prefetch: %s' % str(e), xbmc.LOGERROR)
+
+
 def play(meida_type, song_id, mv_id, sourceId, dt, source='netease'):
     if meida_type == 'mv':
         mv = music.mv_url(mv_id, r).get("data", {})
@@ -1188,7 +1290,7 @@ def play(meida_type, song_id, mv_id, sourceId, dt, source='netease'):
         else:
             url = urls[0]
         if url is None:
-            if int(mv_id) > 0 and ADDON.getSetting('auto_play_mv') == 'true':
+            if int(mv_id) > 0 and settings.get_bool('auto_play_mv'):
                 mv = music.mv_url(mv_id, r).get("data", {})
                 url = mv['url']
                 if url is not None:
@@ -1201,7 +1303,7 @@ def play(meida_type, song_id, mv_id, sourceId, dt, source='netease'):
             dialog.notification(
                 '播放失败', msg, xbmcgui.NOTIFICATION_INFO, 800, False)
         else:
-            if ADDON.getSetting('upload_play_record') == 'true':
+            if settings.get_bool('upload_play_record'):
                 try:
                     result = music.daka(song_id, sourceId=sourceId, time=dt)
                     if result.get('code') == 200:
@@ -1370,14 +1472,14 @@ def play(meida_type, song_id, mv_id, sourceId, dt, source='netease'):
         try:
             if url is not None:
                 try:
-                    xbmcplugin.setResolvedUrl(int(sys.argv[1]), True, xbmcgui.ListItem(path=url))
+                    _set_resolved_url(int(sys.argv[1]), True, xbmcgui.ListItem(path=url))
                 except Exception:
                     # 不应阻止后续的 xbmcplugin.setResolvedUrl
                     pass
         except Exception:
             pass
 
-        xbmcplugin.setResolvedUrl(int(sys.argv[1]), True, listitem)
+        _set_resolved_url(int(sys.argv[1]), True, listitem)
 
         # setResolvedUrl之后，延迟获取播放位置并设置到Window Property
         # 延迟是必要的：Kodi在setResolvedUrl后异步更新播放位置，
@@ -1400,10 +1502,14 @@ def play(meida_type, song_id, mv_id, sourceId, dt, source='netease'):
         import threading
         t = threading.Thread(target=_update_playlist_position, daemon=True)
         t.start()
+
+        # 当前歌曲开始播放后，预取播放列表中的后续歌曲
+        if meida_type == 'song' and url is not None:
+            start_prefetch(song_id=song_id)
     except Exception:
         # 回退到原有方式（兼容未知 xbmcswift2 版本）
         try:
-            xbmcplugin.setResolvedUrl(int(sys.argv[1]), True, xbmcgui.ListItem(path=url))
+            _set_resolved_url(int(sys.argv[1]), True, xbmcgui.ListItem(path=url))
         except Exception:
             pass
 
@@ -1563,7 +1669,7 @@ def index():
     status = account['logined']
 
     # 自动缓存预热
-    if ADDON.getSetting('auto_preload_cache') == 'true':
+    if settings.get_bool('auto_preload_cache'):
         import threading
         # 启动异步预热，不阻塞 UI
         thread = threading.Thread(target=preload_cache_async, daemon=True)
@@ -1575,75 +1681,75 @@ def index():
         liked_songs['pid'] = 0
     if 'ids' not in liked_songs:
         liked_songs['ids'] = []
-    if ADDON.getSetting('like_tag') == 'true' and liked_songs['pid']:
+    if settings.get_bool('like_tag') and liked_songs['pid']:
         res = music.playlist_detail(liked_songs['pid'])
         if res['code'] == 200:
             liked_songs['ids'] = [s['id'] for s in res.get('playlist', {}).get('trackIds', [])]
         _save_storage('liked_songs', liked_songs)
 
     # 修改: 每日推荐不再检查登录状态
-    if ADDON.getSetting('daily_recommend') == 'true':
+    if settings.get_bool('daily_recommend'):
         items.append(
             {'label': '每日推荐', 'path': _url_for('recommend_songs')})
     # 修改: 私人FM不再检查登录状态
-    if ADDON.getSetting('personal_fm') == 'true':
+    if settings.get_bool('personal_fm'):
         items.append({'label': '私人FM', 'path': _url_for('personal_fm')})
     # 修改: 我的歌单不再检查登录状态
-    if ADDON.getSetting('my_playlists') == 'true':
+    if settings.get_bool('my_playlists'):
         # 只有在用户已登录（uid 不为空）时才显示"我的歌单"
         if account['uid']:
             items.append({'label': '我的歌单', 'path': _url_for(
                 'user_playlists', uid=account['uid'])})
     # 修改: 我的收藏不再检查登录状态
-    if ADDON.getSetting('sublist') == 'true':
+    if settings.get_bool('sublist'):
         items.append({'label': '我的收藏', 'path': _url_for('sublist')})
     # 修改: 推荐歌单不再检查登录状态
-    if ADDON.getSetting('recommend_playlists') == 'true':
+    if settings.get_bool('recommend_playlists'):
         items.append(
             {'label': '推荐歌单', 'path': _url_for('recommend_playlists')})
     # 修改: 黑胶时光机不再检查登录状态
-    if ADDON.getSetting('vip_timemachine') == 'true':
+    if settings.get_bool('vip_timemachine'):
         items.append(
             {'label': '黑胶时光机', 'path': _url_for('vip_timemachine')})
-    if ADDON.getSetting('rank') == 'true':
+    if settings.get_bool('rank'):
         items.append({'label': '排行榜', 'path': _url_for('toplists')})
-    if ADDON.getSetting('hot_playlists') == 'true':
+    if settings.get_bool('hot_playlists'):
         items.append({'label': '热门歌单', 'path': _url_for('hot_playlists', offset='0')})
         items.append({'label': '歌单分类', 'path': _url_for('playlist_tags')})
-    if ADDON.getSetting('top_artist') == 'true':
+    if settings.get_bool('top_artist'):
         items.append({'label': '热门歌手', 'path': _url_for('top_artists')})
-    if ADDON.getSetting('top_mv') == 'true':
+    if settings.get_bool('top_mv'):
         items.append(
             {'label': '热门MV', 'path': _url_for('top_mvs', offset='0')})
-    if ADDON.getSetting('search') == 'true':
+    if settings.get_bool('search'):
         items.append({'label': '搜索', 'path': _url_for('search')})
     # 修改: 我的云盘不再检查登录状态
-    if ADDON.getSetting('cloud_disk') == 'true':
+    if settings.get_bool('cloud_disk'):
         items.append(
             {'label': '我的云盘', 'path': _url_for('cloud', offset='0')})
     # 修改: 我的主页不再检查登录状态
-    if ADDON.getSetting('home_page') == 'true':
+    if settings.get_bool('home_page'):
         # 只有在用户已登录（uid 不为空）时才显示"我的主页"
         if account['uid']:
             items.append(
                 {'label': '我的主页', 'path': _url_for('user', id=account['uid'])})
-    if ADDON.getSetting('new_albums') == 'true':
+    if settings.get_bool('new_albums'):
         items.append(
             {'label': '新碟上架', 'path': _url_for('new_albums', offset='0')})
-    if ADDON.getSetting('new_albums') == 'true':
+    if settings.get_bool('new_albums'):
         items.append({'label': '新歌速递', 'path': _url_for('new_songs')})
-    if ADDON.getSetting('mlog') == 'true':
+    if settings.get_bool('mlog'):
         items.append(
             {'label': 'Mlog', 'path': _url_for('mlog_category')})
 
     # TuneHub 功能入口
-    if ADDON.getSetting('tunehub_search') == 'true':
+    if settings.get_bool('tunehub_search'):
         items.append({'label': 'TuneHub 单平台搜索', 'path': _url_for('tunehub_search')})
-    if ADDON.getSetting('tunehub_aggregate_search') == 'true':
+    if settings.get_bool('tunehub_aggregate_search'):
         items.append({'label': 'TuneHub 聚合搜索', 'path': _url_for('tunehub_aggregate_search')})
-    if ADDON.getSetting('tunehub_playlist') == 'true':
+    if settings.get_bool('tunehub_playlist'):
         items.append({'label': 'TuneHub 歌单', 'path': _url_for('tunehub_playlist')})
-    if ADDON.getSetting('tunehub_toplists') == 'true':
+    if settings.get_bool('tunehub_toplists'):
         items.append({'label': 'TuneHub 排行榜', 'path': _url_for('tunehub_toplists')})
     items.append({
         'label': '📜 播放历史',
@@ -1687,6 +1793,7 @@ def history_play_all():
         playlist.add(plugin_path, listitem)
 
     xbmc.Player().play(playlist, startpos=0)
+    start_prefetch(current_pos=0)
 def history_by_artist():
     history = load_history()
     groups = {}
@@ -1754,6 +1861,7 @@ def history_group_album(album):
 
 
 def vip_timemachine():
+    from datetime import datetime
     time_machine = safe_get_storage('time_machine')
     items = []
     now = datetime.now()
@@ -1867,6 +1975,7 @@ def vip_timemachine_week(index):
 
 
 def qrcode_check():
+    import qrcode # type: ignore
     if not os.path.exists(qrcode_path):
         SUCCESS = xbmcvfs.mkdir(qrcode_path)
         if not SUCCESS:
@@ -1903,6 +2012,7 @@ def check_login_status(key):
 
 
 def qrcode_login():
+    import qrcode # type: ignore
     if not qrcode_check():
         return
     result = music.login_qr_key()
@@ -2061,7 +2171,7 @@ def play_recommend_songs(song_id, mv_id, dt):
 
     for i, track in enumerate(datas):
         priv = privileges[i] if i < len(privileges) else {}
-        if priv.get('pl', None) == 0 and ADDON.getSetting('hide_songs') == 'true':
+        if priv.get('pl', None) == 0 and settings.get_bool('hide_songs'):
             continue
 
         # 找到用户点击的那一首
@@ -2107,13 +2217,14 @@ def play_recommend_songs(song_id, mv_id, dt):
     # ⭐ 播放播放列表（不会跳歌）
     if playlist.size() > 0:
         xbmc.Player().play(playlist, startpos=selected_playlist_index)
+        start_prefetch(current_pos=selected_playlist_index)
     else:
         dialog = xbmcgui.Dialog()
         dialog.notification('播放失败', '每日推荐中没有可播放的歌曲', xbmcgui.NOTIFICATION_INFO, 800, False)
-        xbmcplugin.setResolvedUrl(int(sys.argv[1]), False, xbmcgui.ListItem())
+        _set_resolved_url(int(sys.argv[1]), False, xbmcgui.ListItem())
 
     # 上传播放记录（只记录用户点击的那一首）
-    if ADDON.getSetting('upload_play_record') == 'true':
+    if settings.get_bool('upload_play_record'):
         try:
             result = music.daka(song_id, time=dt)
             if result.get('code') == 200:
@@ -2129,6 +2240,31 @@ def play_recommend_songs(song_id, mv_id, dt):
 
   
 
+def load_remaining_tracks(datas, privileges, trackIds):
+    """补全歌单详情接口未返回的歌曲（超过 1000 首的部分），分块并发获取，结果追加到 datas / privileges"""
+    ids = [song['id'] for song in trackIds][len(datas):]
+    if not ids:
+        return
+    from api import SONGS_DETAIL_CHUNK_SIZE
+    # 保持 privileges 与 datas 按下标一一对应
+    privileges[:] = privileges[:len(datas)] + [{}] * max(len(datas) - len(privileges), 0)
+
+    dialog = None
+    if len(ids) > SONGS_DETAIL_CHUNK_SIZE:
+        dialog = xbmcgui.DialogProgressBG()
+        dialog.create('加载歌单', '正在获取 %d 首歌曲信息' % len(ids))
+
+    def _report_progress(done, total):
+        dialog.update(int(done * 100 / total), message='已完成 %d/%d' % (done, total))
+    try:
+        resp = music.songs_detail_chunked(ids, progress=_report_progress if dialog is not None else None)
+    finally:
+        if dialog is not None:
+            dialog.close()
+    datas.extend(resp.get('songs', []))
+    privileges.extend(resp.get('privileges', []))
+
+
 def play_playlist_songs(playlist_id, song_id, mv_id, dt):
     # 获取歌单详情
     resp = music.playlist_detail(playlist_id)
@@ -2137,18 +2273,13 @@ def play_playlist_songs(playlist_id, song_id, mv_id, dt):
         dialog.notification('播放失败', '无法获取歌单信息', xbmcgui.NOTIFICATION_INFO, 800, False)
         return
 
-    # 获取所有歌曲
-    datas = resp.get('playlist', {}).get('tracks', [])
-    privileges = resp.get('privileges', [])
+    # 获取所有歌曲（复制列表：歌单详情可能来自内存缓存，补全歌曲时不能修改缓存中的数据）
+    datas = list(resp.get('playlist', {}).get('tracks', []))
+    privileges = list(resp.get('privileges', []))
     trackIds = resp.get('playlist', {}).get('trackIds', [])
 
     # 处理超过1000首歌的情况
-    songs_number = len(trackIds)
-    if songs_number > len(datas):
-        ids = [song['id'] for song in trackIds]
-        resp2 = music.songs_detail(ids[len(datas):])
-        datas.extend(resp2.get('songs', []))
-        privileges.extend(resp2.get('privileges', []))
+    load_remaining_tracks(datas, privileges, trackIds)
 
     # 构建播放列表
     playlist = xbmc.PlayList(xbmc.PLAYLIST_MUSIC)
@@ -2159,7 +2290,7 @@ def play_playlist_songs(playlist_id, song_id, mv_id, dt):
 
     for i, track in enumerate(datas):
         priv = privileges[i] if i < len(privileges) else {}
-        if priv.get('pl', None) == 0 and ADDON.getSetting('hide_songs') == 'true':
+        if priv.get('pl', None) == 0 and settings.get_bool('hide_songs'):
             continue  # 跳过不可播放的歌曲
 
         # 如果传进来的 song_id 为 0，则从第一首开始；否则从匹配的那一首开始
@@ -2200,13 +2331,14 @@ def play_playlist_songs(playlist_id, song_id, mv_id, dt):
     # 播放播放列表从选中的歌曲开始
     if playlist.size() > 0:
         xbmc.Player().play(playlist, startpos=selected_playlist_index)
+        start_prefetch(current_pos=selected_playlist_index)
     else:
         dialog = xbmcgui.Dialog()
         dialog.notification('播放失败', '歌单中没有可播放的歌曲', xbmcgui.NOTIFICATION_INFO, 800, False)
-        xbmcplugin.setResolvedUrl(int(sys.argv[1]), False, xbmcgui.ListItem())
+        _set_resolved_url(int(sys.argv[1]), False, xbmcgui.ListItem())
 
     # 上传播放记录（这里用起始 song_id 和 dt）
-    if ADDON.getSetting('upload_play_record') == 'true' and song_id != '0':
+    if settings.get_bool('upload_play_record') and song_id != '0':
         try:
             result = music.daka(song_id, time=dt)
             if result.get('code') == 200:
@@ -2490,7 +2622,7 @@ def get_djlists_items(playlists):
 
 
 def djlist(id, offset):
-    if ADDON.getSetting('reverse_radio') == 'true':
+    if settings.get_bool('reverse_radio'):
         asc = False
     else:
         asc = True
@@ -3064,7 +3196,7 @@ def sea(type):
         if 'songs' in result:
             sea_songs = result.get('songs', [])
 
-            if ADDON.getSetting('hide_cover_songs') == 'true':
+            if settings.get_bool('hide_cover_songs'):
                 filtered_songs = [
                     song for song in sea_songs if '翻自' not in song['name'] and 'cover' not in song['name'].lower()]
             else:
@@ -3105,7 +3237,7 @@ def sea(type):
             for i in range(len(datas)):
                 datas[i]['lyrics'] = sea_songs[i]['lyrics']
 
-            if ADDON.getSetting('hide_cover_songs') == 'true':
+            if settings.get_bool('hide_cover_songs'):
                 filtered_datas = []
                 filtered_privileges = []
                 for i in range(len(datas)):
@@ -3275,7 +3407,7 @@ def sea(type):
             # is_empty = False
             # items.extend(get_songs_items([song['id'] for song in result['song']['songs']],getmv=False))
             sea_songs = result['song']['songs']
-            if ADDON.getSetting('hide_cover_songs') == 'true':
+            if settings.get_bool('hide_cover_songs'):
                 filtered_songs = [
                     song for song in sea_songs if '翻自' not in song['name'] and 'cover' not in song['name'].lower()]
             else:
@@ -3532,31 +3664,8 @@ def tunehub_toplists_platform(source):
 
 
 def get_db():
-    addon_data = xbmcvfs.translatePath(xbmcaddon.Addon().getAddonInfo("profile"))
-    if not xbmcvfs.exists(addon_data):
-        xbmcvfs.mkdirs(addon_data)
-    db_path = os.path.join(addon_data, "cache.db")
-
-    conn = sqlite3.connect(db_path)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS lrc_cache (
-            source TEXT,
-            track_id TEXT,
-            text TEXT,
-            time INTEGER,
-            last_access INTEGER,
-            PRIMARY KEY (source, track_id)
-        )
-    """)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS cover_cache (
-            url TEXT PRIMARY KEY,
-            local_path TEXT,
-            time INTEGER
-        )
-    """)
-    conn.commit()
-    return conn
+    """cache.db 的连接：与 CacheDB 共用当前线程的连接（lrc_cache / cover_cache 表由 CacheDB 创建）"""
+    return get_cache_db().conn
 
 
 # =========================
@@ -3642,8 +3751,8 @@ def get_cached_cover(url, max_size_mb=200, max_files=2000):
 
     # 下载封面
     try:
-        import requests
-        r = requests.get(url, timeout=5)
+        from api import get_transport
+        r = get_transport().get(url, timeout=5)
         if r.status_code == 200:
             with xbmcvfs.File(local_path, "wb") as f:
                 f.write(r.content)
@@ -3930,7 +4039,7 @@ def tunehub_play(source, id, br='320k'):
         xbmc.log('plugin.audio.music: no URL found for TuneHub song %s/%s' % (source, id), xbmc.LOGWARNING)
         dialog = xbmcgui.Dialog()
         dialog.notification('TuneHub播放失败', '无法获取%s平台的播放地址' % source.upper(), xbmcgui.NOTIFICATION_INFO, 5000, False)
-        xbmcplugin.setResolvedUrl(handle, False, xbmcgui.ListItem())
+        _set_resolved_url(handle, False, xbmcgui.ListItem())
         return []
 
     # 2. 获取元数据
@@ -3987,7 +4096,7 @@ def tunehub_play(source, id, br='320k'):
         })
 
     # 4. 返回给 Kodi（必须 return []）
-    xbmcplugin.setResolvedUrl(handle, True, li)
+    _set_resolved_url(handle, True, li)
     return []
 
 
@@ -4153,17 +4262,13 @@ def playlist(ptype, id):
             })
         return items
     else:
-        datas = resp.get('playlist', {}).get('tracks', [])
-        privileges = resp.get('privileges', [])
+        # 复制列表：歌单详情可能来自内存缓存，补全歌曲时不能修改缓存中的数据
+        datas = list(resp.get('playlist', {}).get('tracks', []))
+        privileges = list(resp.get('privileges', []))
         trackIds = resp.get('playlist', {}).get('trackIds', [])
 
-        songs_number = len(trackIds)
         # 歌单中超过1000首歌
-        if songs_number > len(datas):
-            ids = [song['id'] for song in trackIds]
-            resp2 = music.songs_detail(ids[len(datas):])
-            datas.extend(resp2.get('songs', []))
-            privileges.extend(resp2.get('privileges', []))
+        load_remaining_tracks(datas, privileges, trackIds)
         return get_songs_items(datas, privileges=privileges, sourceId=id, source='playlist')
 
 
@@ -4829,7 +4934,9 @@ def clear_cache():
         '清理缓存',
         f'确定要清理所有缓存吗？\n\n当前缓存统计：\n'
         f'总缓存数：{stats["total_count"]} 条\n'
+        f'播放地址：{stats["resolved_url_count"]} 条\n'
         f'数据库大小：{stats["db_size"] / 1024:.2f} KB\n'
+        f'缓存数据：{stats["raw_bytes"] / 1024:.2f} KB（压缩后 {stats["stored_bytes"] / 1024:.2f} KB）\n'
         f'过期缓存：{stats["expired_count"]} 条',
         '取消',
         '确认'
@@ -4884,6 +4991,61 @@ def clear_expired_cache():
     return []
 
 
+def perf_report():
+    """性能报告：各路由总耗时、各后端接口耗时和各阶段耗时的 p50 / p95 / 最大值"""
+    summary = perf.summarize(get_cache_db().get_perf_records())
+    items = []
+    if not perf.is_enabled():
+        items.append({'label': '[COLOR yellow]性能记录未开启（设置 - 缓存设置）[/COLOR]', 'path': '', 'is_playable': False})
+    items.append({'label': '[COLOR red]清空性能记录[/COLOR]', 'path': _url_for('perf_report_clear'), 'is_playable': False})
+
+    sections = (('routes', '路由'), ('backends', '后端接口'), ('phases', '阶段'))
+    for key, title in sections:
+        items.append({'label': '[B]%s[/B]  次数  p50 / p95 / 最大 (ms)' % title, 'path': '', 'is_playable': False})
+        for name, count, p50, p95, max_ms in summary[key]:
+            items.append({
+                'label': '%s  %d  %.0f / %.0f / %.0f' % (name, count, p50, p95, max_ms),
+                'path': '',
+                'is_playable': False,
+            })
+    return items
+
+
+def perf_report_clear():
+    """清空性能记录"""
+    get_cache_db().clear_perf_records()
+    xbmcgui.Dialog().notification('性能报告', '已清空性能记录', xbmcgui.NOTIFICATION_INFO, 2000, False)
+    # 返回性能报告页面
+    xbmc.executebuiltin('Container.Update(%s, replace)' % _url_for('perf_report'))
+
+
+def profiles():
+    """已保存的 cProfile 结果（最新的在前）"""
+    names = perf.list_profiles()
+    if not names:
+        return [{'label': '[COLOR yellow]没有 cProfile 结果（在地址后加 ?profile=1 或在设置中开启采样）[/COLOR]',
+                 'path': '', 'is_playable': False}]
+    return [{'label': name[:-len('.prof')], 'path': _url_for('profile_stats', name=name), 'is_playable': False}
+            for name in names]
+
+
+def profile_stats(name):
+    """cProfile 结果中累计耗时最多的函数"""
+    rows = perf.profile_stats(name)
+    if rows is None:
+        xbmcgui.Dialog().notification('cProfile', '结果不存在', xbmcgui.NOTIFICATION_WARNING, 2000, False)
+        return []
+    items = [{'label': '[B]累计 / 自身 (ms)  调用次数  函数[/B]', 'path': '', 'is_playable': False}]
+    for row in rows:
+        items.append({
+            'label': '%.0f / %.0f  %s  %s (%s:%d)' % (row['cumtime'] * 1000, row['tottime'] * 1000, row['ncalls'],
+                                                   row['function'], row['file'], row['line']),
+            'path': '',
+            'is_playable': False,
+        })
+    return items
+
+
 def preload_cache():
     """
     缓存预热 - 预加载常用数据
@@ -4985,6 +5147,7 @@ def play_album(album_id):
             playlist.add(url, li)
     if playlist.size() > 0:
         xbmc.Player().play(playlist)
+        start_prefetch(current_pos=0)
 
 
 def preload_cache_async():
@@ -5066,6 +5229,16 @@ def _parse_params():
 
 _params = _parse_params()
 
+# 查看 cProfile 结果的路由本身不做采样
+_PROFILE_EXCLUDED_ROUTES = ('profiles', 'profile_stats')
+
+
+def _should_profile(route_name):
+    """地址带 ?profile=1 或设置中开启了 cProfile 采样时返回 True"""
+    if route_name in _PROFILE_EXCLUDED_ROUTES:
+        return False
+    return _params.get('profile') == '1' or settings.get_bool('profile_routes')
+
 if __name__ == '__main__':
     handle = int(sys.argv[1])
     base_url = sys.argv[0]
@@ -5077,336 +5250,28 @@ if __name__ == '__main__':
     path = unquote_plus(path)
 
     succeeded = True
+    route_name = 'unknown'
+    perf.get_recorder().add('imports', time.perf_counter() - _ADDON_STARTED)
 
     try:
-        if path == '/' or path == '':
-            items = index()
-            add_directory_items(handle, items)
-        elif path == '/delete_thumbnails/':
-            delete_thumbnails()
-        elif path == '/login/':
-            login()
-        elif path == '/logout/':
-            logout()
-        elif path == '/login_sms/':
-            login_sms()
-        elif path.startswith('/to_artist/'):
-            artists = path.split('/to_artist/')[1].rstrip('/')
-            items = to_artist(artists=unquote_plus(artists))
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path.startswith('/song_contextmenu/'):
-            parts = path.split('/song_contextmenu/')[1].rstrip('/').split('/')
-            items = song_contextmenu(action=parts[0], meida_type=parts[1], song_id=parts[2], mv_id=parts[3], sourceId=parts[4], dt=parts[5])
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path.startswith('/play/'):
-            parts = path.split('/play/')[1].rstrip('/').split('/')
-            source = parts[5] if len(parts) > 5 else 'netease'
-            play(meida_type=parts[0], song_id=parts[1], mv_id=parts[2], sourceId=parts[3], dt=parts[4], source=source)
-        elif path == '/playlist_position/':
-            playlist_position()
-        elif path == '/playlist_focus_current/':
-            playlist_focus_current()
-        elif path == '/play_playlist_offset/':
-            play_playlist_offset()
-        elif path == '/history_by_album/':
-            items = history_by_album()
-            add_directory_items(handle, items)
-        elif path == '/history/':
-            items = history()
-            add_directory_items(handle, items)
-        elif path.startswith('/history_filter/'):
-            filter_val = path.split('/history_filter/')[1].rstrip('/')
-            items = history_filter(filter=unquote_plus(filter_val))
-            add_directory_items(handle, items)
-        elif path == '/history_clear/':
-            history_clear()
-        elif path == '/history_play_all/':
-            history_play_all()
-        elif path == '/history_by_artist/':
-            items = history_by_artist()
-            add_directory_items(handle, items)
-        elif path.startswith('/history_group_artist/'):
-            artist = path.split('/history_group_artist/')[1].rstrip('/')
-            items = history_group_artist(artist=unquote_plus(artist))
-            add_directory_items(handle, items)
-        elif path.startswith('/history_group_album/'):
-            album = path.split('/history_group_album/')[1].rstrip('/')
-            items = history_group_album(album=unquote_plus(album))
-            add_directory_items(handle, items)
-        elif path == '/vip_timemachine/':
-            items = vip_timemachine()
-            add_directory_items(handle, items)
-        elif path.startswith('/vip_timemachine_week/'):
-            index = path.split('/vip_timemachine_week/')[1].rstrip('/')
-            items = vip_timemachine_week(index=index)
-            add_directory_items(handle, items)
-        elif path == '/qrcode_login/':
-            qrcode_login()
-        elif path == '/mlog_category/':
-            items = mlog_category()
-            add_directory_items(handle, items)
-        elif path.startswith('/mlog/'):
-            parts = path.split('/mlog/')[1].rstrip('/').split('/')
-            items = mlog(cid=parts[0], pagenum=parts[1])
-            add_directory_items(handle, items)
-        elif path.startswith('/top_mvs/'):
-            offset = path.split('/top_mvs/')[1].rstrip('/')
-            items = top_mvs(offset=offset)
-            add_directory_items(handle, items)
-        elif path == '/new_songs/':
-            items = new_songs()
-            add_directory_items(handle, items)
-        elif path.startswith('/new_albums/'):
-            offset = path.split('/new_albums/')[1].rstrip('/')
-            items = new_albums(offset=offset)
-            add_directory_items(handle, items)
-        elif path == '/toplists/':
-            items = toplists()
-            add_directory_items(handle, items)
-        elif path == '/top_artists/':
-            items = top_artists()
-            add_directory_items(handle, items)
-        elif path == '/recommend_songs/':
-            items = recommend_songs()
-            add_directory_items(handle, items)
-        elif path.startswith('/play_recommend_songs/'):
-            parts = path.split('/play_recommend_songs/')[1].rstrip('/').split('/')
-            items = play_recommend_songs(song_id=parts[0], mv_id=parts[1], dt=parts[2])
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path.startswith('/play_playlist_songs/'):
-            parts = path.split('/play_playlist_songs/')[1].rstrip('/').split('/')
-            items = play_playlist_songs(playlist_id=parts[0], song_id=parts[1], mv_id=parts[2], dt=parts[3])
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path.startswith('/history_recommend_songs/'):
-            date = path.split('/history_recommend_songs/')[1].rstrip('/')
-            items = history_recommend_songs(date=unquote_plus(date))
-            add_directory_items(handle, items)
-        elif path.startswith('/albums/'):
-            parts = path.split('/albums/')[1].rstrip('/').split('/')
-            items = albums(artist_id=parts[0], offset=parts[1])
-            add_directory_items(handle, items)
-        elif path.startswith('/album/'):
-            id_val = path.split('/album/')[1].rstrip('/')
-            items = album(id=id_val)
-            add_directory_items(handle, items)
-        elif path.startswith('/artist/'):
-            id_val = path.split('/artist/')[1].rstrip('/')
-            items = artist(id=id_val)
-            add_directory_items(handle, items)
-        elif path.startswith('/similar_artist/'):
-            parts = path.split('/similar_artist/')[1].rstrip('/').split('/')
-            items = similar_artist(id=parts[0], offset=parts[1] if len(parts) > 1 else 0)
-            add_directory_items(handle, items)
-        elif path.startswith('/artist_mvs/'):
-            parts = path.split('/artist_mvs/')[1].rstrip('/').split('/')
-            items = artist_mvs(id=parts[0], offset=parts[1])
-            add_directory_items(handle, items)
-        elif path.startswith('/hot_songs/'):
-            id_val = path.split('/hot_songs/')[1].rstrip('/')
-            items = hot_songs(id=id_val)
-            add_directory_items(handle, items)
-        elif path.startswith('/artist_songs/'):
-            parts = path.split('/artist_songs/')[1].rstrip('/').split('/')
-            items = artist_songs(id=parts[0], offset=parts[1])
-            add_directory_items(handle, items)
-        elif path == '/sublist/':
-            items = sublist()
-            add_directory_items(handle, items)
-        elif path.startswith('/song_purchased/'):
-            offset = path.split('/song_purchased/')[1].rstrip('/')
-            items = song_purchased(offset=offset)
-            add_directory_items(handle, items)
-        elif path.startswith('/dj_sublist/'):
-            offset = path.split('/dj_sublist/')[1].rstrip('/')
-            items = dj_sublist(offset=offset)
-            add_directory_items(handle, items)
-        elif path.startswith('/djlist/'):
-            parts = path.split('/djlist/')[1].rstrip('/').split('/')
-            items = djlist(id=parts[0], offset=parts[1])
-            add_directory_items(handle, items)
-        elif path == '/digitalAlbum_purchased/':
-            items = digitalAlbum_purchased()
-            add_directory_items(handle, items)
-        elif path.startswith('/playlist_contextmenu/'):
-            parts = path.split('/playlist_contextmenu/')[1].rstrip('/').split('/')
-            items = playlist_contextmenu(action=parts[0], id=parts[1])
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path == '/video_sublist/':
-            items = video_sublist()
-            add_directory_items(handle, items)
-        elif path == '/album_sublist/':
-            items = album_sublist()
-            add_directory_items(handle, items)
-        elif path.startswith('/follow_user/'):
-            parts = path.split('/follow_user/')[1].rstrip('/').split('/')
-            follow_user(type=parts[0], id=parts[1])
-        elif path.startswith('/user/'):
-            id_val = path.split('/user/')[1].rstrip('/')
-            items = user(id=id_val)
-            add_directory_items(handle, items)
-        elif path == '/history_recommend_dates/':
-            items = history_recommend_dates()
-            add_directory_items(handle, items)
-        elif path.startswith('/play_record/'):
-            uid = path.split('/play_record/')[1].rstrip('/')
-            items = play_record(uid=uid)
-            add_directory_items(handle, items)
-        elif path.startswith('/show_play_record/'):
-            parts = path.split('/show_play_record/')[1].rstrip('/').split('/')
-            items = show_play_record(uid=parts[0], type=parts[1])
-            add_directory_items(handle, items)
-        elif path.startswith('/user_getfolloweds/'):
-            parts = path.split('/user_getfolloweds/')[1].rstrip('/').split('/')
-            items = user_getfolloweds(uid=parts[0], offset=parts[1])
-            add_directory_items(handle, items)
-        elif path.startswith('/user_getfollows/'):
-            parts = path.split('/user_getfollows/')[1].rstrip('/').split('/')
-            items = user_getfollows(uid=parts[0], offset=parts[1])
-            add_directory_items(handle, items)
-        elif path == '/artist_sublist/':
-            items = artist_sublist()
-            add_directory_items(handle, items)
-        elif path == '/search/':
-            items = search()
-            add_directory_items(handle, items)
-        elif path.startswith('/sea/'):
-            type_val = path.split('/sea/')[1].rstrip('/')
-            items = sea(type=type_val)
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path == '/personal_fm/':
-            items = personal_fm()
-            add_directory_items(handle, items)
-        elif path == '/tunehub_search/':
-            items = tunehub_search()
-            add_directory_items(handle, items)
-        elif path.startswith('/tunehub_search_platform/'):
-            source = path.split('/tunehub_search_platform/')[1].rstrip('/')
-            items = tunehub_search_platform(source=source)
-            add_directory_items(handle, items)
-        elif path == '/tunehub_aggregate_search/':
-            items = tunehub_aggregate_search()
-            add_directory_items(handle, items)
-        elif path == '/tunehub_playlist/':
-            items = tunehub_playlist()
-            add_directory_items(handle, items)
-        elif path.startswith('/tunehub_playlist_platform/'):
-            source = path.split('/tunehub_playlist_platform/')[1].rstrip('/')
-            items = tunehub_playlist_platform(source=source)
-            add_directory_items(handle, items)
-        elif path == '/tunehub_toplists/':
-            items = tunehub_toplists()
-            add_directory_items(handle, items)
-        elif path.startswith('/tunehub_toplists_platform/'):
-            source = path.split('/tunehub_toplists_platform/')[1].rstrip('/')
-            items = tunehub_toplists_platform(source=source)
-            add_directory_items(handle, items)
-        elif path.startswith('/favorite_toggle/'):
-            parts = path.split('/favorite_toggle/')[1].rstrip('/').split('/')
-            items = favorite_toggle(source=parts[0], id=parts[1], name=unquote_plus(parts[2]), artist=unquote_plus(parts[3]))
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path == '/favorites/':
-            items = favorites()
-            add_directory_items(handle, items)
-        elif path.startswith('/tunehub_toplist/'):
-            parts = path.split('/tunehub_toplist/')[1].rstrip('/').split('/')
-            items = tunehub_toplist(source=parts[0], id=parts[1])
-            add_directory_items(handle, items)
-        elif path.startswith('/tunehub_play/'):
-            parts = path.split('/tunehub_play/')[1].rstrip('/').split('/')
-            items = tunehub_play(source=parts[0], id=parts[1], br=parts[2] if len(parts) > 2 else '320k')
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path == '/recommend_playlists/':
-            items = recommend_playlists()
-            add_directory_items(handle, items)
-        elif path == '/playlist_tags/':
-            items = playlist_tags()
-            add_directory_items(handle, items)
-        elif path.startswith('/hot_playlists_by_tag/'):
-            parts = path.split('/hot_playlists_by_tag/')[1].rstrip('/').split('/')
-            items = hot_playlists_by_tag(category=unquote_plus(parts[0]), offset=parts[1])
-            add_directory_items(handle, items)
-        elif path.startswith('/hot_playlists/'):
-            offset = path.split('/hot_playlists/')[1].rstrip('/')
-            items = hot_playlists(offset=offset)
-            add_directory_items(handle, items)
-        elif path.startswith('/user_playlists/'):
-            uid = path.split('/user_playlists/')[1].rstrip('/')
-            items = user_playlists(uid=uid)
-            add_directory_items(handle, items)
-        elif path.startswith('/playlist/'):
-            parts = path.split('/playlist/')[1].rstrip('/').split('/')
-            items = playlist(ptype=parts[0], id=parts[1])
-            add_directory_items(handle, items)
-        elif path.startswith('/cloud/'):
-            offset = path.split('/cloud/')[1].rstrip('/')
-            items = cloud(offset=offset)
-            add_directory_items(handle, items)
-        elif path.startswith('/song_comments/'):
-            parts = path.split('/song_comments/')[1].rstrip('/').split('/')
-            items = song_comments(song_id=parts[0], offset=parts[1] if len(parts) > 1 else '0')
-            add_directory_items(handle, items)
-        elif path.startswith('/load_more_comments/'):
-            offset = path.split('/load_more_comments/')[1].rstrip('/')
-            items = load_more_comments(offset=offset)
-            add_directory_items(handle, items)
-        elif path == '/trigger_comment_load/':
-            trigger_comment_load()
-        elif path == '/show_comment_replies/':
-            show_comment_replies()
-        elif path.startswith('/comment_replies/'):
-            offset = path.split('/comment_replies/')[1].rstrip('/')
-            items = comment_replies(offset=offset)
-            add_directory_items(handle, items)
-        elif path == '/hot_song_comments/':
-            items = hot_song_comments()
-            add_directory_items(handle, items)
-        elif path.startswith('/latest_song_comments/'):
-            offset = path.split('/latest_song_comments/')[1].rstrip('/')
-            items = latest_song_comments(offset=offset)
-            add_directory_items(handle, items)
-        elif path.startswith('/current_song_comments/'):
-            offset = path.split('/current_song_comments/')[1].rstrip('/')
-            items = current_song_comments(offset=offset)
-            add_directory_items(handle, items)
-        elif path == '/debug_song_info/':
-            items = debug_song_info()
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path == '/clear_cache/':
-            items = clear_cache()
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path == '/clear_expired_cache/':
-            items = clear_expired_cache()
-            if isinstance(items, list):
-                add_directory_items(handle, items)
-        elif path == '/preload_cache/':
-            preload_cache()
-        elif path.startswith('/set_artist_info/'):
-            artist_id = path.split('/set_artist_info/')[1].rstrip('/')
-            items = set_artist_info(artist_id=artist_id)
+        router = get_router()
+        router.add_hook(_log_route_time)
+        matched = router.match(path)
+        if matched is not None:
+            route_name = matched[0].name
+        if matched is None:
+            xbmc.log('[plugin.audio.music] Unhandled path: %s' % path, xbmc.LOGWARNING)
+            succeeded = False
+        elif _should_profile(route_name):
+            # 在本进程中执行接口调用，cProfile 才能看到其中的函数
+            music._service = False
+            items = perf.profile_call(route_name, router.dispatch, *matched)
             if isinstance(items, list):
                 add_directory_items(handle, items)
-        elif path == '/search_and_set_artist_info/':
-            items = search_and_set_artist_info()
+        else:
+            items = router.dispatch(*matched)
             if isinstance(items, list):
                 add_directory_items(handle, items)
-        elif path == '/open_album/':
-            open_album()
-        elif path.startswith('/play_album/'):
-            album_id = path.split('/play_album/')[1].rstrip('/')
-            play_album(album_id=album_id)
-        else:
-            xbmc.log('[plugin.audio.music] Unhandled path: %s' % path, xbmc.LOGWARNING)
-            succeeded = False
     except Exception as e:
         xbmc.log('[plugin.audio.music] Route dispatch error: %s' % str(e), xbmc.LOGERROR)
         import traceback
@@ -5414,3 +5279,8 @@ if __name__ == '__main__':
         succeeded = False
 
     xbmcplugin.endOfDirectory(handle, succeeded)
+
+    try:
+        perf.save(route_name, time.perf_counter() - _ADDON_STARTED)
+    except Exception as e:
+        xbmc.log('[plugin.audio.music] Error saving perf records: %s' % str(e), xbmc.LOGERROR)
@@ -1,14 +1,25 @@
 # -*- coding:utf-8 -*-
 import json
 import os
-import sys
 import time
+import threading
 import requests
+import requests.adapters
 import re
 import hashlib
-from urllib.parse import urlparse, urlencode
-from encrypt import encrypted_request, eapi_encrypt, eapi_decrypt
-from xbmcswift2 import xbmc, xbmcaddon, xbmcplugin # type: ignore
+import calendar
+import copy
+import atexit
+import queue
+from urllib.parse import urlparse, urlencode, parse_qs
+from encrypt import encrypted_request, eapi_encrypt, eapi_decrypt_body
+from resolver import UrlResolver, DEFAULT_MAX_WORKERS, DEFAULT_DEADLINE
+from validator import StreamValidator
+from latency import get_latency_tracker, backoff_delay
+from http_cache import HttpCache
+from settings import get_settings
+from perf import timed
+from xbmcswift2 import xbmc, xbmcaddon # type: ignore
 from http.cookiejar import Cookie
 from http.cookiejar import MozillaCookieJar
 import xbmcvfs # pyright: ignore[reportMissingImports]
@@ -20,6 +31,7 @@ except AttributeError:
 # 导入缓存模块
 try:
     from cache import get_cache_db
+    import health
     CACHE_AVAILABLE = True
 except ImportError:
     CACHE_AVAILABLE = False
@@ -27,6 +39,10 @@ except ImportError:
 
 DEFAULT_TIMEOUT = 10
 
+# 分块获取歌曲详情：每块歌曲数与同时请求的块数
+SONGS_DETAIL_CHUNK_SIZE = 500
+SONGS_DETAIL_WORKERS = 4
+
 BASE_URL = "https://music.163.com"
 TUNEHUB_API = "https://music-dl.sayqz.com/api/"
 
@@ -54,6 +70,14 @@ LXMUSIC_SOURCE_MAPPING = {
     'tidal': 'td'
 }
 
+# LXMUSIC 音质映射与降级链
+LX_QUALITY_MAP = {'standard': '128k', 'exceed': '320k', 'high': '320k', 'lossless': 'flac', 'hires': 'flac24bit', 'dolby': 'flac24bit', 'jyeffect': 'flac24bit', 'jymaster': 'flac24bit'}
+LX_QUALITY_FALLBACK = {'flac24bit': 'flac', 'flac': '320k', '320k': '128k', 'hires': 'flac', 'atmos': 'flac', 'atmos_plus': 'flac', 'master': 'flac'}
+# 换源顺序
+LX_SOURCE_FALLBACK = {'tx': ['kw', 'wy'], 'kw': ['tx', 'wy'], 'wy': ['tx', 'kw'], 'kg': ['tx', 'kw'], 'mg': ['tx', 'kw'], 'netease': ['tx', 'kw'], 'tencent': ['kw', 'wy'], 'kuwo': ['tx', 'wy']}
+# 换源时可按歌名搜索的音源
+LX_SEARCH_SOURCES = ('tx', 'kw')
+
 # GD Music API 配置
 GD_MUSIC_API_URL = 'https://music-api.gdstudio.xyz/api.php'
 # GD Music API 支持的音源
@@ -73,6 +97,436 @@ if not os.path.exists(COOKIE_PATH):
         f.write('# Netscape HTTP Cookie File\n')
 
 
+# ========== 共享 HTTP 传输层 ==========
+
+# 每个 Session 缓存的连接池数量（按 scheme+host+port 区分，重定向到 CDN 时也会占用）
+HTTP_POOL_CONNECTIONS = 10
+# 每个连接池保持的最大长连接数
+HTTP_POOL_MAXSIZE = 8
+
+
+class HttpTransport(object):
+    """按主机复用长连接的 HTTP 传输层
+
+    所有第三方后端（网易云、TuneHub、LXMUSIC、GD Music、酷我/QQ 搜索、封面下载）
+    都通过这里发请求：每个主机一个 keep-alive Session，挂载固定大小的 HTTPAdapter
+    连接池，并共享代理与默认超时策略，避免每次请求都重新握手 TCP+TLS。
+    adapter_class 为挂载到 Session 上的适配器类型（离线回放测试用它把请求转发到本机模拟后端）。
+    """
+
+    adapter_class = requests.adapters.HTTPAdapter
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, timeout=DEFAULT_TIMEOUT):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.proxies = None
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def set_proxies(self, proxies):
+        """设置共享代理（None 表示直连）"""
+        self.proxies = proxies or None
+
+    def session(self, url):
+        """获取 URL 所属主机的长连接 Session（不存在则创建）"""
+        host = urlparse(url).netloc.lower()
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = self.adapter_class(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=0
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+        return session
+
+    def request(self, method, url, latency_key=None, **kwargs):
+        """发送请求，未显式指定时套用默认超时与共享代理
+
+        指定 latency_key 时，超时时间由该接口观测到的 p99 推导（timeout 作为上限），
+        并记录本次请求耗时
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if self.proxies and 'proxies' not in kwargs:
+            kwargs['proxies'] = self.proxies
+        if latency_key is None:
+            return self.session(url).request(method, url, **kwargs)
+
+        tracker = get_latency_tracker()
+        kwargs['timeout'] = tracker.timeout_for(latency_key, kwargs['timeout'])
+        start = time.time()
+        try:
+            return self.session(url).request(method, url, **kwargs)
+        except requests.exceptions.Timeout:
+            tracker.record(latency_key, kwargs['timeout'])
+            start = None
+            raise
+        finally:
+            if start is not None:
+                tracker.record(latency_key, time.time() - start)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def hedged_get(self, url, latency_key, **kwargs):
+        """
+        对冲 GET 请求：第一个请求在接口 p95 耗时内未完成时再发送一个相同的请求，
+        返回先成功的响应。只能用于幂等请求
+
+        Args:
+            url: 请求地址
+            latency_key: 接口名称（延迟统计）
+            **kwargs: 传给 requests 的参数
+
+        Returns:
+            requests.Response: 先完成且没有异常的响应
+        """
+        delay = get_latency_tracker().hedge_delay(latency_key)
+        if delay is None:
+            return self.get(url, latency_key=latency_key, **kwargs)
+
+        results = queue.Queue()
+
+        def _send():
+            try:
+                results.put((True, self.get(url, latency_key=latency_key, **kwargs)))
+            except Exception as e:
+                results.put((False, e))
+
+        threading.Thread(target=_send, daemon=True).start()
+        sent = 1
+        try:
+            ok, value = results.get(timeout=delay)
+        except queue.Empty:
+            xbmc.log('plugin.audio.music: %s 请求超过 p95（%.2fs），发送对冲请求' % (latency_key, delay), xbmc.LOGDEBUG)
+            threading.Thread(target=_send, daemon=True).start()
+            sent = 2
+            ok, value = results.get()
+        if not ok and sent == 2:
+            ok, value = results.get()
+        if not ok:
+            raise value
+        return value
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """
+        统计每个主机的连接复用情况
+
+        Returns:
+            dict: {host: {'opened': 新建连接数, 'reused': 复用连接数, 'requests': 请求数}}
+        """
+        result = {}
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            for adapter in set(session.adapters.values()):
+                poolmanager = getattr(adapter, 'poolmanager', None)
+                if poolmanager is None:
+                    continue
+                pools = poolmanager.pools
+                with pools.lock:
+                    pool_list = [pools[key] for key in pools.keys()]
+                for pool in pool_list:
+                    entry = result.setdefault(pool.host, {'opened': 0, 'reused': 0, 'requests': 0})
+                    entry['opened'] += pool.num_connections
+                    entry['requests'] += pool.num_requests
+                    entry['reused'] += max(pool.num_requests - pool.num_connections, 0)
+        return result
+
+
+_transport = HttpTransport()
+_validator = StreamValidator(_transport)
+_http_cache = HttpCache(_transport)
+
+
+def get_transport():
+    """
+    获取进程内共享的 HTTP 传输层
+
+    Returns:
+        HttpTransport: 传输层实例
+    """
+    return _transport
+
+
+def get_validator():
+    """
+    获取播放地址校验器
+
+    Returns:
+        StreamValidator: 校验器实例
+    """
+    return _validator
+
+
+def get_http_cache():
+    """
+    获取 HTTP 响应缓存（条件请求）
+
+    Returns:
+        HttpCache: 缓存实例
+    """
+    return _http_cache
+
+
+# ========== 播放地址缓存 ==========
+
+# 无法从地址中解析出过期时间时使用的缓存时长（秒）
+RESOLVED_URL_DEFAULT_TTL = 20 * 60
+# 最长缓存时长（秒），避免签名有效期很长的地址长期不刷新
+RESOLVED_URL_MAX_TTL = 6 * 3600
+# 提前失效的安全余量（秒），留出播放开始前的时间
+RESOLVED_URL_EXPIRE_MARGIN = 60
+
+# 表示绝对过期时间戳的查询参数
+_URL_EXPIRE_PARAMS = ('expires', 'expire', 'deadline', 'x-expires', 'e')
+# 网易云 CDN 路径中的时间戳: /20260101123000/<hash>/...（北京时间）
+_NETEASE_PATH_TIME_RE = re.compile(r'/(20\d{12})/[0-9a-f]{32}/')
+
+
+def get_url_expire_at(url, now=None):
+    """
+    根据签名地址中的过期参数计算缓存过期时间
+
+    支持 expires/deadline 等 Unix 时间戳参数、X-Amz-Date + X-Amz-Expires，
+    以及网易云 CDN 路径中的时间戳；都没有时使用 RESOLVED_URL_DEFAULT_TTL。
+    时间戳参数已经过去（地址已失效）时返回 now，调用方不应缓存。
+
+    Args:
+        url: 播放地址
+        now: 当前时间戳（测试用）
+
+    Returns:
+        int: 过期时间戳（秒）
+    """
+    now = int(now if now is not None else time.time())
+    expire_at = None
+    try:
+        parsed = urlparse(url)
+        query = {k.lower(): v[0] for k, v in parse_qs(parsed.query).items() if v}
+        for name in _URL_EXPIRE_PARAMS:
+            value = query.get(name, '')
+            if value.isdigit():
+                value = int(value)
+                # 毫秒时间戳
+                if value > 10 ** 11:
+                    value //= 1000
+                if value > now:
+                    expire_at = value
+                    break
+                if value > 10 ** 9:
+                    # 已经过期的签名地址
+                    return now
+        if expire_at is None and query.get('x-amz-date') and query.get('x-amz-expires', '').isdigit():
+            signed_at = calendar.timegm(time.strptime(query['x-amz-date'], '%Y%m%dT%H%M%SZ'))
+            expire_at = signed_at + int(query['x-amz-expires'])
+        if expire_at is None:
+            m = _NETEASE_PATH_TIME_RE.search(parsed.path)
+            if m:
+                expire_at = calendar.timegm(time.strptime(m.group(1), '%Y%m%d%H%M%S')) - 8 * 3600
+    except Exception as e:
+        xbmc.log("plugin.audio.music: 解析地址过期时间失败: {}".format(e), xbmc.LOGDEBUG)
+        expire_at = None
+
+    if expire_at is None:
+        return now + RESOLVED_URL_DEFAULT_TTL
+    return min(expire_at - RESOLVED_URL_EXPIRE_MARGIN, now + RESOLVED_URL_MAX_TTL)
+
+
+# ========== 后端熔断 ==========
+
+# 熔断器中的后端名称
+BACKEND_LXMUSIC = 'lxmusic'
+BACKEND_GDMUSIC = 'gdmusic'
+
+
+def backend_available(backend):
+    """后端未熔断（或获得探测名额）时返回 True"""
+    if not CACHE_AVAILABLE:
+        return True
+    return health.is_available(backend)
+
+
+def record_backend_result(backend, ok, started):
+    """
+    记录后端请求结果
+
+    Args:
+        backend: 后端名称 (health.BACKEND_*)
+        ok: 后端是否正常响应
+        started: 请求开始时间戳
+    """
+    if CACHE_AVAILABLE:
+        health.record_result(backend, ok, time.time() - started)
+
+
+def backend_tripped(backend):
+    """后端处于熔断状态时返回 True（不占用探测名额，用于重试前判断）"""
+    if not CACHE_AVAILABLE:
+        return False
+    return health.get_health(backend)['state'] == health.STATE_OPEN
+
+
+# ========== 请求结果缓存 ==========
+
+# 有副作用或需要轮询的接口不缓存（登录、扫码状态、签到、歌单增删、收藏、关注、打卡上报），
+# 以及每次调用返回不同内容的接口（私人 FM、FM 垃圾桶、推荐视频流、云村广场）
+_MEMO_SKIP_RE = re.compile(r'login|logout|dailyTask|create|remove|manipulate|track/add|subscribe|follow|weblog|like|scrobble'
+                           r'|radio/get|radio/trash|mlog/rcmd|socialsquare')
+# 请求结果的保留时间（秒）；插件调用通常远短于此，后台服务中超过后重新请求
+REQUEST_MEMO_TTL = 60
+
+
+class RequestMemo(object):
+    """
+    进程内的请求结果缓存
+
+    同一次插件调用中，相同 (接口, 参数) 的成功响应在 ttl 秒内只请求一次；多个线程同时发起相同请求时
+    只有一个线程真正访问网络，其余线程等待并共享其结果。保存的是响应体（JSON 原文），每个调用方
+    各自解析得到新的对象，可以放心修改；发起请求的线程只解析一次，与不缓存时的开销相同。
+
+    Args:
+        ttl: 结果的保留时间（秒）
+    """
+
+    def __init__(self, ttl=REQUEST_MEMO_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results = {}
+        self._inflight = {}
+        self._stats = {}
+
+    @staticmethod
+    def make_key(*parts):
+        """将接口与参数规范化为缓存键（字典按键排序）"""
+        return json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+
+    def call(self, key, path, fetch, decode):
+        """
+        读取缓存结果，未命中时执行 fetch 并缓存成功的响应
+
+        Args:
+            key: make_key 生成的缓存键
+            path: 接口路径（用于统计）
+            fetch: 实际发送请求的函数，返回响应体（JSON），请求失败时返回 None
+            decode: 把响应体解析为响应数据的函数
+
+        Returns:
+            响应数据
+        """
+        with self._lock:
+            stats = self._stats.setdefault(path, {'hits': 0, 'shared': 0, 'misses': 0})
+            entry = self._results.get(key)
+            if entry is not None and time.time() - entry[0] >= self.ttl:
+                del self._results[key]
+                entry = None
+            leader = False
+            if entry is not None:
+                stats['hits'] += 1
+            else:
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = {'event': threading.Event(), 'body': None}
+                    self._inflight[key] = flight
+                    stats['misses'] += 1
+                else:
+                    stats['shared'] += 1
+
+        if entry is not None:
+            xbmc.log("plugin.audio.music: 请求缓存命中 {} (第 {} 次)".format(path, stats['hits']), xbmc.LOGDEBUG)
+            return decode(entry[1])
+
+        if not leader:
+            xbmc.log("plugin.audio.music: 等待进行中的相同请求 {}".format(path), xbmc.LOGDEBUG)
+            flight['event'].wait()
+            return decode(flight['body'])
+
+        body = None
+        result = None
+        try:
+            body = fetch()
+            result = decode(body)
+        finally:
+            # 保存不可变的响应体（bytearray 转为 bytes）
+            body = bytes(body) if body else None
+            with self._lock:
+                if body is not None and isinstance(result, dict) and result.get('code') == 200:
+                    self._results[key] = (time.time(), body)
+                self._inflight.pop(key, None)
+            flight['body'] = body
+            flight['event'].set()
+        return result
+
+    def clear(self):
+        """清空缓存结果"""
+        with self._lock:
+            self._results.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: {path: {'hits': 缓存命中, 'shared': 合并的并发请求, 'misses': 实际请求}}
+        """
+        with self._lock:
+            return copy.deepcopy(self._stats)
+
+    def log_stats(self):
+        """在日志中输出被重复请求的接口"""
+        redundant = {path: st for path, st in self.stats().items() if st['hits'] or st['shared']}
+        if redundant:
+            xbmc.log("plugin.audio.music: 重复请求统计 {}".format(redundant), xbmc.LOGINFO)
+
+
+def _decode_body(body, default, path):
+    """
+    解析响应体中的 JSON
+
+    Args:
+        body: 响应体，请求失败时为 None
+        default: 请求失败或响应不是 JSON 时的返回值
+        path: 接口路径（用于日志）
+
+    Returns:
+        响应数据
+    """
+    if body is None:
+        return default
+    try:
+        return json.loads(body)
+    except ValueError:
+        print("Path: {}, response: {}".format(path, bytes(body[:200])))
+        return default
+
+
+_memo = RequestMemo()
+atexit.register(_memo.log_stats)
+
+
+def get_request_memo():
+    """
+    获取进程内的请求结果缓存
+
+    Returns:
+        RequestMemo: 缓存实例
+    """
+    return _memo
+
+
 class NetEase(object):
     def __init__(self):
         self.header = {
@@ -88,7 +542,8 @@ class NetEase(object):
 
         cookie_jar = MozillaCookieJar(COOKIE_PATH)
         cookie_jar.load()
-        self.session = requests.Session()
+        # 网易云接口与其它后端共用传输层的长连接 Session
+        self.session = get_transport().session(BASE_URL)
         self.session.cookies = cookie_jar
 
         for cookie in cookie_jar:
@@ -97,14 +552,16 @@ class NetEase(object):
                 break
 
         self.enable_proxy = False
-        if xbmcplugin.getSetting(int(sys.argv[1]), 'enable_proxy') == 'true':
+        self.proxies = None
+        settings = get_settings()
+        if settings.get_bool('enable_proxy'):
             self.enable_proxy = True
-            proxy = xbmcplugin.getSetting(int(sys.argv[1]), 'host').strip(
-            ) + ':' + xbmcplugin.getSetting(int(sys.argv[1]), 'port').strip()
+            proxy = settings.get('host').strip() + ':' + settings.get('port').strip()
             self.proxies = {
                 'http': 'http://' + proxy,
                 'https': 'https://' + proxy,
             }
+        get_transport().set_proxies(self.proxies)
 
     def _raw_request(self, method, endpoint, data=None, use_mobile_header=False):
         """发送原始 HTTP 请求
@@ -116,25 +573,36 @@ class NetEase(object):
             use_mobile_header: 是否使用移动端请求头（用于扫码登录等）
         """
         headers = self._get_mobile_header() if use_mobile_header else self.header
+        # 超时时间由该接口观测到的 p99 推导，DEFAULT_TIMEOUT 为上限
+        # 按接口分别统计：千首歌单详情与普通接口的耗时相差很大，混在一起会让大请求超时
+        latency_key = 'netease %s' % urlparse(endpoint).path
+        tracker = get_latency_tracker()
+        timeout = tracker.timeout_for(latency_key, DEFAULT_TIMEOUT)
+        started = time.time()
 
-        if method == "GET":
-            if not self.enable_proxy:
-                resp = self.session.get(
-                    endpoint, params=data, headers=headers, timeout=DEFAULT_TIMEOUT
-                )
-            else:
-                resp = self.session.get(
-                    endpoint, params=data, headers=headers, timeout=DEFAULT_TIMEOUT, proxies=self.proxies
-                )
-        elif method == "POST":
-            if not self.enable_proxy:
-                resp = self.session.post(
-                    endpoint, data=data, headers=headers, timeout=DEFAULT_TIMEOUT
-                )
-            else:
-                resp = self.session.post(
-                    endpoint, data=data, headers=headers, timeout=DEFAULT_TIMEOUT, proxies=self.proxies
-                )
+        try:
+            if method == "GET":
+                if not self.enable_proxy:
+                    resp = self.session.get(
+                        endpoint, params=data, headers=headers, timeout=timeout
+                    )
+                else:
+                    resp = self.session.get(
+                        endpoint, params=data, headers=headers, timeout=timeout, proxies=self.proxies
+                    )
+            elif method == "POST":
+                if not self.enable_proxy:
+                    resp = self.session.post(
+                        endpoint, data=data, headers=headers, timeout=timeout
+                    )
+                else:
+                    resp = self.session.post(
+                        endpoint, data=data, headers=headers, timeout=timeout, proxies=self.proxies
+                    )
+        except requests.exceptions.Timeout:
+            tracker.record(latency_key, timeout)
+            raise
+        tracker.record(latency_key, time.time() - started)
         return resp
 
     def _get_mobile_header(self):
@@ -171,8 +639,20 @@ class NetEase(object):
             rest={},
         )
 
+    @timed(lambda self, path, *args, **kwargs: 'netease %s' % path)
     def eapi_request(self, path, params={}, default={"code": -1}):
-        """发送 EAPI 加密请求
+        """发送 EAPI 加密请求（只读接口的成功响应在本进程内缓存，见 RequestMemo）"""
+        def decode(body):
+            return _decode_body(body, default, path)
+
+        if _MEMO_SKIP_RE.search(path):
+            _memo.clear()
+            return decode(self._eapi_request_body(path, params))
+        key = RequestMemo.make_key('eapi', path, params)
+        return _memo.call(key, path, lambda: self._eapi_request_body(path, params), decode)
+
+    def _eapi_request_body(self, path, params={}):
+        """发送 EAPI 加密请求，返回解密后的响应体
 
         EAPI 是网易云客户端使用的加密接口，服务端会实际处理请求数据。
         weapi 只是遥测端点，eapi 才是功能端点。
@@ -184,7 +664,9 @@ class NetEase(object):
         Args:
             path: API 路径, 如 '/api/feedback/weblog'
             params: 请求参数
-            default: 默认返回值
+
+        Returns:
+            JSON 响应体，请求失败时返回 None
         """
         endpoint = "https://interface.music.163.com/eapi" + path.replace('/api', '', 1)
         api_path = path  # 加密时使用原始 /api/ 路径
@@ -196,7 +678,7 @@ class NetEase(object):
                 break
         params.update({"csrf_token": csrf_token})
 
-        data = default
+        body = None
         encrypted = eapi_encrypt(api_path, params)
 
         # eapi 专用 headers
@@ -207,34 +689,58 @@ class NetEase(object):
             'Referer': 'https://music.163.com',
         }
 
+        latency_key = 'netease_eapi %s' % path
+        tracker = get_latency_tracker()
+        timeout = tracker.timeout_for(latency_key, DEFAULT_TIMEOUT)
+        started = time.time()
         try:
-            if not self.enable_proxy:
-                resp = self.session.post(endpoint, data=encrypted, headers=eapi_headers, timeout=DEFAULT_TIMEOUT)
-            else:
-                resp = self.session.post(endpoint, data=encrypted, headers=eapi_headers, timeout=DEFAULT_TIMEOUT, proxies=self.proxies)
-            if resp.text:
+            try:
+                if not self.enable_proxy:
+                    resp = self.session.post(endpoint, data=encrypted, headers=eapi_headers, timeout=timeout)
+                else:
+                    resp = self.session.post(endpoint, data=encrypted, headers=eapi_headers, timeout=timeout, proxies=self.proxies)
+            except requests.exceptions.Timeout:
+                tracker.record(latency_key, timeout)
+                raise
+            tracker.record(latency_key, time.time() - started)
+            if resp.content:
                 try:
-                    data = eapi_decrypt(resp.text)
-                except (ValueError, json.JSONDecodeError):
-                    try:
-                        data = resp.json()
-                    except ValueError:
-                        pass
+                    # 直接解密原始响应体，省去 resp.text 的解码副本
+                    body = eapi_decrypt_body(resp.content)
+                except ValueError:
+                    # 未加密的响应（如错误信息）
+                    body = resp.content
         except requests.exceptions.RequestException as e:
             xbmc.log(f'[EAPI] 请求异常: {str(e)}', xbmc.LOGERROR)
         finally:
-            return data
+            return body
 
+    @timed(lambda self, method, path, *args, **kwargs: 'netease %s' % path)
     def request(self, method, path, params={}, default={"code": -1}, custom_cookies={'os': 'android', 'appver': '9.2.70'}, use_mobile_header=False):
-        """发送 API 请求
+        """发送 API 请求（只读接口的成功响应在本进程内缓存，见 RequestMemo）"""
+        def decode(body):
+            return _decode_body(body, default, path)
+
+        if _MEMO_SKIP_RE.search(path):
+            # 有副作用的接口会使已缓存的结果过期（后台服务中缓存结果会保留一段时间）
+            _memo.clear()
+            return decode(self._request_body(method, path, params, custom_cookies, use_mobile_header))
+        key = RequestMemo.make_key(method, path, params, custom_cookies, use_mobile_header)
+        return _memo.call(key, path, lambda: self._request_body(method, path, params, custom_cookies, use_mobile_header),
+                          decode)
+
+    def _request_body(self, method, path, params={}, custom_cookies={'os': 'android', 'appver': '9.2.70'}, use_mobile_header=False):
+        """发送 API 请求，返回响应体
 
         Args:
             method: HTTP 方法 (GET/POST)
             path: API 路径
             params: 请求参数
-            default: 默认返回值
             custom_cookies: 自定义 Cookie
             use_mobile_header: 是否使用移动端请求头（用于扫码登录等）
+
+        Returns:
+            bytes: 响应体，请求失败时返回 None
         """
         endpoint = "{}{}".format(BASE_URL, path)
         csrf_token = ""
@@ -243,7 +749,7 @@ class NetEase(object):
                 csrf_token = cookie.value
                 break
         params.update({"csrf_token": csrf_token})
-        data = default
+        body = None
 
         for key, value in custom_cookies.items():
             cookie = self.make_cookie(key, value)
@@ -252,13 +758,11 @@ class NetEase(object):
         params = encrypted_request(params)
         try:
             resp = self._raw_request(method, endpoint, params, use_mobile_header=use_mobile_header)
-            data = resp.json()
+            body = resp.content
         except requests.exceptions.RequestException as e:
             print(e)
-        except ValueError as e:
-            print("Path: {}, response: {}".format(path, resp.text[:200]))
         finally:
-            return data
+            return body
 
     def login(self, username, password):
         if username.isdigit():
@@ -369,11 +873,11 @@ class NetEase(object):
         Returns:
             dict: 新碟数据
         """
-        # 尝试从缓存读取
+        # 尝试从缓存读取（过期后在期限内仍返回旧数据，并在后台刷新）
         if use_cache and CACHE_AVAILABLE:
             cache_db = get_cache_db()
             cache_key = cache_db.generate_cache_key('new_albums', offset, limit)
-            cached_data = cache_db.get(cache_key)
+            cached_data = cache_db.get(cache_key, refresh=lambda: self.new_albums(offset, limit, use_cache=False))
             if cached_data is not None:
                 xbmc.log('[plugin.audio.music] Using cached new_albums', xbmc.LOGDEBUG)
                 return cached_data
@@ -413,11 +917,12 @@ class NetEase(object):
         Returns:
             dict: 歌单数据
         """
-        # 尝试从缓存读取
+        # 尝试从缓存读取（过期后在期限内仍返回旧数据，并在后台刷新）
         if use_cache and CACHE_AVAILABLE:
             cache_db = get_cache_db()
             cache_key = cache_db.generate_cache_key('hot_playlists', category, order, offset, limit)
-            cached_data = cache_db.get(cache_key)
+            cached_data = cache_db.get(cache_key, refresh=lambda: self.hot_playlists(
+                category, order, offset, limit, use_cache=False))
             if cached_data is not None:
                 xbmc.log('[plugin.audio.music] Using cached hot_playlists: %s' % category, xbmc.LOGDEBUG)
                 return cached_data
@@ -446,10 +951,10 @@ class NetEase(object):
         Returns:
             dict: 分类标签数据
         """
-        # 尝试从缓存读取
+        # 尝试从缓存读取（过期后在期限内仍返回旧数据，并在后台刷新）
         if use_cache and CACHE_AVAILABLE:
             cache_db = get_cache_db()
-            cached_data = cache_db.get('playlist_catelogs')
+            cached_data = cache_db.get('playlist_catelogs', refresh=lambda: self.playlist_catelogs(use_cache=False))
             if cached_data is not None:
                 xbmc.log('[plugin.audio.music] Using cached playlist_catelogs', xbmc.LOGDEBUG)
                 return cached_data
@@ -514,11 +1019,11 @@ class NetEase(object):
         Returns:
             dict: 热门歌手数据
         """
-        # 尝试从缓存读取
+        # 尝试从缓存读取（过期后在期限内仍返回旧数据，并在后台刷新）
         if use_cache and CACHE_AVAILABLE:
             cache_db = get_cache_db()
             cache_key = cache_db.generate_cache_key('top_artists', offset, limit, total)
-            cached_data = cache_db.get(cache_key)
+            cached_data = cache_db.get(cache_key, refresh=lambda: self.top_artists(offset, limit, total, use_cache=False))
             if cached_data is not None:
                 xbmc.log('[plugin.audio.music] Using cached top_artists', xbmc.LOGDEBUG)
                 return cached_data
@@ -572,6 +1077,85 @@ class NetEase(object):
                       for _id in ids]), ids=json.dumps(ids))
         return self.request("POST", path, params)
 
+    def songs_detail_chunked(self, ids, chunk_size=SONGS_DETAIL_CHUNK_SIZE, max_workers=SONGS_DETAIL_WORKERS, progress=None):
+        """分块并发获取歌曲详情（用于超过 1000 首歌的歌单）
+
+        一次请求上万个 id 的 weapi 请求体过大，经常超时；这里按 chunk_size 分块，
+        最多 max_workers 个块同时请求，失败的块重试一次，结果按 ids 原顺序合并，
+        songs 与 privileges 一一对应
+
+        Args:
+            ids: 歌曲ID列表
+            chunk_size: 每块歌曲数
+            max_workers: 同时请求的块数
+            progress: 进度回调 progress(已完成块数, 总块数)
+
+        Returns:
+            dict: {'songs': [...], 'privileges': [...]}
+        """
+        chunk_size = max(1, int(chunk_size))
+        chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+        if not chunks:
+            return {'songs': [], 'privileges': []}
+
+        tasks = queue.Queue()
+        for index, chunk in enumerate(chunks):
+            tasks.put((index, chunk))
+        results = [None] * len(chunks)
+        lock = threading.Lock()
+        done = [0]
+        start = time.time()
+
+        def _worker():
+            while True:
+                try:
+                    index, chunk = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                resp = None
+                for attempt in range(2):
+                    try:
+                        resp = self.songs_detail(chunk)
+                    except Exception as e:
+                        xbmc.log('plugin.audio.music: 歌曲详情第 %d 块请求异常: %s' % (index + 1, str(e)), xbmc.LOGWARNING)
+                        resp = None
+                    if resp and resp.get('code') == 200:
+                        break
+                else:
+                    xbmc.log('plugin.audio.music: 歌曲详情第 %d/%d 块获取失败，跳过 %d 首' % (
+                        index + 1, len(chunks), len(chunk)), xbmc.LOGERROR)
+                results[index] = resp or {}
+                with lock:
+                    done[0] += 1
+                    finished = done[0]
+                if progress:
+                    try:
+                        progress(finished, len(chunks))
+                    except Exception:
+                        pass
+
+        threads = [threading.Thread(target=_worker, daemon=True)
+                   for _ in range(min(max(1, int(max_workers)), len(chunks)))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        songs, privileges = [], []
+        for chunk, resp in zip(chunks, results):
+            song_map = {str(song.get('id')): song for song in resp.get('songs', [])}
+            privilege_map = {str(priv.get('id')): priv for priv in resp.get('privileges', [])}
+            for _id in chunk:
+                song = song_map.get(str(_id))
+                if song is None:
+                    continue
+                songs.append(song)
+                privileges.append(privilege_map.get(str(_id), {}))
+
+        xbmc.log('plugin.audio.music: 分 %d 块获取 %d 首歌曲详情，得到 %d 首，耗时 %.2fs' % (
+            len(chunks), len(ids), len(songs), time.time() - start), xbmc.LOGINFO)
+        return {'songs': songs, 'privileges': privileges}
+
     def songs_url(self, ids, bitrate, source='netease'):
         path = "/weapi/song/enhance/player/url"
         params = dict(ids=ids, br=bitrate)
@@ -598,6 +1182,11 @@ class NetEase(object):
         result_data = []
         missing_ids = []
         for _id in ids_list:
+            cached = self._get_cached_play_url(_id, bitrate, source)
+            if cached:
+                result_data.append({'id': _id, 'url': cached['url'], 'br': cached['quality'] or bitrate})
+                continue
+
             url = None
             try:
                 xbmc.log("plugin.audio.music: songs_url trying TuneHub id={} br={}".format(_id, bitrate), xbmc.LOGDEBUG)
@@ -622,6 +1211,8 @@ class NetEase(object):
             result_data.append({'id': _id, 'url': url, 'br': bitrate})
             if not url:
                 missing_ids.append(_id)
+            else:
+                self._save_play_url(_id, bitrate, source, url, 'tunehub', str(bitrate))
 
         # 如果有缺失的 id，则调用原接口批量请求并合并回填
         if missing_ids:
@@ -643,6 +1234,7 @@ class NetEase(object):
                                     rd['url'] = nurl
                                     if 'br' in item:
                                         rd['br'] = item.get('br')
+                                    self._save_play_url(nid, bitrate, source, nurl, 'netease', str(rd['br']))
                                     xbmc.log("plugin.audio.music: songs_url backfilled id={} url={}".format(nid, nurl), xbmc.LOGDEBUG)
                                     break
                             except Exception:
@@ -657,6 +1249,9 @@ class NetEase(object):
         """
         获取歌曲播放链接（带智能搜索回退）
 
+        每首歌的候选（LXMUSIC 原音质 > LXMUSIC 音质降级 > 换源搜索 > 网易云原接口）
+        交给 UrlResolver 并发解析，返回优先级最高的可用地址。
+
         Args:
             ids: 歌曲ID列表或单个ID
             level: 音质级别 (standard/exceed/high/lossless/hires/dolby/jyeffect/jymaster)
@@ -667,8 +1262,6 @@ class NetEase(object):
         Returns:
             {'data': [{'id': id, 'url': url, 'level': level, 'source': source}]}
         """
-        path = "/weapi/song/enhance/player/url/v1"
-
         # 解析 ids 参数
         try:
             if isinstance(ids, str):
@@ -688,7 +1281,6 @@ class NetEase(object):
 
         xbmc.log("plugin.audio.music: songs_url_v1 ids_list={} level={} source={}".format(ids_list, level, source), xbmc.LOGDEBUG)
         result_data = []
-        missing_ids = []
 
         # 获取 LXMUSIC 音源标识符
         lxmusic_source = LXMUSIC_SOURCE_MAPPING.get(source)
@@ -708,9 +1300,16 @@ class NetEase(object):
         elif artist_names is None:
             artist_names = [None] * len(ids_list)
 
+        enable_source_fallback = get_settings().get_bool('enable_source_fallback')
+        resolver = self._get_url_resolver()
+        lxmusic_ok = None
+
         for idx, _id in enumerate(ids_list):
-            url = None
-            used_source = None
+            cached = self._get_cached_play_url(_id, level, source)
+            if cached:
+                result_data.append({'id': _id, 'url': cached['url'], 'level': level, 'source': cached['used_source'], 'quality': cached['quality']})
+                continue
+
             song_name = song_names[idx] if idx < len(song_names) else None
             artist_name = artist_names[idx] if idx < len(artist_names) else None
             if isinstance(song_name, (list, tuple)):
@@ -720,142 +1319,206 @@ class NetEase(object):
             song_name = str(song_name) if song_name else None
             artist_name = str(artist_name) if artist_name else None
 
-            LX_QUALITY_MAP = {'standard': '128k', 'exceed': '320k', 'high': '320k', 'lossless': 'flac', 'hires': 'flac24bit', 'dolby': 'flac24bit', 'jyeffect': 'flac24bit', 'jymaster': 'flac24bit'}
-            LX_QUALITY_FALLBACK = {'flac24bit': 'flac', 'flac': '320k', '320k': '128k', 'hires': 'flac', 'atmos': 'flac', 'atmos_plus': 'flac', 'master': 'flac'}
-            LX_SOURCE_FALLBACK = {'tx': ['kw', 'wy'], 'kw': ['tx', 'wy'], 'wy': ['tx', 'kw'], 'kg': ['tx', 'kw'], 'mg': ['tx', 'kw'], 'netease': ['tx', 'kw'], 'tencent': ['kw', 'wy'], 'kuwo': ['tx', 'wy']}
-
-            enable_source_fallback = xbmcaddon.Addon('plugin.audio.music').getSetting('enable_source_fallback') == 'true'
-
             lx_quality = LX_QUALITY_MAP.get(level, '320k')
+            candidates = []
 
-            # 1. LXMUSIC 原音源 + 音质降级
-            if lxmusic_source:
-                try:
-                    url = self._lxmusic_get_music_url(lxmusic_source, str(_id), lx_quality, max_retries=1)
-                    if url and self._check_url_valid(url):
-                        used_source = 'lxmusic'
-                except Exception:
-                    url = None
+            # LXMUSIC 熔断时只走网易云原接口（同一次调用只检查一次，避免占用多个探测名额）
+            if lxmusic_ok is None:
+                lxmusic_ok = backend_available(BACKEND_LXMUSIC)
+            if not lxmusic_ok:
+                xbmc.log("plugin.audio.music: LXMUSIC 已熔断，跳过 LXMUSIC 与换源候选", xbmc.LOGINFO)
 
-                if not url and lx_quality in LX_QUALITY_FALLBACK:
-                    fb_quality = lx_quality
-                    while not url and fb_quality in LX_QUALITY_FALLBACK:
-                        fb_quality = LX_QUALITY_FALLBACK[fb_quality]
-                        try:
-                            url = self._lxmusic_get_music_url(lxmusic_source, str(_id), fb_quality, max_retries=1)
-                            if url and self._check_url_valid(url):
-                                used_source = 'lxmusic_fallback_%s' % fb_quality
-                                xbmc.log("plugin.audio.music: LXMUSIC quality fallback to %s success" % fb_quality, xbmc.LOGINFO)
-                                break
-                            url = None
-                        except Exception:
-                            pass
+            # 1. LXMUSIC 原音源 + 音质降级
+            if lxmusic_source and lxmusic_ok:
+                candidates.append(('lxmusic/%s/%s' % (lxmusic_source, lx_quality),
+                                   self._lxmusic_url_candidate(lxmusic_source, str(_id), lx_quality, 'lxmusic')))
+                fb_quality = lx_quality
+                while fb_quality in LX_QUALITY_FALLBACK:
+                    fb_quality = LX_QUALITY_FALLBACK[fb_quality]
+                    candidates.append(('lxmusic/%s/%s' % (lxmusic_source, fb_quality),
+                                       self._lxmusic_url_candidate(lxmusic_source, str(_id), fb_quality, 'lxmusic_fallback_%s' % fb_quality)))
 
             # 2. 换源搜索 + 音质降级
-            if not url:
-                xbmc.log("plugin.audio.music: url=None, enable_source_fallback=%s, song_name=%s, artist_name=%s" % (enable_source_fallback, song_name, artist_name), xbmc.LOGINFO)
-            if not url and enable_source_fallback and (song_name or artist_name):
-                try:
-                    _sn = str(song_name) if song_name else ''
-                    _an = str(artist_name) if artist_name else ''
-                    search_keyword = ('%s %s' % (_an, _sn)).strip()
-                    xbmc.log("plugin.audio.music: 换源搜索 keyword=%s lxmusic_source=%s lx_quality=%s" % (search_keyword, lxmusic_source, lx_quality), xbmc.LOGINFO)
-
-                    SUPPORTED_LX_SOURCES = {'tx', 'kw', 'wy', 'kg', 'mg'}
-                    fallback_sources = LX_SOURCE_FALLBACK.get(lxmusic_source, ['tx', 'kw'])
-                    for alt_src in fallback_sources:
-                        if alt_src not in SUPPORTED_LX_SOURCES:
-                            continue
-                        xbmc.log("plugin.audio.music: 换源尝试 %s" % alt_src, xbmc.LOGINFO)
-                        alt_songs = []
-                        try:
-                            if alt_src == 'tx':
-                                _r = requests.get('https://c.y.qq.com/splcloud/fcgi-bin/smartbox_new.fcg', params={'key': search_keyword, 'num': 10}, headers={'User-Agent': 'Mozilla/5.0', 'Referer': 'https://y.qq.com/'}, timeout=10)
-                                _d = _r.json().get('data', {}).get('song', {}).get('itemlist', [])
-                                alt_songs = [{'id': s.get('mid', ''), 'name': s.get('name', '')} for s in _d]
-                            elif alt_src == 'kw':
-                                _r = requests.get('https://search.kuwo.cn/r.s', params={'all': search_keyword, 'ft': 'music', 'pn': 0, 'rn': 5, 'rformat': 'json', 'encoding': 'utf8', 'pcjson': 1}, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-                                _d = _r.json().get('abslist', [])
-                                alt_songs = []
-                                for s in _d:
-                                    _rid = s.get('MUSICRID', '')
-                                    _num_id = _rid.split('_')[1] if '_' in _rid else s.get('DC_TARGETID', '')
-                                    if _num_id:
-                                        alt_songs.append({'id': str(_num_id), 'name': s.get('SONGNAME','')})
-                        except Exception as ex:
-                            xbmc.log("plugin.audio.music: 换源搜索 %s 失败: %s" % (alt_src, str(ex)), xbmc.LOGWARNING)
-                            alt_songs = []
-                        xbmc.log("plugin.audio.music: 换源搜索 %s 结果: %d首" % (alt_src, len(alt_songs) if alt_songs else 0), xbmc.LOGINFO)
-                        if not alt_songs:
-                            continue
-                        for alt_song in alt_songs:
-                            alt_id = str(alt_song.get('id', ''))
-                            alt_name = alt_song.get('name', '') or alt_song.get('songname', '')
-                            if not alt_name:
-                                continue
-                            if song_name and (song_name not in alt_name and alt_name not in song_name):
-                                continue
-                            xbmc.log("plugin.audio.music: 换源匹配 %s: %s (id=%s)" % (alt_src, alt_name, alt_id), xbmc.LOGINFO)
-                            for try_quality in [lx_quality] + ([LX_QUALITY_FALLBACK.get(lx_quality, '')] if lx_quality in LX_QUALITY_FALLBACK else []):
-                                if not try_quality:
-                                    continue
-                                try:
-                                    alt_url = self._lxmusic_get_music_url(alt_src, alt_id, try_quality, max_retries=1)
-                                    if alt_url and self._check_url_valid(alt_url):
-                                        url = alt_url
-                                        used_source = 'source_fallback_%s_%s' % (alt_src, try_quality)
-                                        xbmc.log("plugin.audio.music: 换源成功 %s/%s/%s" % (alt_src, alt_id, try_quality), xbmc.LOGINFO)
-                                        break
-                                except Exception as ex:
-                                    xbmc.log("plugin.audio.music: 换源LXMUSIC %s/%s/%s 失败: %s" % (alt_src, alt_id, try_quality, str(ex)), xbmc.LOGWARNING)
-                            if url:
-                                break
-                        if url:
-                            break
-                except Exception as ex:
-                    import traceback
-                    xbmc.log("plugin.audio.music: 换源搜索异常: %s\n%s" % (str(ex), traceback.format_exc()), xbmc.LOGERROR)
+            if lxmusic_ok and enable_source_fallback and (song_name or artist_name):
+                search_keyword = ('%s %s' % (artist_name or '', song_name or '')).strip()
+                for alt_src in LX_SOURCE_FALLBACK.get(lxmusic_source, ['tx', 'kw']):
+                    if alt_src not in LX_SEARCH_SOURCES:
+                        continue
+                    candidates.append(('source_fallback/%s' % alt_src,
+                                       self._source_fallback_candidate(alt_src, search_keyword, song_name, lx_quality)))
+            else:
+                xbmc.log("plugin.audio.music: 跳过换源搜索 enable_source_fallback=%s, song_name=%s, artist_name=%s" % (enable_source_fallback, song_name, artist_name), xbmc.LOGDEBUG)
 
-            xbmc.log("plugin.audio.music: songs_url_v1 id={} url={} used_source={}".format(_id, url, used_source), xbmc.LOGDEBUG)
-            result_data.append({'id': _id, 'url': url, 'level': level, 'source': used_source})
+            # 3. 网易原始接口：优先级最低，但立即启动，不排在 LXMUSIC 各音质尝试之后
+            candidates.append(('netease', self._netease_url_candidate(_id, level, isinstance(ids, (list, tuple)))))
 
-            if not url:
-                missing_ids.append(_id)
+            url, used_source, quality = resolver.resolve(candidates, eager=('netease',))
+            if url:
+                self._save_play_url(_id, level, source, url, used_source, quality)
 
-        # 回退网易原始接口以获取剩余的播放地址
-        if missing_ids:
-            xbmc.log("plugin.audio.music: songs_url_v1 missing_ids after LXMUSIC/TuneHub: {}".format(missing_ids), xbmc.LOGDEBUG)
-            try:
-                if level == 'dolby':
-                    netease_params = dict(ids=missing_ids if isinstance(ids, (list, tuple)) else json.dumps(missing_ids), level='hires', effects='["dolby"]', encodeType='mp4')
-                    xbmc.log("plugin.audio.music: songs_url_v1 falling back to NetEase (dolby) ids={}".format(missing_ids), xbmc.LOGDEBUG)
-                    netease_data = self.request("POST", path, netease_params, custom_cookies={'os': 'pc', 'appver': '2.10.11.201538'})
-                else:
-                    netease_params = dict(ids=missing_ids if isinstance(ids, (list, tuple)) else json.dumps(missing_ids), level=level, encodeType='flac')
-                    xbmc.log("plugin.audio.music: songs_url_v1 falling back to NetEase ids={}".format(missing_ids), xbmc.LOGDEBUG)
-                    netease_data = self.request("POST", path, netease_params)
-
-                xbmc.log("plugin.audio.music: songs_url_v1 netease response type={}".format(type(netease_data)), xbmc.LOGDEBUG)
-                if isinstance(netease_data, dict) and 'data' in netease_data:
-                    for item in netease_data.get('data') or []:
-                        nid = item.get('id')
-                        nurl = item.get('url')
-                        for rd in result_data:
-                            try:
-                                if str(rd.get('id')) == str(nid) and (not rd.get('url')) and nurl:
-                                    rd['url'] = nurl
-                                    rd['source'] = 'netease'
-                                    xbmc.log("plugin.audio.music: songs_url_v1 backfilled id={} url={}".format(nid, nurl), xbmc.LOGDEBUG)
-                                    break
-                            except Exception:
-                                continue
-            except Exception as e:
-                xbmc.log("plugin.audio.music: songs_url_v1 netease fallback failed: {}".format(e), xbmc.LOGERROR)
-                pass
+            xbmc.log("plugin.audio.music: songs_url_v1 id={} url={} used_source={}".format(_id, url, used_source), xbmc.LOGDEBUG)
+            result_data.append({'id': _id, 'url': url, 'level': level, 'source': used_source, 'quality': quality})
 
         xbmc.log("plugin.audio.music: songs_url_v1 final result_data={}".format(result_data), xbmc.LOGDEBUG)
         return {'data': result_data}
 
+    def _get_cached_play_url(self, song_id, level, source):
+        """
+        读取已缓存的播放地址，命中后先校验地址，失效时自动删除
+
+        Args:
+            song_id: 歌曲ID
+            level: 音质级别或码率
+            source: 请求的音源
+
+        Returns:
+            dict: {'url', 'used_source', 'quality', 'expire_at'} 或 None
+        """
+        if not CACHE_AVAILABLE:
+            return None
+        try:
+            cached = get_cache_db().get_resolved_url(song_id, level, source)
+        except Exception as e:
+            xbmc.log("plugin.audio.music: 读取播放地址缓存失败: {}".format(e), xbmc.LOGWARNING)
+            return None
+        # 校验失败时 _check_url_valid 会清除该地址的缓存
+        if cached and self._check_url_valid(cached['url']):
+            xbmc.log("plugin.audio.music: 使用缓存的播放地址 id={} used_source={}".format(song_id, cached['used_source']), xbmc.LOGDEBUG)
+            return cached
+        return None
+
+    def _save_play_url(self, song_id, level, source, url, used_source, quality):
+        """按地址签名中的过期时间缓存解析结果"""
+        if not CACHE_AVAILABLE or not url:
+            return
+        try:
+            expire_at = get_url_expire_at(url)
+            if expire_at <= time.time():
+                # 地址已经（或即将）过期
+                return
+            get_cache_db().set_resolved_url(song_id, level, source, url, used_source, quality, expire_at)
+        except Exception as e:
+            xbmc.log("plugin.audio.music: 写入播放地址缓存失败: {}".format(e), xbmc.LOGWARNING)
+
+    def _invalidate_play_url(self, url):
+        """播放或校验失败时删除指向该地址的缓存"""
+        if not CACHE_AVAILABLE or not url:
+            return
+        try:
+            get_cache_db().invalidate_resolved_url(url)
+        except Exception as e:
+            xbmc.log("plugin.audio.music: 删除播放地址缓存失败: {}".format(e), xbmc.LOGWARNING)
+
+    def _get_url_resolver(self):
+        """按当前设置构建播放地址解析器（并发数、起播截止时间）"""
+        settings = get_settings()
+        max_workers = settings.get_int('resolver_workers', DEFAULT_MAX_WORKERS) or DEFAULT_MAX_WORKERS
+        deadline = settings.get_int('resolver_deadline', DEFAULT_DEADLINE) or DEFAULT_DEADLINE
+        return UrlResolver(max_workers=max_workers, deadline=deadline)
+
+    def _lxmusic_url_candidate(self, lx_source, songmid, lx_quality, used_source):
+        """构建 LXMUSIC 单音源单音质的解析候选"""
+        def _run(cancel):
+            url = self._lxmusic_get_music_url(lx_source, songmid, lx_quality, max_retries=1)
+            if not url or cancel.is_set():
+                return None
+            if self._check_url_valid(url):
+                return url, used_source, lx_quality
+            return None
+        return _run
+
+    def _source_fallback_candidate(self, alt_src, search_keyword, song_name, lx_quality):
+        """构建换源候选：在 alt_src 搜索同名歌曲后通过 LXMUSIC 获取地址"""
+        def _run(cancel):
+            alt_songs = self._search_alt_source(alt_src, search_keyword)
+            xbmc.log("plugin.audio.music: 换源搜索 %s 结果: %d首" % (alt_src, len(alt_songs)), xbmc.LOGINFO)
+            try_qualities = [lx_quality]
+            if LX_QUALITY_FALLBACK.get(lx_quality):
+                try_qualities.append(LX_QUALITY_FALLBACK[lx_quality])
+            for alt_song in alt_songs:
+                alt_id = str(alt_song.get('id', ''))
+                alt_name = alt_song.get('name', '') or alt_song.get('songname', '')
+                if not alt_name:
+                    continue
+                if song_name and (song_name not in alt_name and alt_name not in song_name):
+                    continue
+                xbmc.log("plugin.audio.music: 换源匹配 %s: %s (id=%s)" % (alt_src, alt_name, alt_id), xbmc.LOGINFO)
+                for try_quality in try_qualities:
+                    if cancel.is_set():
+                        return None
+                    try:
+                        alt_url = self._lxmusic_get_music_url(alt_src, alt_id, try_quality, max_retries=1)
+                        if alt_url and not cancel.is_set() and self._check_url_valid(alt_url):
+                            xbmc.log("plugin.audio.music: 换源成功 %s/%s/%s" % (alt_src, alt_id, try_quality), xbmc.LOGINFO)
+                            return alt_url, 'source_fallback_%s_%s' % (alt_src, try_quality), try_quality
+                    except Exception as ex:
+                        xbmc.log("plugin.audio.music: 换源LXMUSIC %s/%s/%s 失败: %s" % (alt_src, alt_id, try_quality, str(ex)), xbmc.LOGWARNING)
+            return None
+        return _run
+
+    def _search_alt_source(self, alt_src, search_keyword):
+        """
+        在 QQ 音乐 / 酷我中搜索歌曲（用于换源）
+
+        Args:
+            alt_src: LXMUSIC 音源标识符 (tx/kw)
+            search_keyword: 搜索关键词
+
+        Returns:
+            list: [{'id': id, 'name': name}]
+        """
+        alt_songs = []
+        try:
+            if alt_src == 'tx':
+                _r = get_transport().get('https://c.y.qq.com/splcloud/fcgi-bin/smartbox_new.fcg', params={'key': search_keyword, 'num': 10}, headers={'User-Agent': 'Mozilla/5.0', 'Referer': 'https://y.qq.com/'}, timeout=10)
+                _d = _r.json().get('data', {}).get('song', {}).get('itemlist', [])
+                alt_songs = [{'id': s.get('mid', ''), 'name': s.get('name', '')} for s in _d]
+            elif alt_src == 'kw':
+                _r = get_transport().get('https://search.kuwo.cn/r.s', params={'all': search_keyword, 'ft': 'music', 'pn': 0, 'rn': 5, 'rformat': 'json', 'encoding': 'utf8', 'pcjson': 1}, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
+                _d = _r.json().get('abslist', [])
+                for s in _d:
+                    _rid = s.get('MUSICRID', '')
+                    _num_id = _rid.split('_')[1] if '_' in _rid else s.get('DC_TARGETID', '')
+                    if _num_id:
+                        alt_songs.append({'id': str(_num_id), 'name': s.get('SONGNAME', '')})
+        except Exception as ex:
+            xbmc.log("plugin.audio.music: 换源搜索 %s 失败: %s" % (alt_src, str(ex)), xbmc.LOGWARNING)
+            alt_songs = []
+        return alt_songs
+
+    def _netease_url_candidate(self, song_id, level, ids_is_list=True):
+        """构建网易云原始接口的解析候选（优先级最低，不做地址校验）"""
+        path = "/weapi/song/enhance/player/url/v1"
+
+        def _run(cancel):
+            ids_param = [song_id] if ids_is_list else json.dumps([song_id])
+            if level == 'dolby':
+                netease_params = dict(ids=ids_param, level='hires', effects='["dolby"]', encodeType='mp4')
+                netease_data = self.request("POST", path, netease_params, custom_cookies={'os': 'pc', 'appver': '2.10.11.201538'})
+            else:
+                netease_params = dict(ids=ids_param, level=level, encodeType='flac')
+                netease_data = self.request("POST", path, netease_params)
+            if isinstance(netease_data, dict):
+                for item in netease_data.get('data') or []:
+                    if str(item.get('id')) == str(song_id) and item.get('url'):
+                        return item.get('url'), 'netease', item.get('level') or level
+            return None
+        return _run
+
+    @staticmethod
+    @timed(lambda params, headers, **kwargs: 'tunehub %s' % params.get('type', ''))
+    def _tunehub_get(params, headers, **kwargs):
+        """TuneHub GET 请求：查询类接口是幂等的，经过 HTTP 响应缓存，慢于 p95 时发送对冲请求
+
+        type=url 的响应可能重定向到音频文件，不缓存也不做对冲，避免重复下载
+        """
+        latency_key = 'tunehub_%s' % params.get('type', '')
+        if params.get('type') == 'url':
+            return get_transport().get(TUNEHUB_API, latency_key=latency_key, params=params, headers=headers,
+                                       timeout=DEFAULT_TIMEOUT, **kwargs)
+        return get_http_cache().get(TUNEHUB_API, params=params, headers=headers, latency_key=latency_key,
+                                    hedge=True, timeout=DEFAULT_TIMEOUT, **kwargs)
+
     def tunehub_request(self, params):
         """Call TuneHub (music-dl.sayqz.com) API with given params and return parsed JSON or empty dict."""
         try:
@@ -870,9 +1533,9 @@ class NetEase(object):
             except Exception:
                 pass
             if not self.enable_proxy:
-                resp = self.session.get(TUNEHUB_API, params=params, headers=headers_for_tunehub, timeout=DEFAULT_TIMEOUT)
+                resp = self._tunehub_get(params, headers_for_tunehub)
             else:
-                resp = self.session.get(TUNEHUB_API, params=params, headers=headers_for_tunehub, timeout=DEFAULT_TIMEOUT, proxies=self.proxies, verify=False)
+                resp = self._tunehub_get(params, headers_for_tunehub, proxies=self.proxies, verify=False)
             xbmc.log("plugin.audio.music: tunehub_request params={} status={} url={}".format(params, getattr(resp, 'status_code', 'N/A'), getattr(resp, 'url', 'N/A')), xbmc.LOGDEBUG)
 
             # 检查 HTTP 状态码，如果返回错误（如 502），则返回 None 表示 TuneHub API 失败
@@ -928,11 +1591,32 @@ class NetEase(object):
         """Request TuneHub for a playable URL for `id`.
 
         Kept for backward compatibility; accepts optional `source` (platform).
+        Resolved URLs are cached until their signature expires.
         """
+        cache_source = 'tunehub_%s' % source
+        cached = self._get_cached_play_url(id, br or '', cache_source)
+        if cached:
+            return {'url': cached['url']}
+
         params = {'source': source, 'id': id, 'type': 'url'}
         if br:
             params['br'] = str(br)
-        return self.tunehub_request(params)
+        resp = self.tunehub_request(params)
+
+        url = None
+        if isinstance(resp, dict):
+            data = resp.get('data')
+            if resp.get('url'):
+                url = resp.get('url')
+            elif isinstance(data, dict):
+                url = data.get('url')
+            elif isinstance(data, list) and data and isinstance(data[0], dict):
+                url = data[0].get('url')
+        elif isinstance(resp, str):
+            url = resp
+        if url:
+            self._save_play_url(id, br or '', cache_source, url, 'tunehub', str(br or ''))
+        return resp
 
     def tunehub_api(self, source=None, id=None, type='info', br=None, keyword=None, limit=None, page=None):
         """Generic TuneHub API caller that supports the documented `type` values.
@@ -1014,9 +1698,9 @@ class NetEase(object):
             except Exception:
                 pass
             if not self.enable_proxy:
-                resp = self.session.get(TUNEHUB_API, params=params, headers=headers_for_tunehub, timeout=DEFAULT_TIMEOUT)
+                resp = self._tunehub_get(params, headers_for_tunehub)
             else:
-                resp = self.session.get(TUNEHUB_API, params=params, headers=headers_for_tunehub, timeout=DEFAULT_TIMEOUT, proxies=self.proxies, verify=False)
+                resp = self._tunehub_get(params, headers_for_tunehub, proxies=self.proxies, verify=False)
 
             xbmc.log("plugin.audio.music: tunehub_lrc params={} status={} url={}".format(params, getattr(resp, 'status_code', 'N/A'), getattr(resp, 'url', 'N/A')), xbmc.LOGDEBUG)
 
@@ -1113,7 +1797,7 @@ class NetEase(object):
         """
         try:
             url = f'https://apis.netstart.cn/music/scrobble?id={id}&sourceid={sourceId}&time={time}'
-            result = requests.get(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}, timeout=5).json()
+            result = get_transport().get(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}, timeout=5).json()
             if result.get('code') == 200:
                 xbmc.log(f'[Daka] 打卡成功: song_id={id}, sourceid={sourceId}, time={time}s', xbmc.LOGINFO)
                 return result
@@ -1200,11 +1884,11 @@ class NetEase(object):
         Returns:
             dict: 新歌数据
         """
-        # 尝试从缓存读取
+        # 尝试从缓存读取（过期后在期限内仍返回旧数据，并在后台刷新）
         if use_cache and CACHE_AVAILABLE:
             cache_db = get_cache_db()
             cache_key = cache_db.generate_cache_key('new_songs', areaId, total)
-            cached_data = cache_db.get(cache_key)
+            cached_data = cache_db.get(cache_key, refresh=lambda: self.new_songs(areaId, total, use_cache=False))
             if cached_data is not None:
                 xbmc.log('[plugin.audio.music] Using cached new_songs', xbmc.LOGDEBUG)
                 return cached_data
@@ -1282,11 +1966,12 @@ class NetEase(object):
         Returns:
             dict: 热门 MV 数据
         """
-        # 尝试从缓存读取
+        # 尝试从缓存读取（过期后在期限内仍返回旧数据，并在后台刷新）
         if use_cache and CACHE_AVAILABLE:
             cache_db = get_cache_db()
             cache_key = cache_db.generate_cache_key('top_mv', area, limit, offset, total)
-            cached_data = cache_db.get(cache_key)
+            cached_data = cache_db.get(cache_key, refresh=lambda: self.top_mv(
+                area, limit, offset, total, use_cache=False))
             if cached_data is not None:
                 xbmc.log('[plugin.audio.music] Using cached top_mv', xbmc.LOGDEBUG)
                 return cached_data
@@ -1491,6 +2176,7 @@ class NetEase(object):
 
     # ========== GD Music API 集成 ==========
 
+    @timed(lambda self, types, **params: 'gdmusic %s' % types)
     def _gdmusic_request(self, types, **params):
         """
         向 GD Music API 发送请求
@@ -1516,27 +2202,41 @@ class NetEase(object):
             'Connection': 'keep-alive',
         }
 
+        started = time.time()
+
         # 重试机制：最多 3 次尝试
         for attempt in range(3):
             try:
                 if attempt > 0:
-                    wait_time = min(2 ** attempt, 10)  # 最多等待 10 秒
-                    xbmc.log("plugin.audio.music: GD Music API 重试 %d/%d，等待 %d 秒" % (attempt + 1, 3, wait_time), xbmc.LOGINFO)
+                    # 本次请求期间后端已被熔断时不再等待重试
+                    if backend_tripped(BACKEND_GDMUSIC):
+                        xbmc.log("plugin.audio.music: GD Music API 已熔断，停止重试", xbmc.LOGINFO)
+                        break
+                    wait_time = backoff_delay(attempt)
+                    xbmc.log("plugin.audio.music: GD Music API 重试 %d/%d，等待 %.1f 秒" % (attempt + 1, 3, wait_time), xbmc.LOGINFO)
                     time.sleep(wait_time)
 
                 https_url = url.replace('http://', 'https://')
 
+                # 超时时间由 p99 推导，20 秒为上限；除播放地址（带签名，由播放地址缓存管理）外
+                # 都经过 HTTP 响应缓存，搜索慢于 p95 时发送对冲请求
+                def send(request_url, **kwargs):
+                    if types == 'url':
+                        return get_transport().get(request_url, latency_key='gdmusic_url', **kwargs)
+                    return get_http_cache().get(request_url, latency_key='gdmusic_%s' % types,
+                                                hedge=(types == 'search'), **kwargs)
+
                 # 尝试不同的 SSL 策略
                 if attempt == 0:
                     # 第一次尝试：使用 HTTPS
-                    response = requests.get(https_url, headers=headers, timeout=20)
+                    response = send(https_url, headers=headers, timeout=20)
                 elif attempt == 1:
                     # 第二次尝试：跳过 SSL 验证
-                    response = requests.get(https_url, headers=headers, timeout=20, verify=False)
+                    response = send(https_url, headers=headers, timeout=20, verify=False)
                 else:
                     # 最后尝试：使用 HTTP
                     http_url = url.replace('https://', 'http://')
-                    response = requests.get(http_url, headers=headers, timeout=20)
+                    response = send(http_url, headers=headers, timeout=20)
 
                 response.raise_for_status()
 
@@ -1551,6 +2251,7 @@ class NetEase(object):
                 try:
                     data = response.json()
                     xbmc.log("plugin.audio.music: GD Music API 尝试 %d 成功" % (attempt + 1), xbmc.LOGDEBUG)
+                    record_backend_result(BACKEND_GDMUSIC, True, started)
                     return data
                 except ValueError as json_error:
                     xbmc.log("plugin.audio.music: GD Music API JSON 解析失败: %s" % str(json_error), xbmc.LOGERROR)
@@ -1561,9 +2262,10 @@ class NetEase(object):
                 xbmc.log("plugin.audio.music: GD Music API 尝试 %d/%d 失败: %s" % (attempt + 1, 3, str(e)), xbmc.LOGERROR)
                 if attempt == 2:  # 最后一次尝试
                     xbmc.log("plugin.audio.music: GD Music API 所有重试均失败", xbmc.LOGERROR)
-                    return None
+                    break
                 continue
 
+        record_backend_result(BACKEND_GDMUSIC, False, started)
         return None
 
     def _gdmusic_get_play_url_with_fallback(self, track_id, quality='320', song_name='', artist_name='', original_source='netease'):
@@ -1585,6 +2287,10 @@ class NetEase(object):
         Returns:
             tuple: (play_url, source) 或 (None, None) 如果所有源都失败
         """
+        if not backend_available(BACKEND_GDMUSIC):
+            xbmc.log("plugin.audio.music: GD Music 已熔断，跳过: track_id=%s" % track_id, xbmc.LOGINFO)
+            return None, None
+
         # 构建优先级列表：原音乐源 > kuwo > joox > netease
         # 排除重复的音乐源
         fallback_sources = ['kuwo', 'joox', 'netease']
@@ -1596,6 +2302,9 @@ class NetEase(object):
 
         # 按优先级尝试每个音乐源
         for source in source_priority:
+            if backend_tripped(BACKEND_GDMUSIC):
+                xbmc.log("plugin.audio.music: GD Music 已熔断，停止尝试其余音源", xbmc.LOGINFO)
+                break
             xbmc.log("plugin.audio.music: GD Music 尝试音源: %s" % source, xbmc.LOGDEBUG)
 
             # 判断是否需要重新搜索
@@ -1669,6 +2378,7 @@ class NetEase(object):
         return NetEase._lxmusic_sha256(request_path + LXMUSIC_SCRIPT_MD5 + LXMUSIC_SECRET_KEY)
 
     @staticmethod
+    @timed(lambda url, timeout=10: 'lxmusic %s' % '/'.join(urlparse(url).path.split('/')[2:4]))
     def _lxmusic_make_request(url: str, timeout: int = 10) -> dict:
         """
         发送 LXMUSIC API HTTP 请求
@@ -1690,7 +2400,7 @@ class NetEase(object):
         }
 
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = get_transport().get(url, latency_key='lxmusic', headers=headers, timeout=timeout)
 
             # 检查 HTTP 状态码
             if response.status_code == 404:
@@ -1737,16 +2447,23 @@ class NetEase(object):
 
         xbmc.log(f"plugin.audio.music: LXMUSIC 请求 URL: {url}", xbmc.LOGDEBUG)
 
-        # 发送请求
-        data = NetEase._lxmusic_make_request(url, timeout)
+        # 发送请求（网络错误、5xx、鉴权失败和限流计入熔断器）
+        started = time.time()
+        try:
+            data = NetEase._lxmusic_make_request(url, timeout)
+        except Exception:
+            record_backend_result(BACKEND_LXMUSIC, False, started)
+            raise
 
         xbmc.log(f"plugin.audio.music: LXMUSIC 响应数据: {data}", xbmc.LOGDEBUG)
 
         # 检查响应数据
         if not data or 'code' not in data:
+            record_backend_result(BACKEND_LXMUSIC, False, started)
             raise Exception('LXMUSIC 无效的响应数据')
 
         code = data.get('code')
+        record_backend_result(BACKEND_LXMUSIC, code not in [403, 429], started)
 
         # 检查业务状态码
         if code in [0, 200]:
@@ -1795,15 +2512,19 @@ class NetEase(object):
                 last_error = e
                 xbmc.log(f"plugin.audio.music: LXMUSIC 尝试 {attempt + 1} 失败: {str(e)}", xbmc.LOGWARNING)
 
+                # 后端已熔断时不再退避重试
+                if backend_tripped(BACKEND_LXMUSIC):
+                    xbmc.log("plugin.audio.music: LXMUSIC 已熔断，停止重试", xbmc.LOGINFO)
+                    break
+
                 # 如果是 429 错误（请求过速），使用指数退避
                 if '429' in str(e) and attempt < max_retries - 1:
-                    backoff_time = min(2 ** attempt, 10)  # 最多等待 10 秒
-                    time.sleep(backoff_time)
+                    time.sleep(backoff_delay(attempt + 1))
                     continue
 
                 # 其他错误直接抛出
                 if attempt < max_retries - 1:
-                    time.sleep(1)  # 短暂等待后重试
+                    time.sleep(backoff_delay(0))  # 短暂等待后重试
                 else:
                     raise
 
@@ -1908,7 +2629,14 @@ class NetEase(object):
             }
 
             xbmc.log(f"plugin.audio.music: 搜索API请求: keyword={keyword}, source={source}", xbmc.LOGDEBUG)
-            response = requests.get(SEARCH_API_URL, params=params, headers=headers, timeout=10)
+            # 搜索 API 与 GD Music 是同一服务，共用熔断器
+            started = time.time()
+            try:
+                response = get_transport().hedged_get(SEARCH_API_URL, 'gdmusic_search', params=params, headers=headers, timeout=10)
+            except Exception:
+                record_backend_result(BACKEND_GDMUSIC, False, started)
+                raise
+            record_backend_result(BACKEND_GDMUSIC, response.status_code == 200, started)
 
             if response.status_code != 200:
                 xbmc.log(f"plugin.audio.music: 搜索API请求失败，状态码: {response.status_code}", xbmc.LOGWARNING)
@@ -1940,7 +2668,7 @@ class NetEase(object):
 
     def _check_url_valid(self, url: str) -> bool:
         """
-        检查 URL 是否可用（通过 HEAD 请求）
+        检查 URL 是否可用（Range GET 校验，结果按地址和主机缓存）
 
         Args:
             url: 要检查的 URL
@@ -1951,16 +2679,10 @@ class NetEase(object):
         if not url:
             return False
 
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.head(url, headers=headers, timeout=5, allow_redirects=True)
-            xbmc.log(f"plugin.audio.music: URL检查 {url[:50]}... 状态码: {response.status_code}", xbmc.LOGDEBUG)
-            return response.status_code == 200
-        except Exception as e:
-            xbmc.log(f"plugin.audio.music: URL检查失败: {str(e)}", xbmc.LOGWARNING)
-            return False
+        if get_validator().is_valid(url):
+            return True
+        self._invalidate_play_url(url)
+        return False
 
     def _get_song_info_from_netease(self, song_id: str) -> dict:
         """
@@ -2046,8 +2768,17 @@ class NetEase(object):
 
         xbmc.log(f"plugin.audio.music: 搜索关键词: {keyword}", xbmc.LOGDEBUG)
 
+        # 搜索依赖 GD Music 服务；LXMUSIC 熔断时直接使用 GD Music 获取地址
+        if not backend_available(BACKEND_GDMUSIC):
+            xbmc.log("plugin.audio.music: 搜索 API 已熔断，跳过搜索回退", xbmc.LOGINFO)
+            return ''
+        lxmusic_ok = backend_available(BACKEND_LXMUSIC)
+
         # 按照顺序尝试每个音源
         for search_source in search_sources_order:
+            if backend_tripped(BACKEND_GDMUSIC):
+                xbmc.log("plugin.audio.music: 搜索 API 已熔断，停止搜索回退", xbmc.LOGINFO)
+                break
             lxmusic_source = source_mapping.get(search_source)
             if not lxmusic_source:
                 xbmc.log(f"plugin.audio.music: 跳过不支持的音源: {search_source}", xbmc.LOGDEBUG)
@@ -2077,11 +2808,14 @@ class NetEase(object):
                     lxmusic_error = None
 
                     # 使用新的歌曲 ID 调用 LXMUSIC API
-                    try:
-                        new_url = self._lxmusic_get_music_url(lxmusic_source, new_song_id, quality)
-                    except Exception as e:
-                        lxmusic_error = str(e)
-                        xbmc.log(f"plugin.audio.music: LXMUSIC API 异常: {str(e)}", xbmc.LOGWARNING)
+                    if lxmusic_ok and not backend_tripped(BACKEND_LXMUSIC):
+                        try:
+                            new_url = self._lxmusic_get_music_url(lxmusic_source, new_song_id, quality)
+                        except Exception as e:
+                            lxmusic_error = str(e)
+                            xbmc.log(f"plugin.audio.music: LXMUSIC API 异常: {str(e)}", xbmc.LOGWARNING)
+                    else:
+                        lxmusic_error = 'LXMUSIC 已熔断'
 
                     # 检查 LXMUSIC API 结果
                     if new_url:
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+加密与 JSON 编解码基准测试（不依赖 Kodi）
+
+测量 encrypt.py 中的 encrypted_request、eapi_encrypt / eapi_decrypt、encrypted_id，
+以及典型接口响应（1000 首歌的歌单详情、100 首歌的搜索结果、20 条评论的评论页）的 JSON 编解码耗时。
+结果保存为 JSON 基线，之后的运行可与基线对比找出性能回退：
+
+    python3 benchmark.py                      # 运行并打印结果
+    python3 benchmark.py --save               # 运行并保存为基线
+    python3 benchmark.py --compare            # 运行并与基线对比，回退超过阈值时返回非 0
+    python3 benchmark.py --baseline other.json --compare
+    python3 benchmark.py --memory             # 测量多 MB EAPI 响应解密的峰值内存
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# 设置输出编码为 UTF-8
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+
+class MockXbmc:
+    """模拟 xbmc 模块"""
+    class LOGDEBUG:
+        pass
+
+    class LOGERROR:
+        pass
+
+    class LOGINFO:
+        pass
+
+    @staticmethod
+    def log(msg, level=None):
+        pass
+
+
+# 模拟 xbmc 模块
+sys.modules.setdefault('xbmc', MockXbmc)
+sys.modules.setdefault('xbmcaddon', MockXbmc)
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from encrypt import encrypted_request, encrypted_id, eapi_encrypt, eapi_decrypt, _eapi_aes_encrypt, _eapi_aes_decrypt, get_key_pool
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+# 比基线慢超过该比例视为回退
+REGRESSION_THRESHOLD = 0.2
+
+
+# ==================== 测试数据 ====================
+
+def _song(rng, i):
+    """生成一首网易云歌曲详情（字段与 /api/v6/playlist/detail 返回的 tracks 一致）"""
+    song_id = 1800000000 + i
+    return {
+        'name': '测试歌曲 %d - %s' % (i, ''.join(rng.choice('春夏秋冬风花雪月山川河海') for _ in range(6))),
+        'id': song_id,
+        'pst': 0, 't': 0,
+        'ar': [{'id': 10000 + rng.randint(0, 5000), 'name': '歌手%d' % rng.randint(0, 999), 'tns': [], 'alias': []}
+               for _ in range(rng.randint(1, 3))],
+        'alia': [], 'pop': rng.randint(0, 100), 'st': 0, 'rt': '', 'fee': rng.choice([0, 1, 8]),
+        'v': rng.randint(1, 80), 'crbt': None, 'cf': '',
+        'al': {'id': 30000000 + rng.randint(0, 999999), 'name': '专辑 %d' % rng.randint(0, 9999),
+               'picUrl': 'https://p2.music.126.net/%s/%d.jpg' % ('x' * 22, 109951160000000000 + i),
+               'tns': [], 'pic': 109951160000000000 + i},
+        'dt': rng.randint(120000, 360000),
+        'h': {'br': 320000, 'fid': 0, 'size': rng.randint(5000000, 12000000), 'vd': -45000.0},
+        'm': {'br': 192000, 'fid': 0, 'size': rng.randint(3000000, 8000000), 'vd': -42000.0},
+        'l': {'br': 128000, 'fid': 0, 'size': rng.randint(2000000, 5000000), 'vd': -40000.0},
+        'sq': {'br': 900000, 'fid': 0, 'size': rng.randint(20000000, 40000000), 'vd': -45000.0},
+        'hr': None, 'a': None, 'cd': '01', 'no': rng.randint(1, 12), 'rtUrl': None, 'ftype': 0,
+        'rtUrls': [], 'djId': 0, 'copyright': rng.randint(0, 2), 's_id': 0, 'mark': 8192,
+        'originCoverType': 1, 'originSongSimpleData': None, 'tagPicList': None, 'resourceState': True,
+        'version': rng.randint(1, 40), 'songJumpInfo': None, 'entertainmentTags': None, 'awardTags': None,
+        'single': 0, 'noCopyrightRcmd': None, 'mst': 9, 'cp': rng.randint(0, 2000000), 'mv': 0,
+        'rtype': 0, 'rurl': None, 'publishTime': 1500000000000 + i * 1000
+    }
+
+
+def _privilege(rng, song_id):
+    return {
+        'id': song_id, 'fee': rng.choice([0, 1, 8]), 'payed': 0, 'st': 0, 'pl': 320000, 'dl': 0,
+        'sp': 7, 'cp': 1, 'subp': 1, 'cs': False, 'maxbr': 999000, 'fl': 320000, 'toast': False,
+        'flag': 256, 'preSell': False, 'playMaxbr': 999000, 'downloadMaxbr': 999000,
+        'maxBrLevel': 'lossless', 'playMaxBrLevel': 'lossless', 'downloadMaxBrLevel': 'lossless',
+        'plLevel': 'exhigh', 'dlLevel': 'none', 'flLevel': 'exhigh', 'rscl': None,
+        'freeTrialPrivilege': {'resConsumable': False, 'userConsumable': False, 'listenType': None},
+        'chargeInfoList': [{'rate': br, 'chargeUrl': None, 'chargeMessage': None, 'chargeType': 0}
+                           for br in (128000, 192000, 320000, 999000)]
+    }
+
+
+def playlist_detail_payload(tracks=1000, seed=1):
+    """1000 首歌的歌单详情"""
+    rng = random.Random(seed)
+    songs = [_song(rng, i) for i in range(tracks)]
+    return {
+        'code': 200,
+        'playlist': {
+            'id': 123456789, 'name': '基准测试歌单', 'coverImgUrl': 'https://p1.music.126.net/cover.jpg',
+            'trackCount': tracks, 'playCount': 987654, 'description': '用于基准测试的歌单' * 10,
+            'tracks': songs,
+            'trackIds': [{'id': s['id'], 'v': s['v'], 't': 0, 'at': 1600000000000 + i, 'alg': None, 'uid': 1,
+                          'rcmdReason': ''} for i, s in enumerate(songs)]
+        },
+        'privileges': [_privilege(rng, s['id']) for s in songs]
+    }
+
+
+def search_payload(count=100, seed=2):
+    """100 首歌的搜索结果"""
+    rng = random.Random(seed)
+    return {'code': 200, 'result': {'songs': [_song(rng, i) for i in range(count)], 'songCount': 600, 'hasMore': True}}
+
+
+def comments_payload(count=20, seed=3):
+    """20 条评论的评论页"""
+    rng = random.Random(seed)
+    comments = []
+    for i in range(count):
+        comments.append({
+            'user': {'userId': rng.randint(1, 10 ** 9), 'nickname': '用户%d' % rng.randint(0, 99999),
+                     'avatarUrl': 'https://p1.music.126.net/avatar/%d.jpg' % rng.randint(0, 10 ** 12),
+                     'vipType': rng.choice([0, 11]), 'authStatus': 0},
+            'beReplied': [{'user': {'nickname': '回复对象', 'userId': 1},
+                           'content': '被回复的评论内容' * rng.randint(1, 5), 'status': 0}] if i % 3 == 0 else [],
+            'commentId': 5000000000 + i, 'content': '这首歌真好听，' * rng.randint(1, 20),
+            'time': 1700000000000 + i, 'timeStr': '2023-11-14', 'likedCount': rng.randint(0, 100000),
+            'liked': False, 'ipLocation': {'location': '上海'}
+        })
+    return {'code': 200, 'comments': comments, 'hotComments': comments[:5], 'total': 12345, 'more': True}
+
+
+# ==================== 计时 ====================
+
+def bench(func, number, repeat=7):
+    """
+    多轮计时，取单次调用的最短与中位耗时
+
+    Args:
+        func: 无参数的被测函数
+        number: 每轮调用次数
+        repeat: 轮数
+
+    Returns:
+        dict: {'best_us', 'median_us', 'number', 'repeat'}
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number * 1e6)
+    timings.sort()
+    return {
+        'best_us': round(timings[0], 3),
+        'median_us': round(timings[len(timings) // 2], 3),
+        'number': number,
+        'repeat': repeat
+    }
+
+
+def build_cases():
+    """返回 [(名称, 函数, 每轮调用次数)]"""
+    playlist = playlist_detail_payload()
+    search = search_payload()
+    comments = comments_payload()
+    playlist_text = json.dumps(playlist, ensure_ascii=False)
+    search_text = json.dumps(search, ensure_ascii=False)
+    comments_text = json.dumps(comments, ensure_ascii=False)
+
+    weapi_params = {'ids': json.dumps([s['id'] for s in search['result']['songs'][:20]]),
+                    'level': 'lossless', 'encodeType': 'flac', 'csrf_token': '0' * 32}
+    eapi_params = {'ids': '[1800000000]', 'level': 'lossless', 'encodeType': 'flac', 'header': '{}'}
+    # EAPI 响应为 hex 编码的 AES-ECB 密文
+    eapi_search_hex = _eapi_aes_encrypt(search_text).hex().upper()
+    eapi_playlist_hex = _eapi_aes_encrypt(playlist_text).hex().upper()
+
+    get_key_pool().fill()
+
+    return [
+        ('encrypted_request', lambda: encrypted_request(weapi_params), 2000),
+        ('encrypted_id', lambda: encrypted_id('109951163076136658'), 20000),
+        ('eapi_encrypt', lambda: eapi_encrypt('/api/song/enhance/player/url/v1', eapi_params), 5000),
+        ('eapi_decrypt_search_100', lambda: eapi_decrypt(eapi_search_hex), 50),
+        ('eapi_decrypt_playlist_1000', lambda: eapi_decrypt(eapi_playlist_hex), 20),
+        ('json_loads_playlist_1000', lambda: json.loads(playlist_text), 20),
+        ('json_dumps_playlist_1000', lambda: json.dumps(playlist, ensure_ascii=False), 20),
+        ('json_loads_search_100', lambda: json.loads(search_text), 50),
+        ('json_dumps_search_100', lambda: json.dumps(search, ensure_ascii=False), 50),
+        ('json_loads_comments_20', lambda: json.loads(comments_text), 500),
+        ('json_dumps_comments_20', lambda: json.dumps(comments, ensure_ascii=False), 500),
+    ]
+
+
+def run(only=None):
+    """
+    运行全部基准测试
+
+    Args:
+        only: 只运行名称包含该字符串的测试
+
+    Returns:
+        dict: {'meta': {...}, 'results': {名称: 计时结果}}
+    """
+    results = {}
+    for name, func, number in build_cases():
+        if only and only not in name:
+            continue
+        results[name] = bench(func, number)
+        print('%-30s best %12.1f us   median %12.1f us' % (name, results[name]['best_us'], results[name]['median_us']))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'system': platform.system(),
+            'machine': platform.machine(),
+            'timestamp': int(time.time())
+        },
+        'results': results
+    }
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    与基线对比
+
+    Args:
+        current: 本次结果
+        baseline: 基线结果
+        threshold: 回退阈值（比例）
+
+    Returns:
+        list: 回退的测试名称
+    """
+    meta = baseline.get('meta', {})
+    print('\n对比基线（%s %s, Python %s）:' % (meta.get('system'), meta.get('machine'), meta.get('python')))
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            print('%-30s 无基线' % name)
+            continue
+        ratio = result['best_us'] / base['best_us'] if base['best_us'] else 0
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  <-- 回退'
+            regressions.append(name)
+        print('%-30s %12.1f -> %12.1f us  (x%.2f)%s' % (name, base['best_us'], result['best_us'], ratio, flag))
+    return regressions
+
+
+# ==================== 峰值内存 ====================
+
+def eapi_decrypt_legacy(response_hex):
+    """旧的 EAPI 解密实现（整体 hex 解码、解密、切片去填充、解码为 str 后解析），用于对比"""
+    raw = bytes.fromhex(response_hex)
+    decrypted = _eapi_aes_decrypt(raw)
+    return json.loads(decrypted.decode('utf-8'))
+
+
+def peak_memory(func, *args):
+    """
+    测量函数执行期间新增的峰值内存（不含参数本身）
+
+    Returns:
+        int: 峰值内存（字节）
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def run_memory(tracks=5000):
+    """
+    测量多 MB EAPI 响应解密的峰值内存
+
+    Args:
+        tracks: 歌单歌曲数（决定响应大小）
+
+    Returns:
+        dict: {名称: 峰值内存（字节）}
+    """
+    text = json.dumps(playlist_detail_payload(tracks), ensure_ascii=False)
+    response_hex = _eapi_aes_encrypt(text).hex()
+    response_bytes = response_hex.encode('ascii')
+    # 解析结果本身占用的内存，两种实现都无法避免
+    parsed = peak_memory(json.loads, text)
+
+    results = {
+        'eapi_decrypt_legacy_text': peak_memory(eapi_decrypt_legacy, response_hex),
+        'eapi_decrypt_text': peak_memory(eapi_decrypt, response_hex),
+        'eapi_decrypt_content': peak_memory(eapi_decrypt, response_bytes),
+        'json_loads_only': parsed
+    }
+    mb = 1024.0 * 1024.0
+    print('EAPI 响应: %.1f MB hex（明文 %.1f MB）' % (len(response_hex) / mb, len(text.encode('utf-8')) / mb))
+    for name, peak in results.items():
+        print('%-30s 峰值 %8.1f MB   （不含解析结果 %8.1f MB）' % (name, peak / mb, (peak - parsed) / mb))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='加密与 JSON 编解码基准测试')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线文件路径')
+    parser.add_argument('--save', action='store_true', help='保存结果为基线')
+    parser.add_argument('--compare', action='store_true', help='与基线对比')
+    parser.add_argument('--only', help='只运行名称包含该字符串的测试')
+    parser.add_argument('--memory', action='store_true', help='测量多 MB EAPI 响应解密的峰值内存')
+    args = parser.parse_args()
+
+    if args.memory:
+        run_memory()
+        return 0
+
+    current = run(args.only)
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print('基线文件不存在: %s' % args.baseline)
+            return 1
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(current, baseline):
+            return 1
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('\n基线已保存: %s' % args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存数据库并发读写基准测试（不依赖 Kodi）
+
+模拟 preload_cache_async：后台线程不断把大的接口响应（1000 首歌的歌单详情）写入 cache.db，
+同时界面线程读取一个小的缓存条目，统计读取耗时的 p50 / p95 / 最大值。
+对比旧的连接方式（回滚日志、每次提交 fsync）与 cache.DB_PRAGMAS（WAL、synchronous=NORMAL）：
+
+    python3 benchmark_cache_concurrency.py
+    python3 benchmark_cache_concurrency.py --duration 5 --tracks 2000
+
+每种方式使用单独的临时数据库文件。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ADDON_DIR)
+
+from benchmark_startup import _install_kodi_stubs
+
+MODES = [
+    ('rollback journal', ()),
+    ('WAL + NORMAL', None),  # None 表示使用 cache.DB_PRAGMAS
+]
+
+
+def load_cache(profile):
+    """在模拟的 Kodi 环境中导入 cache.py，开启缓存"""
+    _install_kodi_stubs(profile)
+    import xbmcaddon
+    xbmcaddon.Addon.getSetting = lambda addon, key: 'true' if key == 'cache_enabled' else ''
+    import cache
+    return cache
+
+
+def run_mode(cache, pragmas, payload, duration, read_interval):
+    """
+    后台线程持续写入的同时在当前线程读取
+
+    Returns:
+        dict: {'reads', 'writes', 'p50', 'p95', 'max', 'errors'}（耗时单位为毫秒）
+    """
+    from perf import percentile
+    cache.CACHE_DB_PATH = os.path.join(tempfile.mkdtemp(prefix='cache_bench_'), 'cache.db')
+    cache.DB_PRAGMAS = pragmas
+    cache.close_connection()
+
+    reader = cache.get_cache_db()
+    reader.set('reader_key', {'id': 1, 'name': 'small entry'}, cache_type='artist_info')
+    stop = threading.Event()
+    writes = [0]
+
+    def writer():
+        db = cache.get_cache_db()
+        i = 0
+        while not stop.is_set():
+            db.set('preload_%d' % (i % 20), payload, cache_type='hot_playlists')
+            writes[0] += 1
+            i += 1
+        cache.close_connection()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    samples = []
+    errors = 0
+    end = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < end:
+            started = time.perf_counter()
+            if reader.get('reader_key') is None:
+                errors += 1
+            samples.append((time.perf_counter() - started) * 1000)
+            time.sleep(read_interval)
+    finally:
+        stop.set()
+        thread.join()
+        cache.close_connection()
+    samples.sort()
+    return {'reads': len(samples), 'writes': writes[0], 'p50': percentile(samples, 50),
+            'p95': percentile(samples, 95), 'max': samples[-1] if samples else 0, 'errors': errors}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='缓存数据库并发读写基准测试')
+    parser.add_argument('--duration', type=float, default=3, help='每种方式的运行时间（秒）')
+    parser.add_argument('--tracks', type=int, default=1000, help='写入的歌单详情的歌曲数')
+    parser.add_argument('--interval', type=float, default=2, help='两次读取之间的间隔（毫秒）')
+    args = parser.parse_args(argv)
+
+    cache = load_cache(tempfile.mkdtemp(prefix='addon_profile_'))
+    default_pragmas = cache.DB_PRAGMAS
+    from benchmark import playlist_detail_payload
+    payload = playlist_detail_payload(args.tracks)
+
+    print('后台写入 %d 首歌的歌单详情，界面线程每 %.0f ms 读取一次，运行 %.0f 秒' % (
+        args.tracks, args.interval, args.duration))
+    print('%-18s %8s %8s %10s %10s %10s %6s' % ('方式', '读取', '写入', 'p50(ms)', 'p95(ms)', 'max(ms)', '失败'))
+    for name, pragmas in MODES:
+        result = run_mode(cache, default_pragmas if pragmas is None else pragmas, payload,
+                          args.duration, args.interval / 1000.0)
+        print('%-18s %8d %8d %10.3f %10.3f %10.3f %6d' % (
+            name, result['reads'], result['writes'], result['p50'], result['p95'], result['max'], result['errors']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
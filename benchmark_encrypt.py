@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+weapi 加密微基准测试
+对比每次请求都生成密钥并做 RSA（旧实现）与使用预计算密钥对池（新实现）的单次请求 CPU 时间。
+不依赖 Kodi，可直接在目标设备（如 ARM 盒子）上运行：
+
+    python3 benchmark_encrypt.py [请求次数]
+"""
+
+import sys
+import os
+import time
+import platform
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import encrypt
+from encrypt import KeyPool, aes, rsa, create_key, NONCE, PUBKEY, MODULUS
+
+# 典型的 weapi 请求参数（歌曲详情，20 首）
+PAYLOAD = {
+    'c': '[' + ','.join('{"id": %d}' % (1800000000 + i) for i in range(20)) + ']',
+    'ids': '[' + ','.join(str(1800000000 + i) for i in range(20)) + ']',
+    'csrf_token': '0123456789abcdef0123456789abcdef'
+}
+
+
+def encrypted_request_fresh_key(text):
+    """旧实现：每次请求生成新的 secret 并做 RSA"""
+    data = encrypt.json.dumps(text).encode("utf-8")
+    secret = create_key(16)
+    params = aes(aes(data, NONCE), secret)
+    encseckey = rsa(secret, PUBKEY, MODULUS)
+    return {"params": params, "encSecKey": encseckey}
+
+
+def cpu_time_per_call(func, number):
+    """返回单次调用的平均 CPU 时间（微秒）"""
+    func()
+    start = time.process_time()
+    for _ in range(number):
+        func()
+    return (time.process_time() - start) / number * 1e6
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    before = cpu_time_per_call(lambda: encrypted_request_fresh_key(PAYLOAD), number)
+
+    # 预先补满密钥对池，只测请求路径上的开销
+    pool = KeyPool()
+    pool.fill()
+    encrypt._key_pool = pool
+    after = cpu_time_per_call(lambda: encrypt.encrypted_request(PAYLOAD), number)
+
+    # 后台补充密钥对的开销按复用次数分摊到每次请求
+    generate = cpu_time_per_call(KeyPool.generate, max(number // 10, 10))
+    amortized = after + generate / pool.reuse_limit
+
+    print("平台: %s %s, Python %s" % (platform.system(), platform.machine(), platform.python_version()))
+    print("请求次数: %d" % number)
+    print("旧实现（每次 RSA）:       %8.1f us/请求" % before)
+    print("密钥对池（请求路径）:     %8.1f us/请求" % after)
+    print("密钥对池（含后台补充）:   %8.1f us/请求" % amortized)
+    print("生成一个密钥对:           %8.1f us" % generate)
+    print("请求路径 CPU 时间减少:    %7.1f%%" % ((1 - after / before) * 100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+歌单渲染基准测试（不依赖 Kodi）
+
+用模拟的 xbmc 模块导入 addon.py，测量把 1000 首歌的歌单详情转换为列表项（get_songs_items）的耗时，
+对比每次都调用 Addon.getSetting（旧实现）与使用设置快照（settings.py）：
+
+    python3 benchmark_render.py                     # 1000 首歌
+    python3 benchmark_render.py --tracks 5000
+    python3 benchmark_render.py --setting-cost 30   # 模拟每次 getSetting 的开销（微秒）
+
+Kodi 中 getSetting 需要经过 Python 与 C++ 之间的调用并加锁读取设置，
+--setting-cost 用忙等待模拟这部分开销，默认 20 微秒。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ADDON_DIR)
+
+from benchmark_startup import _install_kodi_stubs
+
+# 渲染歌单时会读取的设置（歌曲标签全部开启）
+SETTINGS = {
+    'number_of_songs_per_page': '100', 'quality': '2', 'resolution': '2', 'song_naming_format': '0',
+    'show_album_name': 'true', 'hide_songs': 'false', 'show_index': 'true', 'like_tag': 'true',
+    'vip_tag': 'true', 'cloud_tag': 'true', 'exclusive_tag': 'true', 'sq_tag': 'true', 'presell_tag': 'true',
+    'pay_tag': 'true', 'mv_tag': 'true', 'mvfirst': 'false', 'auto_play_mv': 'false', 'cache_enabled': 'false',
+}
+
+
+class SettingCounter(object):
+    """统计 getSetting 调用次数，并按 cost 微秒模拟每次调用的开销"""
+
+    def __init__(self, cost_us):
+        self.cost = cost_us / 1e6
+        self.calls = 0
+
+    def __call__(self, addon, key):
+        self.calls += 1
+        if self.cost:
+            end = time.perf_counter() + self.cost
+            while time.perf_counter() < end:
+                pass
+        return SETTINGS.get(key, '')
+
+
+def load_addon(counter):
+    """在模拟的 Kodi 环境中导入 addon.py"""
+    _install_kodi_stubs(tempfile.mkdtemp(prefix='addon_profile_'))
+    import xbmcaddon
+    xbmcaddon.Addon.getSetting = lambda addon, key: counter(addon, key)
+    sys.argv = ['plugin://plugin.audio.music/', '1', '']
+    import addon
+    return addon
+
+
+def bench(func, repeat):
+    """返回 repeat 次中最快一次的耗时（毫秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='歌单渲染基准测试')
+    parser.add_argument('--tracks', type=int, default=1000, help='歌单歌曲数')
+    parser.add_argument('--setting-cost', type=float, default=20, help='每次 getSetting 的模拟开销（微秒）')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最快一次')
+    args = parser.parse_args(argv)
+
+    counter = SettingCounter(args.setting_cost)
+    addon = load_addon(counter)
+    import settings as settings_module
+    from benchmark import playlist_detail_payload
+
+    payload = playlist_detail_payload(args.tracks)
+    tracks, privileges = payload['playlist']['tracks'], payload['privileges']
+
+    def render():
+        addon.get_songs_items(tracks, privileges=privileges, source='playlist')
+
+    snapshot_get = settings_module.SettingsSnapshot.get
+    results = []
+    for name, get in (('旧实现（每次 getSetting）', lambda self, key: self.addon.getSetting(key)),
+                      ('设置快照', snapshot_get)):
+        settings_module.SettingsSnapshot.get = get
+        addon.settings.invalidate()
+        render()
+        counter.calls = 0
+        elapsed = bench(render, args.repeat)
+        results.append((name, elapsed, counter.calls // args.repeat))
+    settings_module.SettingsSnapshot.get = snapshot_get
+
+    print('歌曲数: %d，每次 getSetting 模拟开销: %.0f us' % (args.tracks, args.setting_cost))
+    for name, elapsed, calls in results:
+        print('%-28s %8.1f ms  getSetting %6d 次/渲染' % (name, elapsed, calls))
+    before, after = results[0][1], results[1][1]
+    print('渲染耗时减少: %.1f%%' % ((1 - after / before) * 100))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线端到端回放测试（不依赖 Kodi 与网络）
+
+在本机启动一个模拟后端的 HTTP 服务（网易云 weapi / eapi、TuneHub、LXMUSIC、GD Music、
+酷我 / QQ 搜索、音频 CDN），响应由固定种子生成的接口数据（字段与真实接口一致）构造。
+每个场景启动一个子进程，用模拟的 xbmc 模块执行 addon.py 的真实路由处理函数，
+HttpTransport 的适配器把所有请求转发到模拟后端，其他网络访问一律禁止。
+同一场景在同一个 profile 目录中运行多次：第一次为冷启动（缓存为空），之后为热启动，
+报告每个场景的耗时与各接口的请求次数：
+
+    python3 benchmark_replay.py                        # 所有场景，每个运行 3 次
+    python3 benchmark_replay.py play_lxmusic_429       # 指定场景
+    python3 benchmark_replay.py --runs 5 --latency 50  # 模拟每个请求 50 ms 的网络延迟
+    python3 benchmark_replay.py --check                # 检查结果，不符合预期时返回非 0
+
+耗时为 addon.py 执行耗时（不含 api 模块的导入，导入耗时见 benchmark_startup.py）；
+请求次数包含路由返回后后台线程（预取等）发出的请求。
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ADDON_DIR)
+
+from benchmark_startup import ADDON_ID, _Anything, _install_kodi_stubs
+
+RESULT_MARKER = '--- replay result ---'
+# 子进程固定使用的 weapi 密钥，模拟后端据此解密请求参数
+REPLAY_SECRET = b'0f1e2d3c4b5a6978'
+# 模拟的网络延迟（毫秒）
+DEFAULT_LATENCY = 20
+# LXMUSIC slow 模式的响应延迟（秒）
+DEFAULT_SLOW_DELAY = 3.0
+# 子进程超时（秒）
+CHILD_TIMEOUT = 120
+
+# 歌单详情接口返回的歌曲数与歌单总歌曲数（超出部分由 songs_detail_chunked 补全）
+PLAYLIST_TRACKS = 1000
+PLAYLIST_TOTAL = 1500
+SEARCH_COUNT = 100
+TOPLIST_COUNT = 100
+
+# 音频地址所在的 CDN 主机（按后端区分，地址校验按主机记录可信状态）
+AUDIO_HOSTS = {
+    'netease': 'm801.music.126.net',
+    'lxmusic': 'sycdn.kuwo.cn',
+    'tunehub': 'ws.stream.qqmusic.qq.com',
+    'gdmusic': 'er-sycdn.kuwo.cn',
+}
+AUDIO_LENGTH = 8 * 1024 * 1024
+
+_ID_RE = re.compile(r'\d{5,}')
+
+
+class Scenario(object):
+    """
+    回放场景
+
+    Args:
+        name: 场景名
+        route: 路由路径
+        lxmusic: LXMUSIC 模拟模式（ok / 403 / 429 / slow）
+        keyword: 搜索框输入的内容
+        settings: 覆盖的设置项
+        min_items: 列表路由至少应返回的列表项数
+        resolved: 播放路由解析出的地址中应包含的后端（见 AUDIO_HOSTS）
+    """
+
+    def __init__(self, name, route, lxmusic='ok', keyword='', settings=None, min_items=None, resolved=None):
+        self.name = name
+        self.route = route
+        self.lxmusic = lxmusic
+        self.keyword = keyword
+        self.settings = settings or {}
+        self.min_items = min_items
+        self.resolved = resolved
+
+    def check(self, result):
+        """
+        检查一次运行的结果
+
+        Returns:
+            str: 不符合预期的原因，符合时返回 None
+        """
+        if result.get('error'):
+            return result['error'].strip().splitlines()[-1]
+        if self.min_items is not None and result['items'] < self.min_items:
+            return '列表项 %d 少于 %d' % (result['items'], self.min_items)
+        if self.resolved is not None:
+            urls = [url for ok, url in result['resolved'] if ok and url]
+            if not urls:
+                return '未解析出播放地址'
+            if AUDIO_HOSTS[self.resolved] not in urls[0]:
+                return '播放地址来自意外的后端: %s' % urls[0]
+        return None
+
+
+PLAY_ROUTE = '/play/song/1800000001/0/123456789/240/netease/'
+
+SCENARIOS = [
+    Scenario('playlist', '/playlist/playlist/123456789/', min_items=PLAYLIST_TOTAL),
+    Scenario('sea', '/sea/1/', keyword='测试歌曲', min_items=SEARCH_COUNT),
+    Scenario('play_lxmusic', PLAY_ROUTE, resolved='lxmusic'),
+    Scenario('play_lxmusic_403', PLAY_ROUTE, lxmusic='403', resolved='netease'),
+    Scenario('play_lxmusic_429', PLAY_ROUTE, lxmusic='429', resolved='netease'),
+    Scenario('play_lxmusic_slow', PLAY_ROUTE, lxmusic='slow', resolved='lxmusic'),
+    Scenario('tunehub_toplist', '/tunehub_toplist/netease/3778678/', min_items=TOPLIST_COUNT),
+    Scenario('song_comments', '/song_comments/1800000001/0/', min_items=20),
+]
+SCENARIOS_BY_NAME = dict((scenario.name, scenario) for scenario in SCENARIOS)
+
+
+# ==================== 模拟后端 ====================
+
+def _audio_url(backend, song_id):
+    return 'https://%s/replay/%s/%s.mp3' % (AUDIO_HOSTS[backend], backend, song_id)
+
+
+def _song_index(song_id):
+    try:
+        return max(int(song_id) - 1800000000, 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class ReplayBackend(object):
+    """
+    按主机与接口构造模拟响应，并统计请求次数
+
+    Args:
+        latency: 每个请求的模拟网络延迟（秒）
+        slow_delay: LXMUSIC slow 模式的响应延迟（秒）
+    """
+
+    def __init__(self, latency=DEFAULT_LATENCY / 1000.0, slow_delay=DEFAULT_SLOW_DELAY):
+        from benchmark import playlist_detail_payload, search_payload, comments_payload
+        self.latency = latency
+        self.slow_delay = slow_delay
+        self.lxmusic = 'ok'
+        self.calls = {}
+        self._lock = threading.Lock()
+
+        playlist = playlist_detail_payload(PLAYLIST_TRACKS)
+        rng = random.Random(4)
+        playlist['playlist']['trackCount'] = PLAYLIST_TOTAL
+        playlist['playlist']['trackIds'] += [{'id': 1800000000 + i, 'v': rng.randint(1, 80), 't': 0}
+                                            for i in range(PLAYLIST_TRACKS, PLAYLIST_TOTAL)]
+        self._playlist = json.dumps(playlist).encode('utf-8')
+        self._search = json.dumps(search_payload(SEARCH_COUNT)).encode('utf-8')
+        self._comments = comments_payload
+
+    def reset(self, scenario):
+        """切换场景并清空请求计数"""
+        with self._lock:
+            self.lxmusic = scenario.lxmusic
+            self.calls = {}
+
+    def take_calls(self):
+        """
+        Returns:
+            dict: {'主机 接口': 请求次数}
+        """
+        with self._lock:
+            calls, self.calls = self.calls, {}
+        return calls
+
+    def _count(self, host, endpoint):
+        key = '%s %s' % (host, _ID_RE.sub('<id>', endpoint))
+        with self._lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+
+    def handle(self, method, host, path, query, body):
+        """
+        Returns:
+            tuple: (状态码, 响应头 dict, 响应体 bytes)
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if host in ('music.163.com', 'interface.music.163.com', 'interface3.music.163.com'):
+            return self._netease(host, path, body)
+        self._count(host, path)
+        params = dict(parse_qsl(query))
+        if host in AUDIO_HOSTS.values():
+            return self._audio(method)
+        if host == 'music-dl.sayqz.com':
+            return self._json(self._tunehub(params))
+        if host == '88.lxmusic.xn--fiqs8s':
+            return self._lxmusic(path)
+        if host == 'music-api.gdstudio.xyz':
+            return self._json(self._gdmusic(params))
+        if host == 'c.y.qq.com':
+            items = [{'mid': '00%dqq' % (1000 + i), 'name': params.get('key', '')} for i in range(3)]
+            return self._json({'code': 0, 'data': {'song': {'itemlist': items}}})
+        if host == 'search.kuwo.cn':
+            items = [{'MUSICRID': 'MUSIC_%d' % (2000000 + i), 'SONGNAME': params.get('all', '')} for i in range(3)]
+            return self._json({'abslist': items})
+        if host == 'apis.netstart.cn':
+            return self._json({'code': 200})
+        return 404, {}, b''
+
+    @staticmethod
+    def _json(data, status=200):
+        body = data if isinstance(data, bytes) else json.dumps(data).encode('utf-8')
+        return status, {'Content-Type': 'application/json;charset=UTF-8'}, body
+
+    @staticmethod
+    def _audio(method):
+        headers = {'Content-Type': 'audio/mpeg', 'Content-Range': 'bytes 0-1/%d' % AUDIO_LENGTH}
+        return 206, headers, b'' if method == 'HEAD' else b'ID'
+
+    # ---------- 网易云 ----------
+
+    def _netease(self, host, path, body):
+        form = dict(parse_qsl(body.decode('utf-8')))
+        if path.startswith('/eapi/'):
+            from encrypt import _eapi_aes_decrypt, _eapi_aes_encrypt
+            text = _eapi_aes_decrypt(bytes.fromhex(form.get('params', ''))).decode('utf-8')
+            api_path, params, _ = text.split('-36cd479b6b5-')
+            self._count(host, path)
+            data = self._netease_api(api_path, json.loads(params))
+            if not isinstance(data, bytes):
+                data = json.dumps(data).encode('utf-8')
+            return 200, {'Content-Type': 'application/json'}, _eapi_aes_encrypt(data).hex().upper().encode('ascii')
+        self._count(host, path)
+        params = self._weapi_params(form) if 'params' in form else form
+        return self._json(self._netease_api(path, params))
+
+    @staticmethod
+    def _weapi_params(form):
+        """用 REPLAY_SECRET 解开 weapi 的两层 AES"""
+        from encrypt import AES, NONCE
+
+        def decrypt(text, key):
+            plain = AES.new(key, 2, b"0102030405060708").decrypt(base64.b64decode(text))
+            return plain[:-plain[-1]]
+        return json.loads(decrypt(decrypt(form['params'], REPLAY_SECRET), NONCE).decode('utf-8'))
+
+    def _netease_api(self, path, params):
+        from benchmark import _song, _privilege
+        if path.endswith('/playlist/detail'):
+            return self._playlist
+        if path.endswith('/song/detail'):
+            ids = [item['id'] for item in json.loads(params.get('c', '[]'))]
+            songs = [_song(random.Random(_id), _song_index(_id)) for _id in ids]
+            return {'code': 200, 'songs': songs,
+                    'privileges': [_privilege(random.Random(s['id']), s['id']) for s in songs]}
+        if path.endswith('/search/get'):
+            return self._search
+        if '/resource/comments/' in path:
+            return self._comments(int(params.get('limit') or 20))
+        if '/song/enhance/player/url' in path:
+            ids = params.get('ids')
+            ids = json.loads(ids) if isinstance(ids, str) else ids or []
+            return {'code': 200, 'data': [{'id': int(_id), 'url': _audio_url('netease', _id), 'br': 320000,
+                                           'level': params.get('level', 'exhigh'), 'code': 200} for _id in ids]}
+        return {'code': 200}
+
+    # ---------- 第三方后端 ----------
+
+    def _tunehub(self, params):
+        kind = params.get('type')
+        if kind == 'toplist':
+            rng = random.Random(params.get('id'))
+            tracks = [{'id': str(3000000 + i), 'name': 'TuneHub 歌曲 %d' % i, 'artist': '歌手%d' % rng.randint(0, 999),
+                       'album': '专辑 %d' % rng.randint(0, 9999), 'duration': rng.randint(120, 360),
+                       'pic': 'https://p1.music.126.net/tunehub/%d.jpg' % i, 'platform': params.get('source')}
+                      for i in range(TOPLIST_COUNT)]
+            return {'code': 200, 'data': {'list': tracks}}
+        if kind == 'url':
+            return {'code': 200, 'url': _audio_url('tunehub', params.get('id'))}
+        return {'code': 200, 'data': []}
+
+    def _lxmusic(self, path):
+        # /lxmusicv4/url/<source>/<songmid>/<quality>
+        parts = path.split('/')
+        if self.lxmusic in ('403', '429'):
+            code = int(self.lxmusic)
+            return self._json({'code': code, 'msg': 'replay %d' % code}, status=code)
+        if self.lxmusic == 'slow':
+            time.sleep(self.slow_delay)
+        return self._json({'code': 0, 'msg': 'success', 'url': _audio_url('lxmusic', parts[4] if len(parts) > 4 else '')})
+
+    def _gdmusic(self, params):
+        kind = params.get('types')
+        if kind == 'search':
+            name = params.get('name', '')
+            return [{'id': str(4000000 + i), 'name': name, 'artist': ['歌手'], 'album': '专辑',
+                     'pic_id': str(i), 'lyric_id': str(i), 'source': params.get('source')} for i in range(3)]
+        if kind == 'url':
+            return {'url': _audio_url('gdmusic', params.get('id')), 'br': 320, 'size': AUDIO_LENGTH}
+        if kind == 'lyric':
+            return {'lyric': '', 'tlyric': ''}
+        return {'url': ''}
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    # keep-alive，与真实后端一样复用连接
+    protocol_version = 'HTTP/1.1'
+
+    def _serve(self):
+        # 请求路径为 /<原主机><原路径>，见 ReplayAdapter
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try:
+            status, headers, data = self.server.backend.handle(self.command, host, '/' + path, parts.query, body)
+        except Exception:
+            traceback.print_exc()
+            status, headers, data = 500, {}, b''
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    do_GET = do_POST = do_HEAD = _serve
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """在本机随机端口上运行的模拟后端"""
+
+    daemon_threads = True
+
+    def __init__(self, backend):
+        self.backend = backend
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), _ReplayHandler)
+        self._thread = threading.Thread(target=self.serve_forever, name='replay-server')
+        self._thread.daemon = True
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def handle_error(self, request, client_address):
+        # 解析器取消候选后客户端会直接断开连接
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            ThreadingHTTPServer.handle_error(self, request, client_address)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+# ==================== 子进程：模拟 Kodi 环境执行路由 ====================
+
+def _default_settings():
+    """resources/settings.xml 中的默认值（模拟刚安装的插件）"""
+    root = ET.parse(os.path.join(ADDON_DIR, 'resources', 'settings.xml')).getroot()
+    return dict((node.get('id'), node.get('default', '')) for node in root.iter('setting') if node.get('id'))
+
+
+def _loopback_only():
+    """只允许连接本机（模拟后端），其他网络访问快速失败"""
+    connect = socket.socket.connect
+
+    def _connect(self, address):
+        if isinstance(address, tuple) and address[0] not in ('127.0.0.1', '::1', 'localhost'):
+            raise OSError('network disabled by benchmark_replay: %s' % (address,))
+        return connect(self, address)
+    socket.socket.connect = _connect
+
+
+def _install_replay_stubs(scenario, capture):
+    """在 benchmark_startup 的模拟模块上补充设置、搜索框、ListItem 与结果记录"""
+    import xbmc
+    import xbmcaddon
+    import xbmcgui
+    import xbmcplugin
+
+    values = _default_settings()
+    values.update({'enable_service': 'false', 'perf_tracking': 'false'})
+    values.update(scenario.settings)
+    xbmcaddon.Addon.getSetting = lambda addon, key: values.get(key, '')
+    xbmcaddon.Addon.getSettingBool = lambda addon, key: values.get(key) == 'true'
+
+    class Keyboard(object):
+        def __init__(self, default='', heading='', hidden=False):
+            pass
+
+        def doModal(self, *args):
+            pass
+
+        def isConfirmed(self):
+            return True
+
+        def getText(self):
+            return scenario.keyword
+
+    class ListItem(object):
+        def __init__(self, label='', label2='', path='', offscreen=False):
+            self.path = path
+
+        def setPath(self, path):
+            self.path = path
+
+        def getPath(self):
+            return self.path
+
+        def __getattr__(self, name):
+            return _Anything()
+
+    def add_directory_items(handle, items, total=0):
+        capture['items'] += len(items)
+        return True
+
+    def set_resolved_url(handle, succeeded, listitem):
+        capture['resolved'].append((bool(succeeded), getattr(listitem, 'path', '') or ''))
+
+    xbmc.Keyboard = Keyboard
+    xbmcgui.ListItem = ListItem
+    xbmcplugin.addDirectoryItems = add_directory_items
+    xbmcplugin.setResolvedUrl = set_resolved_url
+
+
+def _install_replay_transport(port):
+    """把 HttpTransport 的请求转发到模拟后端，weapi 使用固定密钥"""
+    import requests
+    import api
+    import encrypt
+
+    class ReplayAdapter(requests.adapters.HTTPAdapter):
+        def send(self, request, **kwargs):
+            original = request.url
+            parts = urlsplit(original)
+            request.url = 'http://127.0.0.1:%d/%s%s%s' % (
+                port, parts.netloc, parts.path or '/', '?' + parts.query if parts.query else '')
+            kwargs['proxies'] = None
+            response = requests.adapters.HTTPAdapter.send(self, request, **kwargs)
+            request.url = response.url = original
+            return response
+
+    api.HttpTransport.adapter_class = ReplayAdapter
+    secret_pair = (REPLAY_SECRET, encrypt.rsa(REPLAY_SECRET, encrypt.PUBKEY, encrypt.MODULUS))
+    encrypt.KeyPool.generate = staticmethod(lambda: secret_pair)
+
+
+def run_child(name, port, profile):
+    """在模拟的 Kodi 环境中执行场景的路由，结果以 JSON 写到标准输出"""
+    scenario = SCENARIOS_BY_NAME[name]
+    capture = {'items': 0, 'resolved': [], 'error': None}
+    _install_kodi_stubs(profile)
+    _install_replay_stubs(scenario, capture)
+    _loopback_only()
+    _install_replay_transport(port)
+
+    sys.argv = ['plugin://%s%s' % (ADDON_ID, scenario.route), '1', '']
+    out = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    # 不使用 runpy.run_path：它会把 sys.argv[0] 换成文件路径，而 addon.py 从 sys.argv[0] 读取路由
+    path = os.path.join(ADDON_DIR, 'addon.py')
+    with open(path, 'rb') as f:
+        code = compile(f.read(), path, 'exec')
+    started = time.perf_counter()
+    try:
+        exec(code, {'__name__': '__main__', '__file__': path})
+    except BaseException:
+        capture['error'] = traceback.format_exc()
+    capture['elapsed_ms'] = (time.perf_counter() - started) * 1000
+    out.write(RESULT_MARKER + json.dumps(capture) + '\n')
+    out.flush()
+
+
+# ==================== 父进程：运行场景与报告 ====================
+
+def run_scenario(server, scenario, runs, profile=None):
+    """
+    在同一个 profile 目录中运行场景 runs 次（第一次为冷启动）
+
+    Returns:
+        list: 每次运行的 {'elapsed_ms', 'items', 'resolved', 'error', 'calls'}
+    """
+    own_profile = profile is None
+    profile = profile or tempfile.mkdtemp(prefix='replay_profile_')
+    results = []
+    try:
+        for _ in range(runs):
+            server.backend.reset(scenario)
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', scenario.name,
+                 '--port', str(server.port), '--profile', profile],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=CHILD_TIMEOUT)
+            lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+            if lines:
+                result = json.loads(lines[-1][len(RESULT_MARKER):])
+            else:
+                result = {'elapsed_ms': 0, 'items': 0, 'resolved': [],
+                          'error': proc.stderr or 'child exited with %d' % proc.returncode}
+            result['calls'] = server.backend.take_calls()
+            results.append(result)
+    finally:
+        if own_profile:
+            shutil.rmtree(profile, ignore_errors=True)
+    return results
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else 0
+
+
+def report(scenario, results, verbose=True):
+    """打印一个场景的耗时与请求次数，返回不符合预期的原因列表"""
+    cold, warm = results[0], results[1:]
+    problems = [problem for problem in (scenario.check(result) for result in results) if problem]
+    warm_ms = '%8.1f' % _median([r['elapsed_ms'] for r in warm]) if warm else '%8s' % '-'
+    warm_calls = '%d' % _median([sum(r['calls'].values()) for r in warm]) if warm else '-'
+    print('%-20s 冷 %8.1f ms  热 %s ms  请求 %4d / %-4s %s' % (
+        scenario.name, cold['elapsed_ms'], warm_ms, sum(cold['calls'].values()), warm_calls,
+        '异常: ' + '；'.join(sorted(set(problems))) if problems else 'OK'))
+    if verbose:
+        warm_calls = warm[-1]['calls'] if warm else {}
+        for endpoint in sorted(set(cold['calls']) | set(warm_calls)):
+            print('    %-64s %4d / %d' % (endpoint, cold['calls'].get(endpoint, 0), warm_calls.get(endpoint, 0)))
+    return problems
+
+
+def main(argv):
+    if len(argv) > 1 and argv[1] == '--child':
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--child')
+        parser.add_argument('--port', type=int)
+        parser.add_argument('--profile')
+        args = parser.parse_args(argv[1:])
+        run_child(args.child, args.port, args.profile)
+        return 0
+
+    parser = argparse.ArgumentParser(description='离线端到端回放测试')
+    parser.add_argument('scenarios', nargs='*', help='场景名（默认全部）: %s' % ', '.join(SCENARIOS_BY_NAME))
+    parser.add_argument('--runs', type=int, default=3, help='每个场景的运行次数，第一次为冷启动')
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='每个请求的模拟网络延迟（毫秒）')
+    parser.add_argument('--slow-delay', type=float, default=DEFAULT_SLOW_DELAY, help='LXMUSIC slow 模式的延迟（秒）')
+    parser.add_argument('--check', action='store_true', help='结果不符合预期时返回非 0')
+    parser.add_argument('--quiet', action='store_true', help='不列出各接口的请求次数')
+    args = parser.parse_args(argv[1:])
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS_BY_NAME]
+    if unknown:
+        parser.error('未知场景: %s' % ', '.join(unknown))
+    scenarios = [SCENARIOS_BY_NAME[name] for name in args.scenarios] or SCENARIOS
+
+    server = ReplayServer(ReplayBackend(args.latency / 1000.0, args.slow_delay)).start()
+    failed = False
+    try:
+        print('请求次数为 冷启动 / 热启动，模拟网络延迟 %.0f ms' % args.latency)
+        for scenario in scenarios:
+            problems = report(scenario, run_scenario(server, scenario, max(1, args.runs)), not args.quiet)
+            failed = failed or bool(problems)
+    finally:
+        server.stop()
+    return 1 if failed and args.check else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+路由启动导入耗时报告（不依赖 Kodi）
+
+Kodi 每次调用路由都会在新的解释器中执行 addon.py。本脚本对每个路由启动一个
+`python -X importtime` 子进程，用模拟的 xbmc 模块执行 addon.py 的路由分发（禁止网络访问），
+统计 addon.py 执行期间的模块导入耗时，并检查每个路由的导入预算：
+
+    python3 benchmark_startup.py              # 所有路由
+    python3 benchmark_startup.py /history/    # 指定路由
+    python3 benchmark_startup.py --top 10     # 每个路由显示最慢的 10 个顶层导入
+
+超出预算（耗时或不应导入的模块）时返回非 0。
+"""
+
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import types
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_ID = 'plugin.audio.music'
+MARKER = '--- addon start ---'
+
+# 路由导入预算：(路由, 导入耗时上限（毫秒）, 不应导入的模块)
+# 不访问网络的路由不应导入 api（requests、Cryptodome）和 qrcode
+LIGHT_MODULES = ('api', 'requests', 'Cryptodome', 'qrcode')
+ROUTE_BUDGETS = [
+    ('/playlist_position/', 60, LIGHT_MODULES),
+    ('/playlist_focus_current/', 60, LIGHT_MODULES),
+    ('/history/', 60, LIGHT_MODULES),
+    ('/history_by_artist/', 60, LIGHT_MODULES),
+    ('/', 300, ('qrcode',)),
+    ('/toplists/', 300, ('qrcode',)),
+]
+
+_IMPORT_LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+# ==================== 子进程：模拟 Kodi 环境执行 addon.py ====================
+
+class _Anything(object):
+    """模拟对象：任意属性与调用都返回自身，作为布尔 / 数字 / 字符串时为空值"""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __bool__(self):
+        return False
+
+    def __int__(self):
+        return 0
+
+    def __len__(self):
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+    def __str__(self):
+        return ''
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    # 未模拟的属性（ListItem、Dialog 等）返回 _Anything
+    module.__getattr__ = lambda attr: _Anything()
+    sys.modules[name] = module
+    return module
+
+
+def _install_kodi_stubs(profile):
+    """安装模拟的 xbmc / xbmcaddon / xbmcgui / xbmcplugin / xbmcvfs / xbmcswift2 模块"""
+
+    class Addon(object):
+        def __init__(self, id=None):
+            pass
+
+        def getAddonInfo(self, key):
+            return {'profile': profile, 'id': ADDON_ID, 'path': ADDON_DIR}.get(key, '')
+
+        def getSetting(self, key):
+            return ''
+
+        def getSettingBool(self, key):
+            return False
+
+        def setSetting(self, key, value):
+            pass
+
+        def getLocalizedString(self, string_id):
+            return ''
+
+    class PlayList(object):
+        def __init__(self, *args):
+            pass
+
+        def size(self):
+            return 0
+
+        def getposition(self):
+            return -1
+
+        def __getattr__(self, name):
+            return _Anything()
+
+    class Window(object):
+        _props = {}
+
+        def __init__(self, *args):
+            pass
+
+        def getProperty(self, key):
+            return self._props.get(key, '')
+
+        def setProperty(self, key, value):
+            self._props[key] = value
+
+        def clearProperty(self, key):
+            self._props.pop(key, None)
+
+    def _mkdirs(path):
+        os.makedirs(path, exist_ok=True)
+        return True
+
+    xbmc = _module('xbmc', LOGDEBUG=0, LOGINFO=1, LOGNOTICE=1, LOGWARNING=2, LOGERROR=3, LOGFATAL=4,
+                   PLAYLIST_MUSIC=0, PLAYLIST_VIDEO=1, log=lambda msg, level=0: None,
+                   translatePath=lambda path: path if not path.startswith('special://') else profile,
+                   getInfoLabel=lambda *args: '', PlayList=PlayList)
+    xbmcaddon = _module('xbmcaddon', Addon=Addon)
+    _module('xbmcgui', Window=Window, NOTIFICATION_INFO='info', NOTIFICATION_WARNING='warning',
+            NOTIFICATION_ERROR='error')
+    xbmcplugin = _module('xbmcplugin', addDirectoryItems=lambda *args, **kwargs: True,
+                         endOfDirectory=lambda *args, **kwargs: None)
+    _module('xbmcvfs', translatePath=xbmc.translatePath, exists=os.path.exists, mkdir=_mkdirs, mkdirs=_mkdirs)
+    swift = _module('xbmcswift2', xbmc=xbmc, xbmcaddon=xbmcaddon, xbmcplugin=xbmcplugin)
+    swift.__path__ = []
+
+
+def _block_network():
+    """禁止子进程访问网络，访问网络的路由会快速失败"""
+    def _connect(self, *args, **kwargs):
+        raise OSError('network disabled by benchmark_startup')
+    socket.socket.connect = _connect
+    socket.create_connection = lambda *args, **kwargs: _connect(None)
+
+
+def run_child(route):
+    """在模拟的 Kodi 环境中执行 addon.py 的指定路由"""
+    profile = tempfile.mkdtemp(prefix='addon_profile_')
+    _install_kodi_stubs(profile)
+    _block_network()
+    sys.path.insert(0, ADDON_DIR)
+    sys.argv = ['plugin://%s%s' % (ADDON_ID, route), '1', '']
+    devnull = open(os.devnull, 'w')
+    sys.stdout = devnull
+    sys.stderr.write(MARKER + '\n')
+    sys.stderr.flush()
+    # 不使用 runpy.run_path：它会把 sys.argv[0] 换成文件路径，而 addon.py 从 sys.argv[0] 读取路由
+    path = os.path.join(ADDON_DIR, 'addon.py')
+    with open(path, 'rb') as f:
+        code = compile(f.read(), path, 'exec')
+    try:
+        exec(code, {'__name__': '__main__', '__file__': path})
+    except BaseException:
+        pass
+
+
+# ==================== 父进程：统计与报告 ====================
+
+def measure(route):
+    """
+    测量一个路由的导入耗时
+
+    Args:
+        route: 路由路径
+
+    Returns:
+        dict: {'total_ms', 'imports': [(模块, 累计毫秒)], 'modules': set}
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child', route],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    lines = proc.stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+
+    imports = []
+    modules = set()
+    for line in lines:
+        m = _IMPORT_LINE_RE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        modules.add(name.split('.')[0])
+        # importtime 用缩进表示嵌套，缩进最少的是 addon.py 直接触发的导入
+        imports.append((indent, name, cumulative / 1000.0))
+
+    if imports:
+        top_indent = min(indent for indent, _, _ in imports)
+        top = [(name, ms) for indent, name, ms in imports if indent == top_indent]
+    else:
+        top = []
+    return {
+        'total_ms': sum(ms for _, ms in top),
+        'imports': sorted(top, key=lambda item: -item[1]),
+        'modules': modules
+    }
+
+
+def main(argv):
+    if len(argv) > 2 and argv[1] == '--child':
+        run_child(argv[2])
+        return 0
+
+    top_n = 5
+    routes = []
+    args = argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == '--top' and args:
+            top_n = int(args.pop(0))
+        else:
+            routes.append(arg)
+
+    budgets = ROUTE_BUDGETS
+    if routes:
+        known = dict((route, (budget, forbidden)) for route, budget, forbidden in ROUTE_BUDGETS)
+        budgets = [(route,) + known.get(route, (None, ())) for route in routes]
+
+    failed = False
+    for route, budget, forbidden in budgets:
+        result = measure(route)
+        problems = []
+        if budget is not None and result['total_ms'] > budget:
+            problems.append('超出预算 %d ms' % budget)
+        loaded = [name for name in forbidden if name in result['modules']]
+        if loaded:
+            problems.append('导入了 %s' % ', '.join(loaded))
+        failed = failed or bool(problems)
+
+        print('%-28s %8.1f ms  预算 %-6s %s' % (
+            route, result['total_ms'], '%d' % budget if budget is not None else '-',
+            '超标: ' + '；'.join(problems) if problems else 'OK'))
+        for name, ms in result['imports'][:top_n]:
+            print('    %-40s %8.1f ms' % (name, ms))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -5,28 +5,391 @@ SQLite 缓存模块
 """
 
 import os
+import atexit
 import time
 import json
+import zlib
 import sqlite3
 import hashlib
 import xbmc
 import xbmcvfs
 import xbmcaddon
 import threading
+from collections import OrderedDict
+from settings import get_settings
+from perf import timed
 
 try:
     xbmc.translatePath = xbmcvfs.translatePath
 except AttributeError:
     pass
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 __addon__ = xbmcaddon.Addon()
 __addon_id__ = __addon__.getAddonInfo('id')
 PROFILE = xbmc.translatePath(__addon__.getAddonInfo('profile'))
 CACHE_DB_PATH = os.path.join(PROFILE, 'cache.db')
 
+# 播放地址校验结果最长保留时间（秒）
+URL_VERDICT_MAX_AGE = 24 * 3600
+# HTTP 响应缓存在最后一次验证后的最长保留时间（秒）
+HTTP_RESPONSE_MAX_AGE = 7 * 24 * 3600
+
+# 数据库忙时等待的时间（毫秒），后台线程写入时读操作等待而不是报错
+DB_BUSY_TIMEOUT = 5000
+# 内存映射读取的最大字节数
+DB_MMAP_SIZE = 64 * 1024 * 1024
+# 打开连接时设置的 PRAGMA：WAL 模式下读写互不阻塞（预热缓存的后台线程写入时界面线程照常读取），
+# synchronous=NORMAL 时提交不再每次 fsync（断电最多丢失最近的几次提交，对缓存可以接受）
+DB_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=%d' % DB_MMAP_SIZE,
+    'PRAGMA busy_timeout=%d' % DB_BUSY_TIMEOUT,
+)
+
+# 缓存数据的编码：json（未压缩的 JSON 文本，旧版本写入的数据）、zlib、zstd（安装了 zstandard 时使用）
+CACHE_CODEC = 'zstd' if zstandard is not None else 'zlib'
+# 压缩级别（偏向压缩速度，低功耗设备上写入缓存不应明显变慢）
+ZLIB_LEVEL = 3
+ZSTD_LEVEL = 3
+# JSON 小于该字节数时不压缩
+CACHE_COMPRESS_MIN_SIZE = 512
+# 迁移旧数据时每批读取的行数
+CACHE_MIGRATE_BATCH = 200
+
+# cache 表后来增加的列（旧版本的数据库打开时补充）
+CACHE_ADDED_COLUMNS = (
+    ('codec', "TEXT NOT NULL DEFAULT 'json'"),
+    ('raw_size', 'INTEGER NOT NULL DEFAULT 0'),
+    ('stored_size', 'INTEGER NOT NULL DEFAULT 0'),
+    ('last_access', 'INTEGER NOT NULL DEFAULT 0'),
+    ('hit_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('refresh_at', 'INTEGER NOT NULL DEFAULT 0'),
+)
+
+# cache 表的容量上限（字节），设置 cache_max_size 的选项
+CACHE_MAX_SIZE_MAP = {
+    '0': 50 * 1024 * 1024,
+    '1': 100 * 1024 * 1024,
+    '2': 200 * 1024 * 1024,
+    '3': 500 * 1024 * 1024,
+    '4': 1024 * 1024 * 1024,
+}
+CACHE_DEFAULT_MAX_SIZE = CACHE_MAX_SIZE_MAP['1']
+# 各类型最多占用容量上限的比例，未列出的类型只受总容量限制
+# 评论、搜索结果很少重复访问，限制得比歌单详情严格
+CACHE_TYPE_QUOTAS = {
+    'song_comments': 0.05,
+    'artist_search': 0.05,
+    'artist_info': 0.1,
+    'recommend_resource': 0.1,
+    'playlist_detail': 0.6,
+}
+# 超出容量时清理到上限的该比例，避免之后每次写入都触发清理
+CACHE_EVICT_TARGET = 0.9
+# 同一进程中两次检查容量的最小间隔（秒）
+CACHE_EVICT_INTERVAL = 60
+# 清理顺序：已过期的条目最先，其余按 最近访问时间 + 命中次数 × CACHE_HIT_WEIGHT 从小到大，
+# 命中次数最多计 CACHE_HIT_CAP 次（经常访问的条目比只访问过一次的保留更久，但不会永远保留）
+CACHE_HIT_WEIGHT = 3600
+CACHE_HIT_CAP = 24
+# 缓存命中记录积累到该条数时写入数据库（其余在进程退出或清理前写入）
+CACHE_ACCESS_FLUSH = 100
+
+# 过期后仍可返回旧数据的类型及过期后的最长期限（秒）：过期的条目立即返回并在后台刷新，
+# 超出期限后按未命中处理（浏览页面的数据变化很慢，几乎总能直接用本地数据显示）
+CACHE_STALE_POLICY = {
+    'hot_playlists': 3 * 24 * 3600,
+    'top_artists': 3 * 24 * 3600,
+    'new_albums': 3 * 24 * 3600,
+    'new_songs': 3 * 24 * 3600,
+    'top_mv': 3 * 24 * 3600,
+    'playlist_catelogs': 30 * 24 * 3600,
+}
+# 条目被标记为刷新中后，该时间（秒）内其他线程和进程不再重复刷新；刷新失败时超时后重试
+CACHE_REFRESH_TIMEOUT = 120
+
+# 内存缓存（SQLite 之前的一级缓存）的最大条目数与最大字节数；字节数按 JSON 大小估算，
+# 解码后的对象约占 JSON 的 3~4 倍内存
+MEMORY_CACHE_MAX_ENTRIES = 128
+MEMORY_CACHE_MAX_BYTES = 8 * 1024 * 1024
+# 大于该字节数的条目不放入内存缓存，避免一个条目挤掉其余所有条目
+MEMORY_CACHE_MAX_ITEM_BYTES = 4 * 1024 * 1024
+
 # 线程本地存储，每个线程独立的数据库连接
 _thread_local = threading.local()
 
+# 尚未写入数据库的缓存命中记录：{key: [最近访问时间, 命中次数]}
+# 读取缓存时不立即写库，避免每次命中都产生一次写事务
+_access_lock = threading.Lock()
+_pending_access = {}
+# 本进程上次检查容量的时间
+_last_budget_check = 0
+
+
+def get_connection():
+    """
+    获取当前线程访问 cache.db 的连接
+    同一线程中的 CacheDB 与其他直接访问 cache.db 的模块（歌词、封面缓存）共用这个连接；
+    不同线程使用各自的连接，WAL 模式下读连接不会被其他线程的写入阻塞
+
+    Returns:
+        sqlite3.Connection: 数据库连接
+    """
+    conn = getattr(_thread_local, 'conn', None)
+    if conn is None:
+        directory = os.path.dirname(CACHE_DB_PATH)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        conn = sqlite3.connect(CACHE_DB_PATH, timeout=DB_BUSY_TIMEOUT / 1000.0, check_same_thread=False)
+        for pragma in DB_PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sqlite3.DatabaseError as e:
+                # 部分文件系统（如网络共享）不支持 WAL，保持默认设置
+                xbmc.log('[%s] %s failed: %s' % (__addon_id__, pragma, str(e)), xbmc.LOGWARNING)
+        _thread_local.conn = conn
+    return conn
+
+
+def close_connection():
+    """关闭当前线程的数据库连接"""
+    conn = getattr(_thread_local, 'conn', None)
+    _thread_local.conn = None
+    _thread_local.cache_db = None
+    if conn is not None:
+        conn.close()
+
+
+def _record_access(key, access_time):
+    """
+    记录一次缓存命中（暂存在内存中）
+
+    Returns:
+        bool: 暂存的记录已达到 CACHE_ACCESS_FLUSH 条，应写入数据库
+    """
+    with _access_lock:
+        entry = _pending_access.get(key)
+        if entry is None:
+            _pending_access[key] = [access_time, 1]
+        else:
+            entry[0] = max(entry[0], access_time)
+            entry[1] += 1
+        return len(_pending_access) >= CACHE_ACCESS_FLUSH
+
+
+def _take_access():
+    """
+    取出并清空暂存的缓存命中记录
+
+    Returns:
+        list: [(最近访问时间, 命中次数, 缓存键)]
+    """
+    global _pending_access
+    with _access_lock:
+        pending, _pending_access = _pending_access, {}
+    return [(access_time, hits, key) for key, (access_time, hits) in pending.items()]
+
+
+def _flush_access_at_exit():
+    """进程退出时写入暂存的缓存命中记录"""
+    if _pending_access:
+        get_cache_db().flush_access()
+
+
+atexit.register(_flush_access_at_exit)
+
+
+def encode_payload(data, codec=None):
+    """
+    把缓存数据编码为 JSON 并压缩
+
+    Args:
+        data: JSON 可序列化的数据
+        codec: 编码，默认为 CACHE_CODEC
+
+    Returns:
+        tuple: (编码, 写入 data 列的值, JSON 字节数)；数据较小时编码为 json，值为文本
+    """
+    raw = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    codec = codec or CACHE_CODEC
+    if len(raw) < CACHE_COMPRESS_MIN_SIZE or codec == 'json':
+        return 'json', raw.decode('utf-8'), len(raw)
+    if codec == 'zstd':
+        stored = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    else:
+        codec = 'zlib'
+        stored = zlib.compress(raw, ZLIB_LEVEL)
+    return codec, sqlite3.Binary(stored), len(raw)
+
+
+def decode_payload(codec, stored):
+    """
+    解码 data 列的值
+
+    Args:
+        codec: 编码（json / zlib / zstd）
+        stored: data 列的值
+
+    Returns:
+        解码后的数据
+
+    Raises:
+        ValueError: 未知编码，或 zstd 数据但未安装 zstandard
+    """
+    if codec == 'zlib':
+        return json.loads(zlib.decompress(stored))
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError('zstandard not installed')
+        return json.loads(zstandard.ZstdDecompressor().decompress(stored))
+    if codec in (None, 'json'):
+        return json.loads(stored)
+    raise ValueError('unknown cache codec: %s' % codec)
+
+
+class MemoryCache(object):
+    """
+    进程内的 LRU 缓存，位于 SQLite 缓存之前，保存解码后的数据，按条目数与字节数限制容量
+
+    条目带有写入时 cache 表中该行的 id（INSERT OR REPLACE 每次写入都会分配新的 id），
+    读取时与数据库中当前的 id 比较，其他进程（插件进程与后台服务）写入或删除后不会读到旧数据。
+    后台服务中常驻，跨调用保留。返回的数据与其他调用方共享，调用方不能原地修改。
+
+    Args:
+        max_entries: 最大条目数
+        max_bytes: 最大字节数（JSON 大小）
+    """
+
+    def __init__(self, max_entries=MEMORY_CACHE_MAX_ENTRIES, max_bytes=MEMORY_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key, row_id):
+        """
+        读取数据
+
+        Args:
+            key: 缓存键
+            row_id: 数据库中该缓存键当前的行 id
+
+        Returns:
+            解码后的数据，未缓存或已被改写时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != row_id:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def put(self, key, row_id, data, size):
+        """
+        保存数据，超出容量时移除最久未使用的条目
+
+        Args:
+            key: 缓存键
+            row_id: 数据库中的行 id
+            data: 解码后的数据
+            size: JSON 字节数
+        """
+        with self._lock:
+            self._pop(key)
+            if size > MEMORY_CACHE_MAX_ITEM_BYTES or size > self.max_bytes:
+                return
+            self._entries[key] = (row_id, data, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def discard(self, key):
+        """移除指定缓存键"""
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self):
+        """清空所有条目"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: {'entries', 'bytes', 'hits', 'misses', 'evictions'}
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            return stats
+
+
+_memory_cache = MemoryCache()
+
+
+def get_memory_cache():
+    """
+    获取进程内的内存缓存（各线程共用）
+
+    Returns:
+        MemoryCache: 缓存实例
+    """
+    return _memory_cache
+
+
+def _stale_expired_condition(current_time):
+    """
+    已过期且超出 CACHE_STALE_POLICY 期限（不能再作为旧数据返回）的 SQL 条件
+
+    Returns:
+        tuple: (SQL 条件, 参数)
+    """
+    cases = ' '.join('WHEN ? THEN ?' for _ in CACHE_STALE_POLICY)
+    params = []
+    for cache_type, max_stale in CACHE_STALE_POLICY.items():
+        params.extend((cache_type, max_stale))
+    params.append(current_time)
+    return '(timestamp + expire_seconds + CASE type %s ELSE 0 END) < ?' % cases, tuple(params)
+
+
+def _refresh_entry(key, cache_type, refresh):
+    """
+    在后台线程中重新获取过期的缓存数据并写入
+
+    Args:
+        key: 缓存键
+        cache_type: 缓存类型
+        refresh: 返回新数据的函数；返回空值或 code 不为 200 的响应时保留旧数据
+    """
+    try:
+        data = refresh()
+        if data and not (isinstance(data, dict) and data.get('code', 200) != 200):
+            get_cache_db().set(key, data, cache_type=cache_type)
+            xbmc.log('[%s] Cache refreshed: %s (type: %s)' % (__addon_id__, key, cache_type), xbmc.LOGDEBUG)
+    except Exception as e:
+        xbmc.log('[%s] Error refreshing cache: %s - %s' % (__addon_id__, key, str(e)), xbmc.LOGWARNING)
+    finally:
+        close_connection()
+
 
 def get_cache_db():
     """
@@ -53,8 +416,7 @@ class CacheDB:
     def _connect(self):
         """连接数据库"""
         try:
-            # check_same_thread=False 允许跨线程使用连接（但每个线程应该有自己的连接）
-            self.conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+            self.conn = get_connection()
             self.cursor = self.conn.cursor()
             self._create_tables()
         except Exception as e:
@@ -62,7 +424,11 @@ class CacheDB:
 
     def _create_tables(self):
         """创建缓存表"""
-        # 缓存表: id, key, data, timestamp, expire_seconds, type
+        # 缓存表: id, key, data, timestamp, expire_seconds, type, codec, raw_size,
+        # stored_size, last_access, hit_count, refresh_at
+        # data 为按 codec 压缩的 JSON（BLOB），raw_size / stored_size 为压缩前 / 后的字节数，
+        # last_access、hit_count 为最近命中时间与命中次数（超出容量时据此清理），
+        # refresh_at 为过期条目开始后台刷新的时间（见 CACHE_STALE_POLICY）
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS cache (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -70,10 +436,24 @@ class CacheDB:
                 data TEXT NOT NULL,
                 timestamp INTEGER NOT NULL,
                 expire_seconds INTEGER NOT NULL,
-                type TEXT NOT NULL
+                type TEXT NOT NULL,
+                codec TEXT NOT NULL DEFAULT 'json',
+                raw_size INTEGER NOT NULL DEFAULT 0,
+                stored_size INTEGER NOT NULL DEFAULT 0,
+                last_access INTEGER NOT NULL DEFAULT 0,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                refresh_at INTEGER NOT NULL DEFAULT 0
             )
         ''')
 
+        self._migrate_cache_table()
+
+        # 按类型统计占用字节数时只需读取索引
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cache_type_size
+            ON cache(type, stored_size)
+        ''')
+
         # 专辑封面缓存表
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS album_covers (
@@ -107,7 +487,168 @@ class CacheDB:
             ON play_history(play_time DESC)
         ''')
 
+        # 播放地址缓存表: 歌曲ID + 音质 + 音源 -> 最终播放地址
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS resolved_urls (
+                song_id TEXT NOT NULL,
+                level TEXT NOT NULL,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                used_source TEXT,
+                quality TEXT,
+                timestamp INTEGER NOT NULL,
+                expire_at INTEGER NOT NULL,
+                PRIMARY KEY (song_id, level, source)
+            )
+        ''')
+
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_resolved_urls_url
+            ON resolved_urls(url)
+        ''')
+
+        # 播放地址校验结果表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_verdicts (
+                url TEXT PRIMARY KEY,
+                ok INTEGER NOT NULL,
+                checked_at INTEGER NOT NULL
+            )
+        ''')
+
+        # CDN 主机校验记录表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS host_verdicts (
+                host TEXT PRIMARY KEY,
+                consecutive_ok INTEGER NOT NULL,
+                last_ok INTEGER NOT NULL,
+                last_fail INTEGER NOT NULL
+            )
+        ''')
+
+        # HTTP 响应缓存表（条件请求）
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS http_responses (
+                url TEXT PRIMARY KEY,
+                final_url TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fresh_until INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL
+            )
+        ''')
+
+        # 接口延迟直方图表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS latency_histograms (
+                endpoint TEXT PRIMARY KEY,
+                buckets TEXT NOT NULL,
+                updated INTEGER NOT NULL
+            )
+        ''')
+
+        # 性能记录表（保留最近 PERF_MAX_RECORDS 条）
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS perf_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                route TEXT NOT NULL,
+                phase TEXT NOT NULL,
+                elapsed_ms REAL NOT NULL,
+                timestamp INTEGER NOT NULL
+            )
+        ''')
+
+        # 后端健康状态表（熔断器）
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS backend_health (
+                backend TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                window TEXT NOT NULL,
+                consecutive_failures INTEGER NOT NULL,
+                cooldown INTEGER NOT NULL,
+                open_until INTEGER NOT NULL,
+                probe_at INTEGER NOT NULL,
+                updated INTEGER NOT NULL
+            )
+        ''')
+
+        # 歌词缓存表（TuneHub 歌词，按最近访问清理）
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lrc_cache (
+                source TEXT,
+                track_id TEXT,
+                text TEXT,
+                time INTEGER,
+                last_access INTEGER,
+                PRIMARY KEY (source, track_id)
+            )
+        ''')
+
+        # 封面文件缓存表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cover_cache (
+                url TEXT PRIMARY KEY,
+                local_path TEXT,
+                time INTEGER
+            )
+        ''')
+
+        self.conn.commit()
+
+    def _migrate_cache_table(self):
+        """
+        为旧版本的 cache 表补充 CACHE_ADDED_COLUMNS 中的列：
+        新增 codec 时压缩已有数据，新增 stored_size 时统计已有数据的字节数，并以写入时间作为最近访问时间
+        data 列声明为 TEXT，SQLite 按原样保存写入的 BLOB，无需重建表
+        """
+        self.cursor.execute('PRAGMA table_info(cache)')
+        columns = [row[1] for row in self.cursor.fetchall()]
+        added = []
+        try:
+            for name, definition in CACHE_ADDED_COLUMNS:
+                if name not in columns:
+                    self.cursor.execute('ALTER TABLE cache ADD COLUMN %s %s' % (name, definition))
+                    added.append(name)
+        except sqlite3.OperationalError:
+            # 其他线程或进程已经完成迁移
+            return
+        if not added:
+            return
+
+        if 'codec' in added:
+            self._compress_legacy_rows()
+        if 'stored_size' in added:
+            self.cursor.execute('''
+                UPDATE cache SET stored_size = LENGTH(CAST(data AS BLOB)), last_access = timestamp
+            ''')
         self.conn.commit()
+        xbmc.log('[%s] Added cache columns: %s' % (__addon_id__, ', '.join(added)), xbmc.LOGINFO)
+
+    def _compress_legacy_rows(self):
+        """压缩旧版本写入的 JSON 文本（由 _migrate_cache_table 调用，不提交）"""
+        migrated = 0
+        last_id = 0
+        while True:
+            self.cursor.execute('''
+                SELECT id, data FROM cache WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, CACHE_MIGRATE_BATCH))
+            rows = self.cursor.fetchall()
+            if not rows:
+                break
+            updates = []
+            for row_id, data in rows:
+                last_id = row_id
+                try:
+                    codec, stored, raw_size = encode_payload(json.loads(data))
+                except (TypeError, ValueError):
+                    # 无法解析的旧数据保持原样，读取时按 json 处理（解析失败视为未命中）
+                    continue
+                updates.append((codec, stored, raw_size, row_id))
+            self.cursor.executemany('UPDATE cache SET codec = ?, data = ?, raw_size = ? WHERE id = ?', updates)
+            migrated += len(updates)
+        xbmc.log('[%s] Migrated %d cache entries to %s' % (__addon_id__, migrated, CACHE_CODEC), xbmc.LOGINFO)
 
     def get_cache_expire_seconds(self):
         """
@@ -117,7 +658,7 @@ class CacheDB:
             int: 缓存过期时间（秒）
         """
         # 获取设置中的缓存过期时间选项
-        cache_expire_option = __addon__.getSetting('cache_expire_time')
+        cache_expire_option = get_settings().get('cache_expire_time')
 
         # 根据选项返回对应的秒数
         # 选项值: "0"=1小时, "1"=6小时, "2"=12小时, "3"=24小时, "4"=3天, "5"=7天
@@ -133,6 +674,16 @@ class CacheDB:
         # 默认返回 24 小时
         return expire_time_map.get(cache_expire_option, 24 * 60 * 60)
 
+    def get_cache_max_size(self):
+        """
+        从设置中获取 cache 表的容量上限（字节）
+
+        Returns:
+            int: 容量上限（字节）
+        """
+        # 选项值: "0"=50MB, "1"=100MB, "2"=200MB, "3"=500MB, "4"=1GB
+        return CACHE_MAX_SIZE_MAP.get(get_settings().get('cache_max_size'), CACHE_DEFAULT_MAX_SIZE)
+
     def is_cache_enabled(self):
         """
         检查缓存是否启用
@@ -140,7 +691,7 @@ class CacheDB:
         Returns:
             bool: 是否启用缓存
         """
-        return __addon__.getSetting('cache_enabled') == 'true'
+        return get_settings().get_bool('cache_enabled')
 
     def get_auto_clear_cache(self):
         """
@@ -149,7 +700,7 @@ class CacheDB:
         Returns:
             bool: 是否自动清理过期缓存
         """
-        return __addon__.getSetting('auto_clear_cache') == 'true'
+        return get_settings().get_bool('auto_clear_cache')
 
     def generate_cache_key(self, prefix, *args):
         """
@@ -165,23 +716,27 @@ class CacheDB:
         cache_string = '%s_%s' % (prefix, '_'.join(str(arg) for arg in args))
         return hashlib.md5(cache_string.encode()).hexdigest()
 
-    def get(self, key):
+    @timed('cache_get')
+    def get(self, key, refresh=None):
         """
         从缓存读取数据
 
         Args:
             key: 缓存键
+            refresh: 重新获取数据的函数；提供时 CACHE_STALE_POLICY 中的类型过期后仍返回旧数据，
+                     并在后台线程中调用该函数刷新缓存
 
         Returns:
-            dict: 缓存数据, 或 None 如果缓存不存在或已过期
+            dict: 缓存数据, 或 None 如果缓存不存在或已过期；
+                  数据可能来自内存缓存并与其他调用方共享，不能原地修改
         """
         if not self.is_cache_enabled():
             return None
 
         try:
-            # 查询缓存
+            # 查询缓存（只读取行 id 与有效期，内存缓存命中时不读取 data 列）
             self.cursor.execute('''
-                SELECT data, timestamp, expire_seconds
+                SELECT id, timestamp, expire_seconds, type, refresh_at
                 FROM cache
                 WHERE key = ?
             ''', (key,))
@@ -189,27 +744,67 @@ class CacheDB:
 
             if result is None:
                 xbmc.log('[%s] Cache miss: %s' % (__addon_id__, key), xbmc.LOGDEBUG)
+                _memory_cache.discard(key)
                 return None
 
-            data, timestamp, expire_seconds = result
+            row_id, timestamp, expire_seconds, cache_type, refresh_at = result
             current_time = int(time.time())
 
             # 检查是否过期
-            if (current_time - timestamp) > expire_seconds:
-                xbmc.log('[%s] Cache expired: %s (age: %d seconds)' %
-                         (__addon_id__, key, current_time - timestamp), xbmc.LOGDEBUG)
-                # 删除过期缓存
-                self.delete(key)
-                return None
-
-            xbmc.log('[%s] Cache hit: %s (age: %d seconds)' %
-                     (__addon_id__, key, current_time - timestamp), xbmc.LOGDEBUG)
-            return json.loads(data)
+            stale = (current_time - timestamp) > expire_seconds
+            if stale:
+                max_stale = CACHE_STALE_POLICY.get(cache_type)
+                if refresh is None or max_stale is None or (current_time - timestamp) > expire_seconds + max_stale:
+                    xbmc.log('[%s] Cache expired: %s (age: %d seconds)' %
+                             (__addon_id__, key, current_time - timestamp), xbmc.LOGDEBUG)
+                    # 删除过期缓存
+                    self.delete(key)
+                    return None
+                self._schedule_refresh(key, row_id, cache_type, refresh_at, current_time, refresh)
+
+            xbmc.log('[%s] Cache %s: %s (age: %d seconds)' %
+                     (__addon_id__, 'stale' if stale else 'hit', key, current_time - timestamp), xbmc.LOGDEBUG)
+            data = _memory_cache.get(key, row_id)
+            if data is None:
+                self.cursor.execute('SELECT data, codec, raw_size FROM cache WHERE id = ?', (row_id,))
+                row = self.cursor.fetchone()
+                if row is None:
+                    # 两次查询之间被其他进程改写或删除
+                    return None
+                stored, codec, raw_size = row
+                data = decode_payload(codec, stored)
+                _memory_cache.put(key, row_id, data, raw_size)
+            if _record_access(key, current_time):
+                self.flush_access()
+            return data
 
         except Exception as e:
             xbmc.log('[%s] Error reading cache: %s - %s' % (__addon_id__, key, str(e)), xbmc.LOGERROR)
             return None
 
+    def _schedule_refresh(self, key, row_id, cache_type, refresh_at, current_time, refresh):
+        """
+        把过期的条目标记为刷新中（refresh_at）并启动后台刷新线程；
+        其他线程或进程已在 CACHE_REFRESH_TIMEOUT 秒内标记过时不重复刷新
+
+        Returns:
+            bool: 是否启动了刷新
+        """
+        if current_time - refresh_at < CACHE_REFRESH_TIMEOUT:
+            return False
+        # 只在 refresh_at 未被改动时标记，多个进程同时读到过期条目时只有一个刷新
+        self.cursor.execute('UPDATE cache SET refresh_at = ? WHERE id = ? AND refresh_at = ?',
+                            (current_time, row_id, refresh_at))
+        marked = self.cursor.rowcount == 1
+        self.conn.commit()
+        if not marked:
+            return False
+        # 非守护线程：插件进程在列表显示后、退出前完成刷新
+        thread = threading.Thread(target=_refresh_entry, args=(key, cache_type, refresh), name='cache-refresh')
+        thread.start()
+        return True
+
+    @timed('cache_set')
     def set(self, key, data, cache_type='default', expire_seconds=None):
         """
         写入缓存数据
@@ -226,22 +821,27 @@ class CacheDB:
         if not self.is_cache_enabled():
             return False
 
+        _memory_cache.discard(key)
         try:
             if expire_seconds is None:
                 expire_seconds = self.get_cache_expire_seconds()
 
             timestamp = int(time.time())
-            json_data = json.dumps(data, ensure_ascii=False)
+            codec, stored, raw_size = encode_payload(data)
+            stored_size = raw_size if codec == 'json' else len(stored)
 
-            # 插入或更新缓存
+            # 插入或更新缓存（更新时保留命中次数）
             self.cursor.execute('''
-                INSERT OR REPLACE INTO cache (key, data, timestamp, expire_seconds, type)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (key, json_data, timestamp, expire_seconds, cache_type))
+                INSERT OR REPLACE INTO cache (key, data, timestamp, expire_seconds, type, codec, raw_size,
+                                              stored_size, last_access, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE((SELECT hit_count FROM cache WHERE key = ?), 0))
+            ''', (key, stored, timestamp, expire_seconds, cache_type, codec, raw_size,
+                  stored_size, timestamp, key))
             self.conn.commit()
 
-            xbmc.log('[%s] Cache written: %s (type: %s, expire: %d seconds)' %
-                     (__addon_id__, key, cache_type, expire_seconds), xbmc.LOGDEBUG)
+            xbmc.log('[%s] Cache written: %s (type: %s, expire: %d seconds, %s %d -> %d bytes)' %
+                     (__addon_id__, key, cache_type, expire_seconds, codec, raw_size, stored_size), xbmc.LOGDEBUG)
+            self.enforce_budget()
             return True
 
         except Exception as e:
@@ -258,6 +858,7 @@ class CacheDB:
         Returns:
             bool: True 表示成功, False 表示失败
         """
+        _memory_cache.discard(key)
         try:
             self.cursor.execute('DELETE FROM cache WHERE key = ?', (key,))
             self.conn.commit()
@@ -277,6 +878,7 @@ class CacheDB:
         Returns:
             int: 删除的缓存数量
         """
+        _memory_cache.clear()
         try:
             self.cursor.execute('DELETE FROM cache WHERE type = ?', (cache_type,))
             deleted_count = self.cursor.rowcount
@@ -298,11 +900,9 @@ class CacheDB:
             return 0
 
         try:
-            current_time = int(time.time())
-            self.cursor.execute('''
-                DELETE FROM cache
-                WHERE (timestamp + expire_seconds) < ?
-            ''', (current_time,))
+            # 仍可作为旧数据返回的条目（CACHE_STALE_POLICY）保留到期限之后
+            condition, params = _stale_expired_condition(int(time.time()))
+            self.cursor.execute('DELETE FROM cache WHERE %s' % condition, params)
             deleted_count = self.cursor.rowcount
             self.conn.commit()
             xbmc.log('[%s] Cleared %d expired caches' % (__addon_id__, deleted_count), xbmc.LOGINFO)
@@ -310,11 +910,123 @@ class CacheDB:
             # 清理过期的专辑封面缓存
             album_cover_deleted = self.clear_expired_album_covers()
 
-            return deleted_count + album_cover_deleted
+            # 清理过期的播放地址与校验结果
+            resolved_url_deleted = self.clear_expired_resolved_urls()
+            self.clear_expired_url_verdicts()
+
+            # 清理长期未验证的 HTTP 响应
+            http_response_deleted = self.clear_expired_http_responses()
+
+            return deleted_count + album_cover_deleted + resolved_url_deleted + http_response_deleted
         except Exception as e:
             xbmc.log('[%s] Error clearing expired caches: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
             return 0
 
+    def flush_access(self):
+        """
+        把暂存的缓存命中记录写入 last_access / hit_count
+
+        Returns:
+            int: 写入的条目数
+        """
+        updates = _take_access()
+        if not updates:
+            return 0
+        try:
+            self.cursor.executemany('''
+                UPDATE cache SET last_access = MAX(last_access, ?), hit_count = hit_count + ?
+                WHERE key = ?
+            ''', updates)
+            self.conn.commit()
+            return len(updates)
+        except Exception as e:
+            xbmc.log('[%s] Error saving cache access: %s' % (__addon_id__, str(e)), xbmc.LOGWARNING)
+            return 0
+
+    def _eviction_candidates(self, current_time, cache_type=None):
+        """
+        按清理顺序列出缓存条目：已过期的在前，其余按 最近访问时间 + 命中次数 × CACHE_HIT_WEIGHT 从小到大
+
+        Args:
+            current_time: 当前时间
+            cache_type: 只列出该类型，None 表示全部
+
+        Returns:
+            sqlite3.Cursor: 逐行返回 (id, stored_size, type)
+        """
+        where = 'WHERE type = ?' if cache_type is not None else ''
+        params = (current_time, CACHE_HIT_CAP, CACHE_HIT_WEIGHT)
+        if cache_type is not None:
+            params = (cache_type,) + params
+        # 使用单独的游标，遍历时不影响 self.cursor
+        return self.conn.execute('''
+            SELECT id, stored_size, type FROM cache %s
+            ORDER BY (timestamp + expire_seconds) >= ?, last_access + MIN(hit_count, ?) * ?
+        ''' % where, params)
+
+    def enforce_budget(self, force=False):
+        """
+        cache 表超出容量上限（总容量或类型配额）时，在一个事务中删除价值最低的条目，
+        清理到上限的 CACHE_EVICT_TARGET；同一进程中每 CACHE_EVICT_INTERVAL 秒最多检查一次
+
+        Args:
+            force: 忽略检查间隔
+
+        Returns:
+            int: 删除的缓存数量
+        """
+        global _last_budget_check
+        now = time.time()
+        if not force and now - _last_budget_check < CACHE_EVICT_INTERVAL:
+            return 0
+        _last_budget_check = now
+
+        self.flush_access()
+        budget = self.get_cache_max_size()
+        current_time = int(now)
+        try:
+            # 写锁在统计之前取得，其他进程的写入不会让统计结果过时
+            self.cursor.execute('BEGIN IMMEDIATE')
+            self.cursor.execute('SELECT type, SUM(stored_size) FROM cache GROUP BY type')
+            type_sizes = dict((cache_type, size or 0) for cache_type, size in self.cursor.fetchall())
+
+            victims = set()
+            for cache_type, size in type_sizes.items():
+                quota = CACHE_TYPE_QUOTAS.get(cache_type)
+                if quota is None or size <= budget * quota:
+                    continue
+                excess = size - budget * quota * CACHE_EVICT_TARGET
+                for row_id, stored_size, _ in self._eviction_candidates(current_time, cache_type):
+                    if excess <= 0:
+                        break
+                    victims.add(row_id)
+                    excess -= stored_size
+                    type_sizes[cache_type] -= stored_size
+
+            total = sum(type_sizes.values())
+            if total > budget:
+                excess = total - budget * CACHE_EVICT_TARGET
+                for row_id, stored_size, _ in self._eviction_candidates(current_time):
+                    if excess <= 0:
+                        break
+                    if row_id not in victims:
+                        victims.add(row_id)
+                        excess -= stored_size
+                        total -= stored_size
+
+            if victims:
+                self.cursor.executemany('DELETE FROM cache WHERE id = ?', [(row_id,) for row_id in victims])
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            xbmc.log('[%s] Error evicting caches: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return 0
+
+        if victims:
+            xbmc.log('[%s] Evicted %d caches, %d of %d bytes used' % (__addon_id__, len(victims), total, budget),
+                     xbmc.LOGINFO)
+        return len(victims)
+
     def clear_all(self):
         """
         清理所有缓存
@@ -322,8 +1034,12 @@ class CacheDB:
         Returns:
             int: 删除的缓存数量
         """
+        _memory_cache.clear()
         try:
             self.cursor.execute('DELETE FROM cache')
+            self.cursor.execute('DELETE FROM resolved_urls')  # 清理播放地址缓存
+            self.cursor.execute('DELETE FROM url_verdicts')  # 清理播放地址校验结果
+            self.cursor.execute('DELETE FROM http_responses')  # 清理 HTTP 响应缓存
             self.cursor.execute('DELETE FROM album_covers')  # 清理专辑封面缓存
             deleted_count = self.cursor.rowcount
             self.conn.commit()
@@ -465,13 +1181,17 @@ class CacheDB:
             self.cursor.execute('SELECT COUNT(*) FROM cache')
             total_count = self.cursor.fetchone()[0]
 
-            # 按类型统计
+            # 按类型统计条数与 JSON / 实际存储的字节数
             self.cursor.execute('''
-                SELECT type, COUNT(*)
+                SELECT type, COUNT(*), SUM(raw_size), SUM(stored_size)
                 FROM cache
                 GROUP BY type
             ''')
-            type_stats = dict(self.cursor.fetchall())
+            type_stats = {}
+            type_bytes = {}
+            for cache_type, count, raw_size, stored_size in self.cursor.fetchall():
+                type_stats[cache_type] = count
+                type_bytes[cache_type] = {'raw': raw_size or 0, 'stored': stored_size or 0}
 
             # 过期缓存数量
             current_time = int(time.time())
@@ -482,13 +1202,26 @@ class CacheDB:
             ''', (current_time,))
             expired_count = self.cursor.fetchone()[0]
 
+            # 播放地址缓存数量
+            self.cursor.execute('SELECT COUNT(*) FROM resolved_urls')
+            resolved_url_count = self.cursor.fetchone()[0]
+
+            # HTTP 响应缓存数量
+            self.cursor.execute('SELECT COUNT(*) FROM http_responses')
+            http_response_count = self.cursor.fetchone()[0]
+
             # 数据库大小
             db_size = os.path.getsize(CACHE_DB_PATH) if os.path.exists(CACHE_DB_PATH) else 0
 
             return {
                 'total_count': total_count,
                 'type_stats': type_stats,
+                'type_bytes': type_bytes,
+                'raw_bytes': sum(item['raw'] for item in type_bytes.values()),
+                'stored_bytes': sum(item['stored'] for item in type_bytes.values()),
                 'expired_count': expired_count,
+                'resolved_url_count': resolved_url_count,
+                'http_response_count': http_response_count,
                 'db_size': db_size
             }
 
@@ -497,10 +1230,574 @@ class CacheDB:
             return {
                 'total_count': 0,
                 'type_stats': {},
+                'type_bytes': {},
+                'raw_bytes': 0,
+                'stored_bytes': 0,
                 'expired_count': 0,
+                'resolved_url_count': 0,
+                'http_response_count': 0,
                 'db_size': 0
             }
 
+    # ==================== 播放地址缓存方法 ====================
+
+    def get_resolved_url(self, song_id, level, source):
+        """
+        获取已解析的播放地址
+
+        Args:
+            song_id: 歌曲ID
+            level: 请求的音质级别
+            source: 请求的音源
+
+        Returns:
+            dict: {'url', 'used_source', 'quality', 'expire_at'}，不存在或已过期返回 None
+        """
+        if not self.is_cache_enabled():
+            return None
+
+        try:
+            self.cursor.execute('''
+                SELECT url, used_source, quality, expire_at
+                FROM resolved_urls
+                WHERE song_id = ? AND level = ? AND source = ?
+            ''', (str(song_id), str(level), str(source)))
+            result = self.cursor.fetchone()
+            if result is None:
+                return None
+
+            url, used_source, quality, expire_at = result
+            if expire_at <= int(time.time()):
+                xbmc.log('[%s] Resolved url expired: %s/%s/%s' % (__addon_id__, song_id, level, source), xbmc.LOGDEBUG)
+                self.cursor.execute('''
+                    DELETE FROM resolved_urls
+                    WHERE song_id = ? AND level = ? AND source = ?
+                ''', (str(song_id), str(level), str(source)))
+                self.conn.commit()
+                return None
+
+            xbmc.log('[%s] Resolved url hit: %s/%s/%s (%s)' % (__addon_id__, song_id, level, source, used_source), xbmc.LOGDEBUG)
+            return {
+                'url': url,
+                'used_source': used_source,
+                'quality': quality,
+                'expire_at': expire_at
+            }
+        except Exception as e:
+            xbmc.log('[%s] Error reading resolved url: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return None
+
+    def set_resolved_url(self, song_id, level, source, url, used_source, quality, expire_at):
+        """
+        保存已解析的播放地址
+
+        Args:
+            song_id: 歌曲ID
+            level: 请求的音质级别
+            source: 请求的音源
+            url: 最终播放地址
+            used_source: 实际使用的后端
+            quality: 实际获得的音质
+            expire_at: 过期时间戳（秒）
+
+        Returns:
+            bool: 是否成功
+        """
+        if not url or not self.is_cache_enabled():
+            return False
+
+        try:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO resolved_urls
+                (song_id, level, source, url, used_source, quality, timestamp, expire_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (str(song_id), str(level), str(source), url, used_source, quality, int(time.time()), int(expire_at)))
+            self.conn.commit()
+            return True
+        except Exception as e:
+            xbmc.log('[%s] Error writing resolved url: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return False
+
+    def invalidate_resolved_url(self, url):
+        """
+        删除指向指定地址的所有播放地址缓存（播放或校验失败时调用）
+
+        Args:
+            url: 失效的播放地址
+
+        Returns:
+            int: 删除的数量
+        """
+        try:
+            self.cursor.execute('DELETE FROM resolved_urls WHERE url = ?', (url,))
+            deleted_count = self.cursor.rowcount
+            self.conn.commit()
+            if deleted_count:
+                xbmc.log('[%s] Invalidated %d resolved urls' % (__addon_id__, deleted_count), xbmc.LOGINFO)
+            return deleted_count
+        except Exception as e:
+            xbmc.log('[%s] Error invalidating resolved url: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return 0
+
+    def clear_expired_resolved_urls(self):
+        """
+        清理过期的播放地址缓存
+
+        Returns:
+            int: 删除的数量
+        """
+        try:
+            self.cursor.execute('DELETE FROM resolved_urls WHERE expire_at <= ?', (int(time.time()),))
+            deleted_count = self.cursor.rowcount
+            self.conn.commit()
+            return deleted_count
+        except Exception as e:
+            xbmc.log('[%s] Error clearing expired resolved urls: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return 0
+
+    # ==================== 播放地址校验方法 ====================
+
+    def get_url_verdict(self, url, ok_ttl, fail_ttl):
+        """
+        获取播放地址的校验结果
+
+        Args:
+            url: 播放地址
+            ok_ttl: 校验通过结果的有效期（秒）
+            fail_ttl: 校验失败结果的有效期（秒）
+
+        Returns:
+            bool: 校验结果，不存在或已过期返回 None
+        """
+        try:
+            self.cursor.execute('SELECT ok, checked_at FROM url_verdicts WHERE url = ?', (url,))
+            result = self.cursor.fetchone()
+            if result is None:
+                return None
+            ok, checked_at = result
+            if int(time.time()) - checked_at > (ok_ttl if ok else fail_ttl):
+                return None
+            return bool(ok)
+        except Exception as e:
+            xbmc.log('[%s] Error reading url verdict: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return None
+
+    def set_url_verdict(self, url, host, ok):
+        """
+        保存播放地址校验结果，并更新所属主机的连续成功记录
+
+        Args:
+            url: 播放地址
+            host: 地址所属主机
+            ok: 是否可用
+
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            now = int(time.time())
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO url_verdicts (url, ok, checked_at)
+                VALUES (?, ?, ?)
+            ''', (url, 1 if ok else 0, now))
+            self.cursor.execute('''
+                INSERT OR IGNORE INTO host_verdicts (host, consecutive_ok, last_ok, last_fail)
+                VALUES (?, 0, 0, 0)
+            ''', (host,))
+            if ok:
+                self.cursor.execute('''
+                    UPDATE host_verdicts SET consecutive_ok = consecutive_ok + 1, last_ok = ?
+                    WHERE host = ?
+                ''', (now, host))
+            else:
+                self.cursor.execute('''
+                    UPDATE host_verdicts SET consecutive_ok = 0, last_fail = ?
+                    WHERE host = ?
+                ''', (now, host))
+            self.conn.commit()
+            return True
+        except Exception as e:
+            xbmc.log('[%s] Error writing url verdict: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return False
+
+    def get_host_verdict(self, host):
+        """
+        获取 CDN 主机的校验记录
+
+        Args:
+            host: 主机名
+
+        Returns:
+            dict: {'consecutive_ok', 'last_ok', 'last_fail'}，不存在返回 None
+        """
+        try:
+            self.cursor.execute('''
+                SELECT consecutive_ok, last_ok, last_fail
+                FROM host_verdicts
+                WHERE host = ?
+            ''', (host,))
+            result = self.cursor.fetchone()
+            if result is None:
+                return None
+            consecutive_ok, last_ok, last_fail = result
+            return {'consecutive_ok': consecutive_ok, 'last_ok': last_ok, 'last_fail': last_fail}
+        except Exception as e:
+            xbmc.log('[%s] Error reading host verdict: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return None
+
+    def clear_expired_url_verdicts(self, max_age=URL_VERDICT_MAX_AGE):
+        """
+        清理过期的播放地址校验结果
+
+        Args:
+            max_age: 最长保留时间（秒）
+
+        Returns:
+            int: 删除的数量
+        """
+        try:
+            self.cursor.execute('DELETE FROM url_verdicts WHERE checked_at < ?', (int(time.time()) - max_age,))
+            deleted_count = self.cursor.rowcount
+            self.conn.commit()
+            return deleted_count
+        except Exception as e:
+            xbmc.log('[%s] Error clearing url verdicts: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return 0
+
+    # ==================== HTTP 响应缓存方法 ====================
+
+    def get_http_response(self, url):
+        """
+        获取缓存的 HTTP 响应
+
+        Args:
+            url: 完整请求地址（含查询参数）
+
+        Returns:
+            dict: {'url', 'final_url', 'headers', 'body', 'etag', 'last_modified', 'fresh_until'}，不存在返回 None
+        """
+        if not self.is_cache_enabled():
+            return None
+
+        try:
+            self.cursor.execute('''
+                SELECT final_url, headers, body, etag, last_modified, fresh_until
+                FROM http_responses
+                WHERE url = ?
+            ''', (url,))
+            result = self.cursor.fetchone()
+            if result is None:
+                return None
+            final_url, headers, body, etag, last_modified, fresh_until = result
+            return {
+                'url': url,
+                'final_url': final_url,
+                'headers': json.loads(headers),
+                'body': bytes(body),
+                'etag': etag,
+                'last_modified': last_modified,
+                'fresh_until': fresh_until
+            }
+        except Exception as e:
+            xbmc.log('[%s] Error reading http response: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return None
+
+    def set_http_response(self, url, final_url, headers, body, etag, last_modified, fresh_until):
+        """
+        保存 HTTP 响应
+
+        Args:
+            url: 完整请求地址（含查询参数）
+            final_url: 跟随重定向后的地址
+            headers: 需要保留的响应头 dict
+            body: 响应体（bytes）
+            etag: ETag 响应头
+            last_modified: Last-Modified 响应头
+            fresh_until: 新鲜期截止时间戳（秒），之前无需重新验证
+
+        Returns:
+            bool: 是否成功
+        """
+        if not self.is_cache_enabled():
+            return False
+
+        try:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO http_responses
+                (url, final_url, headers, body, etag, last_modified, fresh_until, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, final_url, json.dumps(headers), sqlite3.Binary(body), etag, last_modified,
+                  int(fresh_until), int(time.time())))
+            self.conn.commit()
+            return True
+        except Exception as e:
+            xbmc.log('[%s] Error writing http response: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return False
+
+    def refresh_http_response(self, url, headers, fresh_until):
+        """
+        服务器返回 304 后更新响应头与新鲜期
+
+        Args:
+            url: 完整请求地址（含查询参数）
+            headers: 合并后的响应头 dict
+            fresh_until: 新的新鲜期截止时间戳（秒）
+
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            self.cursor.execute('''
+                UPDATE http_responses
+                SET headers = ?, etag = ?, last_modified = ?, fresh_until = ?, timestamp = ?
+                WHERE url = ?
+            ''', (json.dumps(headers), headers.get('ETag'), headers.get('Last-Modified'),
+                  int(fresh_until), int(time.time()), url))
+            self.conn.commit()
+            return True
+        except Exception as e:
+            xbmc.log('[%s] Error refreshing http response: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return False
+
+    def clear_expired_http_responses(self, max_age=HTTP_RESPONSE_MAX_AGE):
+        """
+        清理长期未验证的 HTTP 响应缓存
+
+        Args:
+            max_age: 最后一次验证后的最长保留时间（秒）
+
+        Returns:
+            int: 删除的数量
+        """
+        try:
+            self.cursor.execute('''
+                DELETE FROM http_responses
+                WHERE fresh_until <= ? AND timestamp < ?
+            ''', (int(time.time()), int(time.time()) - max_age))
+            deleted_count = self.cursor.rowcount
+            self.conn.commit()
+            return deleted_count
+        except Exception as e:
+            xbmc.log('[%s] Error clearing expired http responses: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return 0
+
+    # ==================== 接口延迟直方图方法 ====================
+
+    def get_latency_histogram(self, endpoint):
+        """
+        获取接口的延迟直方图
+
+        Args:
+            endpoint: 接口名称
+
+        Returns:
+            list: 各延迟区间的计数，不存在返回 None
+        """
+        try:
+            self.cursor.execute('SELECT buckets FROM latency_histograms WHERE endpoint = ?', (endpoint,))
+            result = self.cursor.fetchone()
+            return json.loads(result[0]) if result else None
+        except Exception as e:
+            xbmc.log('[%s] Error reading latency histogram: %s - %s' % (__addon_id__, endpoint, str(e)), xbmc.LOGERROR)
+            return None
+
+    def merge_latency_histogram(self, endpoint, delta, max_samples):
+        """
+        将本进程新增的延迟计数合并到数据库中
+
+        总数超过 max_samples 时所有计数减半，使直方图跟随最近的表现
+
+        Args:
+            endpoint: 接口名称
+            delta: 各延迟区间新增的计数
+            max_samples: 最大样本数
+
+        Returns:
+            list: 合并后的直方图，失败返回 None
+        """
+        try:
+            self.cursor.execute('SELECT buckets FROM latency_histograms WHERE endpoint = ?', (endpoint,))
+            result = self.cursor.fetchone()
+            buckets = json.loads(result[0]) if result else [0] * len(delta)
+            if len(buckets) != len(delta):
+                buckets = [0] * len(delta)
+            buckets = [a + b for a, b in zip(buckets, delta)]
+            while sum(buckets) > max_samples:
+                buckets = [c // 2 for c in buckets]
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO latency_histograms (endpoint, buckets, updated)
+                VALUES (?, ?, ?)
+            ''', (endpoint, json.dumps(buckets), int(time.time())))
+            self.conn.commit()
+            return buckets
+        except Exception as e:
+            xbmc.log('[%s] Error writing latency histogram: %s - %s' % (__addon_id__, endpoint, str(e)), xbmc.LOGERROR)
+            return None
+
+    def get_all_latency_histograms(self):
+        """
+        获取所有接口的延迟直方图
+
+        Returns:
+            dict: {endpoint: buckets}
+        """
+        try:
+            self.cursor.execute('SELECT endpoint, buckets FROM latency_histograms ORDER BY endpoint')
+            return {endpoint: json.loads(buckets) for endpoint, buckets in self.cursor.fetchall()}
+        except Exception as e:
+            xbmc.log('[%s] Error reading latency histograms: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return {}
+
+    # ==================== 后端健康状态方法 ====================
+
+    def get_backend_health(self, backend):
+        """
+        获取后端健康记录
+
+        Args:
+            backend: 后端名称
+
+        Returns:
+            dict: 健康记录，不存在返回 None
+        """
+        try:
+            self.cursor.execute('''
+                SELECT state, window, consecutive_failures, cooldown, open_until, probe_at, updated
+                FROM backend_health
+                WHERE backend = ?
+            ''', (backend,))
+            result = self.cursor.fetchone()
+            if result is None:
+                return None
+            state, window, consecutive_failures, cooldown, open_until, probe_at, updated = result
+            return {
+                'backend': backend,
+                'state': state,
+                'window': json.loads(window),
+                'consecutive_failures': consecutive_failures,
+                'cooldown': cooldown,
+                'open_until': open_until,
+                'probe_at': probe_at,
+                'updated': updated
+            }
+        except Exception as e:
+            xbmc.log('[%s] Error reading backend health: %s - %s' % (__addon_id__, backend, str(e)), xbmc.LOGERROR)
+            return None
+
+    def save_backend_health(self, health):
+        """
+        保存后端健康记录
+
+        Args:
+            health: get_backend_health 返回格式的 dict
+
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO backend_health
+                (backend, state, window, consecutive_failures, cooldown, open_until, probe_at, updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (health['backend'], health['state'], json.dumps(health['window']),
+                  health['consecutive_failures'], health['cooldown'], health['open_until'],
+                  health['probe_at'], int(time.time())))
+            self.conn.commit()
+            return True
+        except Exception as e:
+            xbmc.log('[%s] Error writing backend health: %s - %s' % (__addon_id__, health.get('backend'), str(e)), xbmc.LOGERROR)
+            return False
+
+    def begin_backend_probe(self, backend, now, probe_timeout):
+        """
+        原子地将熔断后端切换为半开状态并占用探测名额
+
+        冷却期已过的 open 状态，或探测超时的 half_open 状态才能获得名额，
+        保证多个插件进程同时只有一个请求去探测故障后端。
+
+        Args:
+            backend: 后端名称
+            now: 当前时间戳
+            probe_timeout: 探测超时时间（秒）
+
+        Returns:
+            bool: 是否获得探测名额
+        """
+        try:
+            self.cursor.execute('''
+                UPDATE backend_health
+                SET state = 'half_open', probe_at = ?, updated = ?
+                WHERE backend = ?
+                AND ((state = 'open' AND open_until <= ?)
+                     OR (state = 'half_open' AND probe_at <= ?))
+            ''', (now, now, backend, now, now - probe_timeout))
+            acquired = self.cursor.rowcount == 1
+            self.conn.commit()
+            return acquired
+        except Exception as e:
+            xbmc.log('[%s] Error starting backend probe: %s - %s' % (__addon_id__, backend, str(e)), xbmc.LOGERROR)
+            return False
+
+    def get_all_backend_health(self):
+        """
+        获取所有后端的健康记录
+
+        Returns:
+            list: 健康记录列表
+        """
+        try:
+            self.cursor.execute('SELECT backend FROM backend_health ORDER BY backend')
+            backends = [row[0] for row in self.cursor.fetchall()]
+            return [h for h in (self.get_backend_health(b) for b in backends) if h]
+        except Exception as e:
+            xbmc.log('[%s] Error reading backend health: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return []
+
+    # ==================== 性能记录方法 ====================
+
+    def add_perf_records(self, route, events, max_records):
+        """
+        写入一次插件调用的阶段耗时，只保留最近 max_records 条
+
+        Args:
+            route: 路由名
+            events: [(阶段名, 耗时秒数)]
+            max_records: 最大记录数
+        """
+        try:
+            timestamp = int(time.time())
+            self.cursor.executemany('''
+                INSERT INTO perf_records (route, phase, elapsed_ms, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', [(route, phase, elapsed * 1000, timestamp) for phase, elapsed in events])
+            self.cursor.execute(
+                'DELETE FROM perf_records WHERE id <= (SELECT MAX(id) FROM perf_records) - ?', (max_records,))
+            self.conn.commit()
+        except Exception as e:
+            xbmc.log('[%s] Error writing perf records: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+
+    def get_perf_records(self):
+        """
+        获取所有性能记录
+
+        Returns:
+            list: [(路由名, 阶段名, 耗时毫秒)]
+        """
+        try:
+            self.cursor.execute('SELECT route, phase, elapsed_ms FROM perf_records')
+            return self.cursor.fetchall()
+        except Exception as e:
+            xbmc.log('[%s] Error reading perf records: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+            return []
+
+    def clear_perf_records(self):
+        """清空性能记录"""
+        try:
+            self.cursor.execute('DELETE FROM perf_records')
+            self.conn.commit()
+        except Exception as e:
+            xbmc.log('[%s] Error clearing perf records: %s' % (__addon_id__, str(e)), xbmc.LOGERROR)
+
     # ==================== 播放历史记录方法 ====================
 
     def add_play_history(self, song_id, song_name, artist, artist_id, album, album_id, pic, duration):
@@ -682,11 +1979,14 @@ class CacheDB:
             return []
 
     def close(self):
-        """关闭数据库连接"""
+        """关闭数据库连接（当前线程共用的连接）"""
         if self.cursor:
             self.cursor.close()
         if self.conn:
-            self.conn.close()
+            if self.conn is getattr(_thread_local, 'conn', None):
+                close_connection()
+            else:
+                self.conn.close()
 
 
 def get_cached_data(prefix, *args):
@@ -7,13 +7,15 @@ import hashlib
 import json
 import os
 import sys
+import threading
+from collections import deque
 
 from Cryptodome.Cipher import AES
 from future.builtins import int, pow
 
 PY3 = sys.version_info.major >= 3
 
-__all__ = ["encrypted_id", "encrypted_request", "eapi_encrypt", "eapi_decrypt"]
+__all__ = ["encrypted_id", "encrypted_request", "eapi_encrypt", "eapi_decrypt", "KeyPool", "get_key_pool"]
 
 MODULUS = (
     "00e0b509f6259df8642dbc35662901477df22677ec152b5ff68ace615bb7"
@@ -25,6 +27,11 @@ MODULUS = (
 PUBKEY = "010001"
 NONCE = b"0CoJUm6Qyw8W8jud"
 
+# weapi 密钥对池大小，以及每个密钥对最多复用的请求数
+# 服务端只用 encSecKey 解出 secret 再解密 params，任意 (secret, encSecKey) 组合都可以重复使用
+KEY_POOL_SIZE = 4
+KEY_REUSE_LIMIT = 64
+
 
 # 歌曲加密算法, 基于https://github.com/yanunon/NeteaseCloudMusic
 def encrypted_id(id):
@@ -42,11 +49,86 @@ def encrypted_id(id):
 def encrypted_request(text):
     # type: (str) -> dict
     data = json.dumps(text).encode("utf-8")
-    secret = create_key(16)
+    secret, encseckey = _key_pool.take()
     params = aes(aes(data, NONCE), secret)
-    encseckey = rsa(secret, PUBKEY, MODULUS)
     return {"params": params, "encSecKey": encseckey}
 
+
+class KeyPool(object):
+    """预先计算的 weapi (secret, encSecKey) 密钥对池
+
+    RSA 加密 secret 是 weapi 请求中最耗 CPU 的一步；密钥对在后台线程中补充，
+    每个密钥对复用 reuse_limit 次，请求路径上只剩两次 AES
+    """
+
+    def __init__(self, size=KEY_POOL_SIZE, reuse_limit=KEY_REUSE_LIMIT):
+        self.size = max(1, size)
+        self.reuse_limit = max(1, reuse_limit)
+        self._pairs = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+
+    @staticmethod
+    def generate():
+        """生成一个新的密钥对"""
+        secret = create_key(16)
+        return secret, rsa(secret, PUBKEY, MODULUS)
+
+    def take(self):
+        """取出一个密钥对，池为空时同步生成；池不满时在后台补充"""
+        result = None
+        with self._lock:
+            if self._pairs:
+                pair = self._pairs[0]
+                pair[2] += 1
+                if pair[2] >= self.reuse_limit:
+                    self._pairs.popleft()
+                result = (pair[0], pair[1])
+
+        if result is None:
+            result = self.generate()
+            with self._lock:
+                if self.reuse_limit > 1:
+                    self._pairs.append([result[0], result[1], 1])
+
+        with self._lock:
+            refill = len(self._pairs) < self.size and not self._refilling
+            if refill:
+                self._refilling = True
+        if refill:
+            t = threading.Thread(target=self._refill)
+            t.daemon = True
+            t.start()
+        return result
+
+    def fill(self):
+        """同步补满密钥对池"""
+        while True:
+            with self._lock:
+                if len(self._pairs) >= self.size:
+                    return
+            pair = self.generate()
+            with self._lock:
+                self._pairs.append([pair[0], pair[1], 0])
+
+    def _refill(self):
+        try:
+            self.fill()
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def __len__(self):
+        return len(self._pairs)
+
+
+_key_pool = KeyPool()
+
+
+def get_key_pool():
+    """获取进程内共享的 weapi 密钥对池"""
+    return _key_pool
+
 if PY3:
     def aes(text, key):
         pad = 16 - len(text) % 16
@@ -116,15 +198,63 @@ def eapi_encrypt(url_path, data):
     return {'params': encrypted.hex().upper()}
 
 
+# eapi_decrypt 每次 hex 解码的密文字节数（AES 块大小的整数倍）
+EAPI_DECRYPT_CHUNK = 64 * 1024
+
+
 def eapi_decrypt(response_hex):
     """EAPI 解密响应
 
     Args:
-        response_hex: hex 编码的加密响应
+        response_hex: hex 编码的加密响应（str 或 bytes，可直接传入 resp.content）
 
     Returns:
         dict: 解密后的 JSON 数据
+
+    Raises:
+        ValueError: 不是合法的 hex 密文、填充错误或明文不是 JSON
     """
-    raw = bytes.fromhex(response_hex)
-    decrypted = _eapi_aes_decrypt(raw)
-    return json.loads(decrypted.decode('utf-8'))
+    return json.loads(eapi_decrypt_body(response_hex))
+
+
+def eapi_decrypt_body(response_hex):
+    """EAPI 解密响应，返回 JSON 明文
+
+    分块 hex 解码并解密到预分配的 bytearray 中，原地去掉填充，
+    大响应只产生一份完整大小的明文副本
+
+    Args:
+        response_hex: hex 编码的加密响应（str 或 bytes，可直接传入 resp.content）
+
+    Returns:
+        bytearray: JSON 明文
+
+    Raises:
+        ValueError: 不是合法的 hex 密文或填充错误
+    """
+    response_hex = response_hex.strip()
+    if not response_hex or len(response_hex) % 32:
+        raise ValueError('invalid eapi response length: %d' % len(response_hex))
+
+    size = len(response_hex) // 2
+    plain = bytearray(size)
+    view = memoryview(plain)
+    cipher = AES.new(EAPI_KEY, AES.MODE_ECB)
+    try:
+        for offset in range(0, size, EAPI_DECRYPT_CHUNK):
+            end = min(offset + EAPI_DECRYPT_CHUNK, size)
+            block = binascii.unhexlify(response_hex[offset * 2:end * 2])
+            try:
+                cipher.decrypt(block, output=view[offset:end])
+            except TypeError:
+                # 旧版 pycryptodome 不支持 output 参数
+                view[offset:end] = cipher.decrypt(block)
+    finally:
+        view.release()
+
+    pad = plain[-1]
+    if not 1 <= pad <= 16:
+        raise ValueError('invalid eapi padding')
+    # bytearray 缩短是原地操作，不复制明文
+    del plain[-pad:]
+    return plain
@@ -0,0 +1,153 @@
+# -*- coding:utf-8 -*-
+"""
+后端健康状态与熔断器
+每个音乐后端（LXMUSIC、GD Music 等）在 cache.db 中保存最近请求的成功率和耗时，
+连续失败或失败率过高时熔断（open），冷却后只放行一个探测请求（half_open），
+探测成功恢复（closed）。状态保存在 SQLite 中，因此在 Kodi 每次新建的插件进程之间共享。
+"""
+
+import time
+import threading
+import xbmc
+
+from cache import get_cache_db
+
+# 熔断器状态
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# 滚动窗口大小（最近 N 次请求）
+HEALTH_WINDOW_SIZE = 20
+# 计算失败率所需的最少样本数
+HEALTH_MIN_SAMPLES = 5
+# 失败率达到该值时熔断
+HEALTH_FAILURE_RATE = 0.5
+# 连续失败次数达到该值时熔断
+HEALTH_CONSECUTIVE_FAILURES = 3
+# 首次熔断的冷却时间（秒），探测失败后翻倍
+HEALTH_COOLDOWN = 60
+# 最长冷却时间（秒）
+HEALTH_MAX_COOLDOWN = 600
+# 半开探测请求的超时时间（秒），超时后允许重新探测
+HEALTH_PROBE_TIMEOUT = 30
+
+# 同一进程内的读-改-写需要串行化
+_lock = threading.Lock()
+
+
+def _new_health(backend):
+    return {
+        'backend': backend,
+        'state': STATE_CLOSED,
+        'window': [],
+        'consecutive_failures': 0,
+        'cooldown': HEALTH_COOLDOWN,
+        'open_until': 0,
+        'probe_at': 0
+    }
+
+
+def is_available(backend):
+    """
+    判断后端当前是否可以请求
+
+    Args:
+        backend: 后端名称
+
+    Returns:
+        bool: closed 状态或获得半开探测名额时返回 True
+    """
+    try:
+        cache_db = get_cache_db()
+        health = cache_db.get_backend_health(backend)
+        if health is None or health['state'] == STATE_CLOSED:
+            return True
+        now = int(time.time())
+        if cache_db.begin_backend_probe(backend, now, HEALTH_PROBE_TIMEOUT):
+            xbmc.log('plugin.audio.music: 后端 %s 冷却结束，放行探测请求' % backend, xbmc.LOGINFO)
+            return True
+        xbmc.log('plugin.audio.music: 后端 %s 已熔断（%s），跳过' % (backend, health['state']), xbmc.LOGDEBUG)
+        return False
+    except Exception as e:
+        xbmc.log('plugin.audio.music: 读取后端 %s 健康状态失败: %s' % (backend, str(e)), xbmc.LOGWARNING)
+        return True
+
+
+def record_result(backend, ok, latency):
+    """
+    记录一次后端请求结果并更新熔断器状态
+
+    Args:
+        backend: 后端名称
+        ok: 请求是否成功（后端可用，即使没有找到歌曲也算成功）
+        latency: 请求耗时（秒）
+    """
+    try:
+        with _lock:
+            cache_db = get_cache_db()
+            health = cache_db.get_backend_health(backend) or _new_health(backend)
+            now = int(time.time())
+
+            health['window'] = (health['window'] + [[1 if ok else 0, int(latency * 1000)]])[-HEALTH_WINDOW_SIZE:]
+
+            if ok:
+                health['consecutive_failures'] = 0
+                if health['state'] != STATE_CLOSED:
+                    xbmc.log('plugin.audio.music: 后端 %s 探测成功，恢复正常' % backend, xbmc.LOGINFO)
+                    health['window'] = health['window'][-1:]
+                    health['cooldown'] = HEALTH_COOLDOWN
+                health['state'] = STATE_CLOSED
+            else:
+                health['consecutive_failures'] += 1
+                if health['state'] == STATE_HALF_OPEN:
+                    # 探测失败，加倍冷却时间后重新熔断
+                    health['cooldown'] = min(health['cooldown'] * 2, HEALTH_MAX_COOLDOWN)
+                    _trip(health, now)
+                elif health['state'] == STATE_CLOSED and _should_trip(health):
+                    _trip(health, now)
+
+            cache_db.save_backend_health(health)
+    except Exception as e:
+        xbmc.log('plugin.audio.music: 记录后端 %s 健康状态失败: %s' % (backend, str(e)), xbmc.LOGWARNING)
+
+
+def get_health(backend):
+    """
+    获取后端健康摘要
+
+    Args:
+        backend: 后端名称
+
+    Returns:
+        dict: {'backend', 'state', 'samples', 'failure_rate', 'avg_latency', 'open_until'}
+    """
+    health = get_cache_db().get_backend_health(backend) or _new_health(backend)
+    window = health['window']
+    samples = len(window)
+    failures = sum(1 for ok, _ in window if not ok)
+    return {
+        'backend': backend,
+        'state': health['state'],
+        'samples': samples,
+        'failure_rate': float(failures) / samples if samples else 0.0,
+        'avg_latency': sum(ms for _, ms in window) / 1000.0 / samples if samples else 0.0,
+        'open_until': health['open_until']
+    }
+
+
+def _should_trip(health):
+    if health['consecutive_failures'] >= HEALTH_CONSECUTIVE_FAILURES:
+        return True
+    window = health['window']
+    if len(window) < HEALTH_MIN_SAMPLES:
+        return False
+    failures = sum(1 for ok, _ in window if not ok)
+    return float(failures) / len(window) >= HEALTH_FAILURE_RATE
+
+
+def _trip(health, now):
+    health['state'] = STATE_OPEN
+    health['open_until'] = now + health['cooldown']
+    xbmc.log('plugin.audio.music: 后端 %s 熔断 %d 秒（连续失败 %d 次）' % (
+        health['backend'], health['cooldown'], health['consecutive_failures']), xbmc.LOGWARNING)
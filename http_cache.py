@@ -0,0 +1,167 @@
+# -*- coding:utf-8 -*-
+"""
+HTTP 响应缓存模块
+为 TuneHub、GD Music 等幂等 GET 后端缓存响应体及其 ETag / Last-Modified / Cache-Control，
+新鲜期内直接返回缓存不访问网络，过期后带 If-None-Match / If-Modified-Since 重新验证，
+服务器返回 304 时复用缓存的响应体
+"""
+
+import time
+from email.utils import parsedate_tz, mktime_tz
+import requests
+from requests.structures import CaseInsensitiveDict
+import xbmc
+
+from cache import get_cache_db
+
+# 只有 Last-Modified 时按 (Date - Last-Modified) 的该比例估算新鲜期（RFC 7234 启发式）
+HEURISTIC_FRESHNESS_FACTOR = 0.1
+# 启发式新鲜期上限（秒）
+HEURISTIC_FRESHNESS_MAX = 24 * 3600
+
+# 随响应体保存的响应头（响应体已解压，不保存 Content-Encoding / Content-Length；Age 只在保存时扣除）
+_STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Expires', 'Date')
+
+
+def _parse_http_date(value):
+    """解析 HTTP 日期为时间戳，失败返回 None"""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_tz(value)
+        return mktime_tz(parsed) if parsed else None
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _cache_control(headers):
+    """解析 Cache-Control 为 {指令: 值}"""
+    directives = {}
+    for part in (headers.get('Cache-Control') or '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip().strip('"')
+    return directives
+
+
+def freshness_lifetime(headers, now=None):
+    """
+    根据响应头计算剩余新鲜期
+
+    Args:
+        headers: 响应头（大小写不敏感的 dict）
+        now: 当前时间戳，默认为 time.time()
+
+    Returns:
+        int: 剩余新鲜期（秒），0 表示每次都需要重新验证；不允许缓存时返回 None
+    """
+    now = int(now if now is not None else time.time())
+    directives = _cache_control(headers)
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0
+
+    date = _parse_http_date(headers.get('Date')) or now
+    lifetime = 0
+    if directives.get('max-age', '').isdigit():
+        lifetime = int(directives['max-age'])
+    elif headers.get('Expires'):
+        expires = _parse_http_date(headers.get('Expires'))
+        lifetime = max(expires - date, 0) if expires else 0
+    elif headers.get('Last-Modified'):
+        last_modified = _parse_http_date(headers.get('Last-Modified'))
+        if last_modified and last_modified < date:
+            lifetime = min(int((date - last_modified) * HEURISTIC_FRESHNESS_FACTOR), HEURISTIC_FRESHNESS_MAX)
+
+    age = headers.get('Age') or ''
+    if age.isdigit():
+        lifetime -= int(age)
+    return max(lifetime, 0)
+
+
+class HttpCache(object):
+    """
+    带条件请求的 HTTP GET 缓存
+
+    Args:
+        transport: api.HttpTransport 实例
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def get(self, url, params=None, headers=None, latency_key=None, hedge=False, **kwargs):
+        """
+        发送 GET 请求，优先使用缓存
+
+        Args:
+            url: 请求地址
+            params: 查询参数
+            headers: 请求头
+            latency_key: 接口名称（延迟统计）
+            hedge: 是否使用对冲请求（仅当提供 latency_key 时有效）
+            **kwargs: 传给 requests 的其他参数
+
+        Returns:
+            requests.Response: 网络响应或由缓存构造的响应
+        """
+        key = requests.Request('GET', url, params=params).prepare().url
+        cache_db = get_cache_db()
+        entry = cache_db.get_http_response(key)
+        if entry and entry['fresh_until'] > time.time():
+            xbmc.log('plugin.audio.music: HTTP缓存命中 %s' % key[:120], xbmc.LOGDEBUG)
+            return self._build_response(entry, entry['headers'])
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        if hedge and latency_key:
+            response = self.transport.hedged_get(key, latency_key, headers=request_headers, **kwargs)
+        else:
+            response = self.transport.get(key, latency_key=latency_key, headers=request_headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            merged = dict(entry['headers'])
+            merged.update(self._stored_headers(response.headers))
+            lifetime = freshness_lifetime(CaseInsensitiveDict(merged))
+            cache_db.refresh_http_response(key, merged, time.time() + (lifetime or 0))
+            xbmc.log('plugin.audio.music: HTTP缓存重新验证通过 %s' % key[:120], xbmc.LOGDEBUG)
+            return self._build_response(entry, merged)
+
+        if response.status_code == 200:
+            self._store(key, response)
+        return response
+
+    def _store(self, key, response):
+        """按响应头决定是否保存响应"""
+        lifetime = freshness_lifetime(response.headers)
+        if lifetime is None:
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        # 既没有新鲜期也没有验证器的响应缓存了也无法复用
+        if not lifetime and not etag and not last_modified:
+            return
+        get_cache_db().set_http_response(key, response.url, self._stored_headers(response.headers),
+                                         response.content, etag, last_modified, time.time() + lifetime)
+
+    @staticmethod
+    def _stored_headers(headers):
+        return {name: headers[name] for name in _STORED_HEADERS if headers.get(name)}
+
+    @staticmethod
+    def _build_response(entry, headers):
+        """由缓存条目构造 requests.Response，调用方无需区分来源"""
+        response = requests.models.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry['final_url'] or entry['url']
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = entry['body']
+        return response
@@ -0,0 +1,187 @@
+# -*- coding:utf-8 -*-
+"""
+接口延迟统计与自适应超时策略
+按接口记录请求耗时的分桶直方图（保存在 cache.db，跨插件进程共享），
+由观测到的 p99 推导每次请求的超时时间，由 p95 决定对冲请求的发送时机；
+重试等待使用带随机抖动的指数退避
+"""
+
+import random
+import atexit
+import threading
+import xbmc
+
+from cache import get_cache_db
+
+# 直方图分桶上界（毫秒），超过最后一个上界的样本计入最后一个桶
+LATENCY_BUCKETS_MS = (50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000,
+                      5000, 7500, 10000, 15000, 20000, 30000, 60000)
+# 样本数达到该值后才使用自适应超时，之前使用默认超时
+LATENCY_MIN_SAMPLES = 20
+# 样本总数超过该值时所有计数减半，使直方图跟随接口最近的表现
+LATENCY_MAX_SAMPLES = 1000
+# 超时时间 = p99 * 该系数，上限为调用方给出的默认超时
+TIMEOUT_P99_FACTOR = 2.0
+# 自适应超时的下限（秒），避免偶发的慢请求被过早放弃
+MIN_TIMEOUT = 2.0
+# 本进程累计该数量的新样本后写入数据库（进程退出时也会写入）
+FLUSH_EVERY = 10
+# 对冲请求的最短等待时间（秒）
+MIN_HEDGE_DELAY = 0.2
+# 退避等待的上限（秒）
+BACKOFF_CAP = 10
+
+
+def _bucket_index(ms):
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS) - 1
+
+
+class LatencyTracker(object):
+    """
+    按接口统计请求耗时
+
+    数据库中的直方图每个进程只读取一次，本进程新增的样本先累计在内存中，
+    定期合并写回数据库
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stored = {}
+        self._pending = {}
+
+    def _histogram(self, endpoint):
+        """数据库中的直方图与本进程新增样本之和（调用方需持有锁）"""
+        if endpoint not in self._stored:
+            try:
+                self._stored[endpoint] = get_cache_db().get_latency_histogram(endpoint) or [0] * len(LATENCY_BUCKETS_MS)
+            except Exception as e:
+                xbmc.log('plugin.audio.music: 读取 %s 延迟统计失败: %s' % (endpoint, str(e)), xbmc.LOGWARNING)
+                self._stored[endpoint] = [0] * len(LATENCY_BUCKETS_MS)
+        stored = self._stored[endpoint]
+        if len(stored) != len(LATENCY_BUCKETS_MS):
+            stored = [0] * len(LATENCY_BUCKETS_MS)
+        pending = self._pending.get(endpoint)
+        if not pending:
+            return stored
+        return [a + b for a, b in zip(stored, pending)]
+
+    def record(self, endpoint, seconds):
+        """
+        记录一次请求耗时（超时的请求按超时时间记录）
+
+        Args:
+            endpoint: 接口名称
+            seconds: 耗时（秒）
+        """
+        flush = False
+        with self._lock:
+            pending = self._pending.setdefault(endpoint, [0] * len(LATENCY_BUCKETS_MS))
+            pending[_bucket_index(seconds * 1000)] += 1
+            flush = sum(pending) >= FLUSH_EVERY
+        if flush:
+            self.flush(endpoint)
+
+    def percentile(self, endpoint, q):
+        """
+        估算接口耗时的分位数
+
+        Args:
+            endpoint: 接口名称
+            q: 分位（0-1）
+
+        Returns:
+            float: 分位数所在桶的上界（秒），样本不足时返回 None
+        """
+        with self._lock:
+            histogram = self._histogram(endpoint)
+        total = sum(histogram)
+        if total < LATENCY_MIN_SAMPLES:
+            return None
+        threshold = q * total
+        seen = 0
+        for i, count in enumerate(histogram):
+            seen += count
+            if seen >= threshold:
+                return LATENCY_BUCKETS_MS[i] / 1000.0
+        return LATENCY_BUCKETS_MS[-1] / 1000.0
+
+    def timeout_for(self, endpoint, default):
+        """
+        计算接口本次请求的超时时间
+
+        Args:
+            endpoint: 接口名称
+            default: 默认超时（秒），同时作为上限
+
+        Returns:
+            float: 超时时间（秒）
+        """
+        p99 = self.percentile(endpoint, 0.99)
+        if p99 is None:
+            return default
+        return max(min(p99 * TIMEOUT_P99_FACTOR, default), min(MIN_TIMEOUT, default))
+
+    def hedge_delay(self, endpoint):
+        """
+        计算发送对冲请求前的等待时间
+
+        Args:
+            endpoint: 接口名称
+
+        Returns:
+            float: 等待时间（秒），样本不足时返回 None（不对冲）
+        """
+        p95 = self.percentile(endpoint, 0.95)
+        if p95 is None:
+            return None
+        return max(p95, MIN_HEDGE_DELAY)
+
+    def flush(self, endpoint=None):
+        """
+        将本进程新增的样本合并写入数据库
+
+        Args:
+            endpoint: 接口名称，None 表示全部
+        """
+        with self._lock:
+            endpoints = [endpoint] if endpoint else list(self._pending.keys())
+            for key in endpoints:
+                pending = self._pending.pop(key, None)
+                if not pending or not sum(pending):
+                    continue
+                try:
+                    merged = get_cache_db().merge_latency_histogram(key, pending, LATENCY_MAX_SAMPLES)
+                except Exception as e:
+                    merged = None
+                    xbmc.log('plugin.audio.music: 保存 %s 延迟统计失败: %s' % (key, str(e)), xbmc.LOGWARNING)
+                if merged is None:
+                    # 写入失败时保留在内存中，本进程内仍然生效
+                    self._pending[key] = pending
+                else:
+                    self._stored[key] = merged
+
+
+_tracker = LatencyTracker()
+atexit.register(_tracker.flush)
+
+
+def get_latency_tracker():
+    """获取进程内共享的延迟统计实例"""
+    return _tracker
+
+
+def backoff_delay(attempt, cap=BACKOFF_CAP):
+    """
+    带随机抖动的指数退避等待时间（full jitter），避免多个进程同时重试
+
+    Args:
+        attempt: 第几次重试（从 0 开始）
+        cap: 等待上限（秒）
+
+    Returns:
+        float: 等待时间（秒）
+    """
+    return random.uniform(0, min(cap, 2 ** attempt))
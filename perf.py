@@ -0,0 +1,283 @@
+# -*- coding:utf-8 -*-
+"""
+性能记录模块
+记录一次插件调用中各阶段的耗时（导入、读取设置、各后端接口请求、缓存读写、构建列表项、
+addDirectoryItems / setResolvedUrl、路由处理函数与总耗时），调用结束时写入 cache.db 中
+容量有限的 perf_records 表，由 /perf_report/ 路由按路由和后端接口统计 p50 / p95 / 最大值。
+阶段之间可以嵌套（例如路由处理函数包含其中的接口请求）。
+需要查看函数级耗时时，可以用 cProfile 运行某个路由的处理函数（profile_call）
+"""
+
+import os
+import math
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+# perf_records 表保留的最大记录数
+PERF_MAX_RECORDS = 5000
+# 一次调用最多记录的阶段数
+PERF_MAX_EVENTS = 500
+# 后端接口阶段名的前缀
+BACKEND_PHASES = ('netease', 'tunehub', 'lxmusic', 'gdmusic')
+
+
+class PerfRecorder(object):
+    """一次调用中的阶段耗时记录"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events = []
+        self.dropped = 0
+
+    def add(self, phase, elapsed):
+        """
+        记录一个阶段
+
+        Args:
+            phase: 阶段名，后端接口为 '后端 接口'，如 'netease /api/v6/playlist/detail'
+            elapsed: 耗时（秒）
+        """
+        with self._lock:
+            if len(self.events) < PERF_MAX_EVENTS:
+                self.events.append((phase, elapsed))
+            else:
+                self.dropped += 1
+
+    def extend(self, events):
+        """合并其他进程（后台服务）记录的阶段"""
+        for phase, elapsed in events:
+            self.add(phase, elapsed)
+
+    @contextmanager
+    def phase(self, name):
+        """记录 with 语句块的耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def take(self):
+        """
+        取出并清空已记录的阶段
+
+        Returns:
+            list: [(阶段名, 耗时秒数)]
+        """
+        with self._lock:
+            events, self.events = self.events, []
+            self.dropped = 0
+        return events
+
+
+_recorder = PerfRecorder()
+_local = threading.local()
+
+
+def get_recorder():
+    """
+    获取当前的阶段记录器（capture 期间为线程自己的记录器）
+
+    Returns:
+        PerfRecorder: 记录器
+    """
+    return getattr(_local, 'recorder', None) or _recorder
+
+
+@contextmanager
+def capture():
+    """在当前线程中使用单独的记录器（后台服务按调用收集阶段并返回给插件进程）"""
+    recorder = PerfRecorder()
+    previous = getattr(_local, 'recorder', None)
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.recorder = previous
+
+
+def timed(phase):
+    """
+    记录函数耗时的装饰器
+
+    Args:
+        phase: 阶段名，或根据调用参数返回阶段名的函数
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                name = phase(*args, **kwargs) if callable(phase) else phase
+                get_recorder().add(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def is_enabled():
+    """设置中开启了性能记录时返回 True"""
+    from settings import get_settings
+    return get_settings().get_bool('perf_tracking')
+
+
+def save(route, total):
+    """
+    将本次调用记录的阶段写入数据库
+
+    Args:
+        route: 路由名
+        total: 调用总耗时（秒）
+    """
+    events = _recorder.take()
+    if not is_enabled():
+        return
+    from cache import get_cache_db
+    events.append(('total', total))
+    get_cache_db().add_perf_records(route, events, PERF_MAX_RECORDS)
+
+
+def percentile(samples, pct):
+    """
+    计算百分位数（最近秩法）
+
+    Args:
+        samples: 已排序的样本
+        pct: 百分位，如 95
+
+    Returns:
+        float: 百分位数，没有样本时返回 0
+    """
+    if not samples:
+        return 0
+    rank = max(int(math.ceil(pct / 100.0 * len(samples))) - 1, 0)
+    return samples[min(rank, len(samples) - 1)]
+
+
+def summarize(records):
+    """
+    按路由与后端接口统计耗时
+
+    Args:
+        records: [(路由名, 阶段名, 耗时毫秒)]
+
+    Returns:
+        dict: {'routes': [...], 'backends': [...], 'phases': [...]}，
+              每项为 (名称, 次数, p50, p95, 最大值)，按 p95 从大到小排列
+    """
+    groups = {'routes': {}, 'backends': {}, 'phases': {}}
+    for route, phase, elapsed_ms in records:
+        if phase == 'total':
+            key, name = 'routes', route
+        elif phase.split(' ', 1)[0] in BACKEND_PHASES:
+            key, name = 'backends', phase
+        else:
+            key, name = 'phases', phase
+        groups[key].setdefault(name, []).append(elapsed_ms)
+
+    summary = {}
+    for key, group in groups.items():
+        rows = []
+        for name, samples in group.items():
+            samples.sort()
+            rows.append((name, len(samples), percentile(samples, 50), percentile(samples, 95), samples[-1]))
+        rows.sort(key=lambda row: -row[3])
+        summary[key] = rows
+    return summary
+
+
+# ==================== cProfile 采样 ====================
+
+# 保存 .prof 文件的目录（profile 目录下）
+PROFILE_DIR_NAME = 'profiles'
+# 最多保留的 .prof 文件数
+PROFILE_KEEP = 10
+# 报告中列出的函数数
+PROFILE_TOP_N = 30
+
+
+def profile_dir():
+    """
+    Returns:
+        str: 保存 .prof 文件的目录
+    """
+    import xbmc
+    import xbmcaddon
+    try:
+        import xbmcvfs
+        translate = xbmcvfs.translatePath
+    except (ImportError, AttributeError):
+        translate = xbmc.translatePath
+    path = os.path.join(translate(xbmcaddon.Addon().getAddonInfo('profile')), PROFILE_DIR_NAME)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    return path
+
+
+def profile_call(route, func, *args, **kwargs):
+    """
+    用 cProfile 运行 func，结果保存为 profile 目录下的 .prof 文件（只保留最近 PROFILE_KEEP 个）
+
+    Args:
+        route: 路由名（用于文件名）
+        func: 要运行的函数
+
+    Returns:
+        func 的返回值
+    """
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        directory = profile_dir()
+        now = time.time()
+        name = '%s%03d_%s.prof' % (time.strftime('%Y%m%d-%H%M%S', time.localtime(now)), now * 1000 % 1000, route)
+        profiler.dump_stats(os.path.join(directory, name))
+        for old in list_profiles()[PROFILE_KEEP:]:
+            try:
+                os.remove(os.path.join(directory, old))
+            except OSError:
+                pass
+
+
+def list_profiles():
+    """
+    Returns:
+        list: .prof 文件名，最新的在前
+    """
+    return sorted((f for f in os.listdir(profile_dir()) if f.endswith('.prof')), reverse=True)
+
+
+def profile_stats(name, top_n=PROFILE_TOP_N):
+    """
+    读取 .prof 文件中累计耗时最多的函数
+
+    Args:
+        name: .prof 文件名（list_profiles 返回的名称）
+        top_n: 函数数
+
+    Returns:
+        list: [{'function', 'file', 'line', 'ncalls', 'tottime', 'cumtime'}]，文件不存在时返回 None
+    """
+    import pstats
+    if name not in list_profiles():
+        return None
+    stats = pstats.Stats(os.path.join(profile_dir(), name))
+    stats.sort_stats('cumulative')
+    rows = []
+    for func in stats.fcn_list[:top_n]:
+        filename, line, function = func
+        primitive_calls, ncalls, tottime, cumtime, _ = stats.stats[func]
+        rows.append({
+            'function': function,
+            'file': os.path.basename(filename),
+            'line': line,
+            'ncalls': ncalls if ncalls == primitive_calls else '%d/%d' % (ncalls, primitive_calls),
+            'tottime': tottime,
+            'cumtime': cumtime,
+        })
+    return rows
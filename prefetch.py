@@ -0,0 +1,207 @@
+# -*- coding:utf-8 -*-
+"""
+播放列表预取模块
+当前歌曲播放时，在后台解析播放列表中接下来 N 首歌曲的播放地址并写入播放地址缓存，
+切歌时 play() 直接命中缓存，不再等待完整的解析链
+"""
+
+import re
+import time
+import queue
+import threading
+import xbmc
+import xbmcgui
+
+from cache import get_cache_db
+
+# 默认预取歌曲数与并发数
+PREFETCH_DEFAULT_COUNT = 3
+PREFETCH_DEFAULT_WORKERS = 2
+# 其他插件进程正在预取同一首歌时，在该时间内（秒）不重复预取
+PREFETCH_INFLIGHT_TTL = 60
+
+# plugin://plugin.audio.music/play/<meida_type>/<song_id>/<mv_id>/<sourceId>/<dt>/<source>/
+# 末尾斜杠可省略（play_album 生成的地址没有）
+_PLAY_PATH_RE = re.compile(r'^plugin://[^/]+/play/song/([^/]+)/[^/]*/[^/]*/[^/]*/([^/?]+)/?')
+
+
+def parse_play_path(path):
+    """
+    从播放列表中的 play 路由地址解析歌曲ID和音源
+
+    Args:
+        path: 播放列表项路径
+
+    Returns:
+        tuple: (song_id, source)，不是歌曲播放地址时返回 (None, None)
+    """
+    m = _PLAY_PATH_RE.match(path or '')
+    if not m:
+        return None, None
+    return m.group(1), m.group(2)
+
+
+def _inflight_key(song_id, level, source):
+    return 'nc_prefetch_%s_%s_%s' % (song_id, level, source)
+
+
+def _claim(song_id, level, source):
+    """通过 Window 属性在插件进程之间标记正在预取的歌曲，返回是否获得预取权"""
+    window = xbmcgui.Window(10000)
+    key = _inflight_key(song_id, level, source)
+    started = window.getProperty(key)
+    now = time.time()
+    if started:
+        try:
+            if now - float(started) < PREFETCH_INFLIGHT_TTL:
+                return False
+        except ValueError:
+            pass
+    window.setProperty(key, str(now))
+    return True
+
+
+def _release(song_id, level, source):
+    xbmcgui.Window(10000).clearProperty(_inflight_key(song_id, level, source))
+
+
+class Prefetcher(object):
+    """
+    播放列表预取器
+
+    Args:
+        music: NetEase 实例
+        level: 音质级别（与 play() 使用的一致，保证缓存键相同）
+        count: 预取当前歌曲之后的歌曲数量
+        workers: 同时解析的歌曲数量
+    """
+
+    def __init__(self, music, level, count=PREFETCH_DEFAULT_COUNT, workers=PREFETCH_DEFAULT_WORKERS):
+        self.music = music
+        self.level = level
+        self.count = max(0, int(count))
+        self.workers = max(1, int(workers))
+
+    def collect(self, current_pos):
+        """
+        收集播放列表中 current_pos 之后需要预取的歌曲
+
+        Args:
+            current_pos: 当前播放位置（0-based）
+
+        Returns:
+            list: [(song_id, source, title, artist)]
+        """
+        playlist = xbmc.PlayList(xbmc.PLAYLIST_MUSIC)
+        size = playlist.size()
+        cache_db = get_cache_db()
+        tasks = []
+        for pos in range(current_pos + 1, min(current_pos + 1 + self.count, size)):
+            item = playlist[pos]
+            song_id, source = parse_play_path(item.getPath())
+            if not song_id:
+                continue
+            if cache_db.get_resolved_url(song_id, self.level, source):
+                continue
+            tag = item.getMusicInfoTag()
+            tasks.append((song_id, source, tag.getTitle(), tag.getArtist()))
+        return tasks
+
+    def find_position(self, song_id):
+        """
+        查找歌曲在播放列表中的位置，找不到时使用播放器当前位置
+
+        Args:
+            song_id: 歌曲ID
+
+        Returns:
+            int: 位置（0-based），播放列表为空时返回 -1
+        """
+        playlist = xbmc.PlayList(xbmc.PLAYLIST_MUSIC)
+        current = playlist.getposition()
+        matches = []
+        for pos in range(playlist.size()):
+            if parse_play_path(playlist[pos].getPath())[0] == str(song_id):
+                matches.append(pos)
+        if current in matches or not matches:
+            return current
+        return matches[0]
+
+    def run(self, current_pos):
+        """
+        预取 current_pos 之后的歌曲（阻塞直到完成）
+
+        Args:
+            current_pos: 当前播放位置（0-based）
+
+        Returns:
+            int: 成功预取的歌曲数量
+        """
+        if self.count <= 0 or current_pos < 0:
+            return 0
+        # 缓存关闭时预取结果无处保存
+        if not get_cache_db().is_cache_enabled():
+            return 0
+        tasks = queue.Queue()
+        for task in self.collect(current_pos):
+            tasks.put(task)
+        if tasks.empty():
+            return 0
+
+        start = time.time()
+        resolved = []
+
+        def _worker():
+            while True:
+                try:
+                    song_id, source, title, artist = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                if not _claim(song_id, self.level, source):
+                    continue
+                try:
+                    data = self.music.songs_url_v1(
+                        [song_id], level=self.level, source=source,
+                        song_names=[title] if title else None,
+                        artist_names=[artist] if artist else None).get('data', [])
+                    if data and data[0].get('url'):
+                        resolved.append(song_id)
+                except Exception as e:
+                    xbmc.log('plugin.audio.music: 预取 %s 失败: %s' % (song_id, str(e)), xbmc.LOGWARNING)
+                finally:
+                    _release(song_id, self.level, source)
+
+        threads = [threading.Thread(target=_worker) for _ in range(min(self.workers, tasks.qsize()))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        xbmc.log('plugin.audio.music: 预取完成 %d 首，耗时 %.2fs' % (len(resolved), time.time() - start), xbmc.LOGINFO)
+        return len(resolved)
+
+    def start(self, current_pos=None, song_id=None):
+        """
+        在后台线程中预取
+
+        Args:
+            current_pos: 当前播放位置（0-based）
+            song_id: 当前歌曲ID，未提供 current_pos 时用于定位
+
+        Returns:
+            threading.Thread: 预取线程，未启用预取时返回 None
+        """
+        if self.count <= 0:
+            return None
+
+        def _run():
+            try:
+                pos = current_pos if current_pos is not None else self.find_position(song_id)
+                self.run(pos)
+            except Exception as e:
+                xbmc.log('plugin.audio.music: 预取异常: %s' % str(e), xbmc.LOGERROR)
+
+        # 非守护线程：插件进程会等预取完成后再退出，播放不受影响
+        t = threading.Thread(target=_run)
+        t.start()
+        return t
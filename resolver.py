@@ -0,0 +1,125 @@
+# -*- coding:utf-8 -*-
+"""
+播放地址并发解析模块
+将 (后端, 音源, 音质) 候选放到有界线程池中并发执行，按优先级返回第一个可用地址
+"""
+
+import time
+import queue
+import threading
+import xbmc
+
+# 默认并发数与起播截止时间（秒）
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_DEADLINE = 15
+
+# 候选尚未返回结果的占位符
+_PENDING = object()
+
+
+class UrlResolver(object):
+    """
+    并发、带截止时间的播放地址解析器
+
+    候选按优先级从高到低排列，每个候选是 (name, func)，func(cancel_event) 返回
+    (url, used_source, quality) 或 None。候选按优先级依次进入线程池，eager 中的候选立即启动。一旦某个候选成功且所有更高优先级的候选都已失败，
+    立即返回该结果并取消其余尝试；到达截止时间时返回已完成候选中优先级最高的结果。
+
+    工作线程为守护线程：被取消的请求不会阻止 Kodi 结束本次插件调用。
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, deadline=DEFAULT_DEADLINE):
+        self.max_workers = max(1, int(max_workers))
+        self.deadline = float(deadline)
+
+    def resolve(self, candidates, eager=()):
+        """
+        并发解析候选列表
+
+        Args:
+            candidates: [(name, func)]，按优先级从高到低排列
+            eager: 立即在独立线程中启动的候选名称，不占用线程池名额，
+                如兜底的网易云接口不必等到前面的候选执行完才开始；
+                选择结果时仍按 candidates 中的优先级
+
+        Returns:
+            tuple: (url, used_source, quality)，全部失败或超时返回 (None, None, None)
+        """
+        if not candidates:
+            return None, None, None
+
+        # 截止时间使用单调时钟，不受系统时间调整影响
+        start = time.monotonic()
+        cancel = threading.Event()
+        tasks = queue.Queue()
+        done = queue.Queue()
+
+        def _run(index, name, func):
+            t0 = time.monotonic()
+            try:
+                value = func(cancel)
+            except Exception as e:
+                xbmc.log('plugin.audio.music: 解析候选 %s 失败: %s' % (name, str(e)), xbmc.LOGDEBUG)
+                value = None
+            xbmc.log('plugin.audio.music: 解析候选 %s 完成 (%.2fs) 结果=%s' % (
+                name, time.monotonic() - t0, 'OK' if value else 'None'), xbmc.LOGDEBUG)
+            done.put((index, value))
+
+        def _worker():
+            while not cancel.is_set():
+                try:
+                    index, name, func = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                _run(index, name, func)
+
+        pooled = 0
+        for index, (name, func) in enumerate(candidates):
+            if name in eager:
+                threading.Thread(target=_run, args=(index, name, func), daemon=True).start()
+            else:
+                tasks.put((index, name, func))
+                pooled += 1
+
+        for _ in range(min(self.max_workers, pooled)):
+            threading.Thread(target=_worker, daemon=True).start()
+
+        results = [_PENDING] * len(candidates)
+        winner = None
+        while True:
+            remaining = self.deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                xbmc.log('plugin.audio.music: 解析超过截止时间 %.1fs，使用已完成的最佳结果' % self.deadline, xbmc.LOGWARNING)
+                break
+            try:
+                index, value = done.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            results[index] = value or None
+            winner = self._pick(results)
+            if winner is not None or _PENDING not in results:
+                break
+
+        # 取消尚未开始的候选，正在执行的候选会在下一个检查点退出
+        cancel.set()
+
+        if winner is None:
+            winner = next((r for r in results if r is not _PENDING and r), None)
+
+        elapsed = time.monotonic() - start
+        if winner:
+            url, used_source, quality = winner
+            xbmc.log('plugin.audio.music: 解析完成 used_source=%s 耗时 %.2fs' % (used_source, elapsed), xbmc.LOGINFO)
+            return url, used_source, quality
+        xbmc.log('plugin.audio.music: 所有解析候选均失败，耗时 %.2fs' % elapsed, xbmc.LOGINFO)
+        return None, None, None
+
+    @staticmethod
+    def _pick(results):
+        """按优先级查找可确定的赢家：遇到仍在执行的更高优先级候选时返回 None"""
+        for result in results:
+            if result is _PENDING:
+                return None
+            if result:
+                return result
+        return None
@@ -0,0 +1,142 @@
+# -*- coding:utf-8 -*-
+"""
+路由分发模块
+根据 addon.py 中的 _ROUTE_PATHS（路由名 -> 路径模板）编译路由表：按路径第一段查表定位路由，
+按模板提取参数并做类型转换，处理函数在匹配后才解析（可以位于其他模块，匹配时才导入）
+"""
+
+import time
+import importlib
+
+
+class Route(object):
+    """
+    一条路由
+
+    Args:
+        name: 路由名
+        template: 路径模板，如 '/album/<id>/'
+        handler: 处理函数名，'模块:函数' 表示匹配时才导入该模块
+        converters: {参数名: 转换函数}
+        defaults: {参数名: 缺省值}，路径中缺少的参数使用缺省值
+    """
+
+    def __init__(self, name, template, handler=None, converters=None, defaults=None):
+        segments = [s for s in template.strip('/').split('/') if s]
+        if segments and segments[0].startswith('<'):
+            raise ValueError('route %s must start with a literal segment: %s' % (name, template))
+        self.name = name
+        self.template = template
+        self.prefix = segments[0] if segments else ''
+        self.params = []
+        for segment in segments[1:]:
+            if not (segment.startswith('<') and segment.endswith('>')):
+                raise ValueError('route %s has a literal segment after parameters: %s' % (name, template))
+            self.params.append(segment[1:-1])
+        self.handler = handler or name
+        self.converters = converters or {}
+        self.defaults = defaults or {}
+
+    def parse(self, rest):
+        """
+        从路径第一段之后的部分提取参数
+
+        Args:
+            rest: 路径剩余部分（不含首尾斜杠）
+
+        Returns:
+            dict: 参数，路径与模板不符时返回 None
+        """
+        if not self.params:
+            return {} if not rest else None
+        # 最后一个参数取剩余的全部内容（解码后的值可能包含斜杠）
+        values = rest.split('/', len(self.params) - 1) if rest else ['']
+        kwargs = {}
+        for i, param in enumerate(self.params):
+            if i < len(values):
+                value = values[i]
+            elif param in self.defaults:
+                value = self.defaults[param]
+            else:
+                return None
+            converter = self.converters.get(param)
+            kwargs[param] = converter(value) if converter else value
+        return kwargs
+
+
+class Router(object):
+    """
+    路由表
+
+    Args:
+        paths: {路由名: 路径模板}
+        namespace: 处理函数所在的命名空间（addon.py 的 globals()）
+        handlers: {路由名: 处理函数名或 '模块:函数'}，默认与路由名相同
+        converters: {路由名: {参数名: 转换函数}}
+        defaults: {路由名: {参数名: 缺省值}}
+    """
+
+    def __init__(self, paths, namespace, handlers=None, converters=None, defaults=None):
+        handlers = handlers or {}
+        converters = converters or {}
+        defaults = defaults or {}
+        self.namespace = namespace
+        self._routes = {}
+        self._hooks = []
+        for name, template in paths.items():
+            route = Route(name, template, handlers.get(name), converters.get(name), defaults.get(name))
+            if route.prefix in self._routes:
+                raise ValueError('routes %s and %s share the first segment %s' % (
+                    self._routes[route.prefix].name, name, route.prefix))
+            self._routes[route.prefix] = route
+
+    def add_hook(self, hook):
+        """
+        注册计时钩子
+
+        Args:
+            hook: hook(路由名, 参数, 耗时秒数)，处理函数抛出异常时也会调用
+        """
+        self._hooks.append(hook)
+
+    def match(self, path):
+        """
+        匹配路径
+
+        Args:
+            path: 已解码的路径，如 '/album/123/'
+
+        Returns:
+            tuple: (Route, 参数)，未匹配时返回 None
+        """
+        prefix, _, rest = path.strip('/').partition('/')
+        route = self._routes.get(prefix)
+        if route is None:
+            return None
+        kwargs = route.parse(rest.strip('/'))
+        if kwargs is None:
+            return None
+        return route, kwargs
+
+    def resolve(self, route):
+        """解析处理函数，'模块:函数' 形式的处理函数在此时才导入模块"""
+        module_name, _, func_name = route.handler.rpartition(':')
+        if module_name:
+            return getattr(importlib.import_module(module_name), func_name)
+        return self.namespace[func_name]
+
+    def dispatch(self, route, kwargs):
+        """
+        调用路由的处理函数
+
+        Returns:
+            处理函数的返回值
+        """
+        handler = self.resolve(route)
+        started = time.time()
+        try:
+            return handler(**kwargs)
+        finally:
+            elapsed = time.time() - started
+            for hook in self._hooks:
+                hook(route.name, kwargs, elapsed)
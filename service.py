@@ -0,0 +1,372 @@
+# -*- coding:utf-8 -*-
+"""
+常驻后台服务
+Kodi 每次调用插件路由都会启动新的解释器，HTTP 连接池、cookie、SQLite 连接、进程内缓存和后端健康状态
+每次都要重新建立。本服务随 Kodi 启动（addon.xml 中的 xbmc.service），常驻一个 NetEase 客户端、
+播放地址解析器和请求结果缓存；插件路由通过本机 socket 以 JSON 调用 NetEase 方法（见 ServiceClient），
+服务未运行时在插件进程内执行
+"""
+
+import os
+import json
+import time
+import secrets
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import xbmc
+import xbmcaddon
+import xbmcvfs
+
+import perf
+
+try:
+    xbmc.translatePath = xbmcvfs.translatePath
+except AttributeError:
+    pass
+
+ADDON_ID = 'plugin.audio.music'
+SERVICE_HOST = '127.0.0.1'
+# 服务地址与令牌，保存在 profile 目录下
+SERVICE_INFO_FILE = 'service.json'
+# 连接服务的超时（秒），超时视为服务未运行
+CONNECT_TIMEOUT = 0.5
+# 等待调用结果的超时（秒）
+CALL_TIMEOUT = 120
+# 处理请求的线程数；线程复用，线程内的数据库连接保持打开
+SERVICE_WORKERS = 4
+# 请求结果缓存的保留时间（秒）
+SERVICE_MEMO_TTL = 60
+# 后台维护间隔（秒）
+SERVICE_TICK = 10
+
+
+class ServiceUnavailable(Exception):
+    """服务未运行或无法处理该调用，调用方应在本进程内执行"""
+
+
+class ServiceError(Exception):
+    """方法在服务中执行时抛出异常"""
+
+
+def _profile_dir():
+    return xbmc.translatePath(xbmcaddon.Addon(ADDON_ID).getAddonInfo('profile'))
+
+
+def _recv_line(sock):
+    """读取一行（以换行结尾的 JSON）"""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks)
+
+
+class ServiceClient(object):
+    """
+    插件进程中的服务客户端
+
+    Args:
+        profile: profile 目录，默认为本插件的 profile 目录
+    """
+
+    def __init__(self, profile=None):
+        self.profile = profile
+        self._info = None
+        self._down = False
+
+    def _load_info(self):
+        if self._info is None:
+            path = os.path.join(self.profile or _profile_dir(), SERVICE_INFO_FILE)
+            try:
+                with open(path, 'r') as f:
+                    self._info = json.load(f)
+            except (IOError, OSError, ValueError):
+                self._down = True
+                raise ServiceUnavailable('service not running')
+        return self._info
+
+    def call(self, method, args=(), kwargs=None):
+        """
+        在服务中调用 NetEase 方法
+
+        Args:
+            method: 方法名
+            args: 位置参数
+            kwargs: 关键字参数
+
+        Returns:
+            方法返回值
+
+        Raises:
+            ServiceUnavailable: 服务未运行、参数或返回值无法用 JSON 传递
+            ServiceError: 方法在服务中抛出异常
+        """
+        if self._down:
+            raise ServiceUnavailable('service not running')
+        info = self._load_info()
+        try:
+            request = json.dumps({'token': info.get('token'), 'method': method,
+                                  'args': list(args), 'kwargs': kwargs or {}}).encode('utf-8')
+        except (TypeError, ValueError):
+            # 回调函数等参数无法传给服务
+            raise ServiceUnavailable('arguments not serializable')
+
+        try:
+            sock = socket.create_connection((info.get('host', SERVICE_HOST), info.get('port')), CONNECT_TIMEOUT)
+        except (OSError, TypeError, ValueError):
+            # 服务已退出（Kodi 异常退出时 service.json 可能残留），本进程之后的调用不再尝试
+            self._down = True
+            raise ServiceUnavailable('service not running')
+
+        # 请求已发出后不再回退到本进程执行，避免有副作用的接口执行两次
+        try:
+            sock.settimeout(CALL_TIMEOUT)
+            sock.sendall(request + b'\n')
+            raw = _recv_line(sock)
+        except OSError as e:
+            raise ServiceError('service call %s failed: %s' % (method, e))
+        finally:
+            sock.close()
+
+        try:
+            response = json.loads(raw.decode('utf-8'))
+        except ValueError:
+            raise ServiceError('invalid service response for %s' % method)
+        if response.get('ok'):
+            perf.get_recorder().extend(response.get('perf') or [])
+            return response.get('result')
+        if response.get('fallback'):
+            raise ServiceUnavailable(response.get('error', ''))
+        raise ServiceError(response.get('error', ''))
+
+
+class _Server(socketserver.TCPServer):
+    allow_reuse_address = True
+
+    def __init__(self, address, service):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=SERVICE_WORKERS)
+        socketserver.TCPServer.__init__(self, address, _Handler)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        xbmc.log('plugin.audio.music: 服务处理请求失败 %s' % (client_address,), xbmc.LOGWARNING)
+
+    def server_close(self):
+        socketserver.TCPServer.server_close(self)
+        self.executor.shutdown(wait=False)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line.decode('utf-8'))
+        except ValueError:
+            return
+        response = self.server.service.dispatch(request)
+        self.wfile.write(response + b'\n')
+
+
+class MusicService(object):
+    """
+    常驻服务：持有 NetEase 客户端并通过本机 TCP 端口处理插件进程的调用
+
+    Args:
+        profile: profile 目录，默认为本插件的 profile 目录
+        host: 监听地址
+        port: 监听端口，0 表示由系统分配
+    """
+
+    def __init__(self, profile=None, host=SERVICE_HOST, port=0):
+        self.profile = profile or _profile_dir()
+        self.host = host
+        self.port = port
+        self.token = secrets.token_hex(16)
+        self._server = None
+        self._thread = None
+        self._client = None
+        self._client_key = None
+        self._client_lock = threading.Lock()
+        self._memo_cleared = time.time()
+
+    @property
+    def info_path(self):
+        return os.path.join(self.profile, SERVICE_INFO_FILE)
+
+    def start(self):
+        """开始监听并写入服务地址"""
+        self._server = _Server((self.host, self.port), self)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='music-service')
+        self._thread.daemon = True
+        self._thread.start()
+
+        tmp_path = self.info_path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'host': self.host, 'port': self.port, 'token': self.token, 'pid': os.getpid()}, f)
+        os.replace(tmp_path, self.info_path)
+        xbmc.log('plugin.audio.music: 后台服务已启动 %s:%d' % (self.host, self.port), xbmc.LOGINFO)
+
+    def stop(self):
+        """停止监听并删除服务地址"""
+        try:
+            with open(self.info_path, 'r') as f:
+                owned = json.load(f).get('token') == self.token
+        except (IOError, OSError, ValueError):
+            owned = False
+        if owned:
+            os.remove(self.info_path)
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        xbmc.log('plugin.audio.music: 后台服务已停止', xbmc.LOGINFO)
+
+    def _state_key(self):
+        """cookie 或设置被插件进程修改（登录、退出、代理设置）后需要重建客户端"""
+        from api import COOKIE_PATH
+        from settings import get_settings
+        mtimes = []
+        for path in (COOKIE_PATH, get_settings().path):
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def client(self):
+        """
+        获取常驻的 NetEase 客户端
+
+        Returns:
+            api.NetEase: 客户端实例
+        """
+        from api import NetEase
+        with self._client_lock:
+            key = self._state_key()
+            if self._client is None or key != self._client_key:
+                self._client = NetEase()
+                self._client_key = key
+            return self._client
+
+    def _remember_state(self):
+        """服务自身保存 cookie 后更新状态，避免无谓地重建客户端"""
+        with self._client_lock:
+            if self._client is not None:
+                self._client_key = self._state_key()
+
+    def dispatch(self, request):
+        """
+        执行一次调用
+
+        Args:
+            request: {'token', 'method', 'args', 'kwargs'}
+
+        Returns:
+            bytes: JSON 编码的 {'ok', 'result'} 或 {'ok': False, 'error', 'fallback'}
+        """
+        def fail(error, fallback):
+            return json.dumps({'ok': False, 'error': error, 'fallback': fallback}).encode('utf-8')
+
+        if not secrets.compare_digest(str(request.get('token', '')), self.token):
+            return fail('invalid token', True)
+        method = request.get('method') or ''
+        if method.startswith('_'):
+            return fail('unknown method %s' % method, True)
+        try:
+            func = getattr(self.client(), method)
+        except AttributeError:
+            return fail('unknown method %s' % method, True)
+        if not callable(func):
+            return fail('unknown method %s' % method, True)
+
+        try:
+            with perf.capture() as recorder:
+                result = func(*request.get('args', []), **request.get('kwargs', {}))
+        except Exception as e:
+            xbmc.log('plugin.audio.music: 服务调用 %s 失败: %s' % (method, str(e)), xbmc.LOGWARNING)
+            return fail('%s: %s' % (type(e).__name__, e), False)
+        finally:
+            self._remember_state()
+
+        try:
+            # 阶段耗时随结果返回，记入插件进程的性能记录
+            encoded = json.dumps({'ok': True, 'result': result, 'perf': recorder.take()}, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return fail('result of %s not serializable' % method, True)
+        # 整数键、元组等经过 JSON 后会改变类型，这类结果由插件进程自行执行
+        if json.loads(encoded)['result'] != result:
+            return fail('result of %s changes through JSON' % method, True)
+        return encoded.encode('utf-8')
+
+    def warm_up(self):
+        """预先建立客户端、数据库连接与密钥对池"""
+        try:
+            from encrypt import get_key_pool
+            from cache import get_cache_db
+            get_key_pool().fill()
+            get_cache_db()
+            self.client()
+        except Exception as e:
+            xbmc.log('plugin.audio.music: 服务预热失败: %s' % str(e), xbmc.LOGWARNING)
+
+    def tick(self):
+        """定期维护：请求结果缓存只保留 SERVICE_MEMO_TTL 秒，保存接口延迟统计，丢弃未归属的性能记录"""
+        try:
+            from api import get_request_memo
+            from latency import get_latency_tracker
+            if time.time() - self._memo_cleared >= SERVICE_MEMO_TTL:
+                get_request_memo().clear()
+                self._memo_cleared = time.time()
+            get_latency_tracker().flush()
+            # 服务中不属于任何调用的阶段（工作线程中记录的）不保存
+            perf.get_recorder().take()
+        except Exception as e:
+            xbmc.log('plugin.audio.music: 服务维护失败: %s' % str(e), xbmc.LOGWARNING)
+
+
+def run():
+    """Kodi 服务入口"""
+    from settings import get_settings
+    monitor = xbmc.Monitor()
+    if not get_settings().get_bool('enable_service'):
+        xbmc.log('plugin.audio.music: 后台服务未启用', xbmc.LOGINFO)
+        return
+    service = MusicService()
+    try:
+        service.start()
+    except OSError as e:
+        xbmc.log('plugin.audio.music: 后台服务启动失败: %s' % str(e), xbmc.LOGERROR)
+        return
+    service.warm_up()
+    try:
+        while not monitor.abortRequested():
+            if monitor.waitForAbort(SERVICE_TICK):
+                break
+            service.tick()
+    finally:
+        service.stop()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,164 @@
+# -*- coding:utf-8 -*-
+"""
+设置快照模块
+插件设置在一次调用中只从 Kodi 读取一次：读取过的值保存在快照中，并以 profile 目录下
+settings.xml 的修改时间（及插件版本）为键存入 Window(10000) 属性，之后的插件调用直接复用；
+用户修改设置后 settings.xml 的修改时间变化，快照随之失效
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+import xbmc
+import xbmcgui
+import xbmcaddon
+import xbmcvfs
+
+from perf import get_recorder
+
+try:
+    xbmc.translatePath = xbmcvfs.translatePath
+except AttributeError:
+    pass
+
+ADDON_ID = 'plugin.audio.music'
+# 两次检查 settings.xml 修改时间的最小间隔（秒）
+SETTINGS_RECHECK_INTERVAL = 2
+# 跨插件调用共享快照的 Window 属性
+_WINDOW_KEY = 'nc_settings_snapshot'
+
+
+class SettingsSnapshot(object):
+    """
+    插件设置快照
+
+    Args:
+        addon: xbmcaddon.Addon 实例，默认为本插件
+        path: 用户设置文件路径，默认为 profile 目录下的 settings.xml
+    """
+
+    def __init__(self, addon=None, path=None):
+        self.addon = addon or xbmcaddon.Addon(ADDON_ID)
+        self.path = path or os.path.join(xbmc.translatePath(self.addon.getAddonInfo('profile')), 'settings.xml')
+        # 插件升级可能改变设置默认值
+        self.version = self.addon.getAddonInfo('version')
+        self._values = {}
+        self._mtime = False
+        self._checked_at = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """settings.xml 修改时间变化时丢弃快照，改用共享快照（修改时间一致时）"""
+        now = time.time()
+        if now - self._checked_at < SETTINGS_RECHECK_INTERVAL:
+            return
+        self._checked_at = now
+        mtime = self._file_mtime()
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            self._mtime = mtime
+            self._values = self._load_shared(mtime)
+            self._dirty = False
+
+    def _load_shared(self, mtime):
+        try:
+            raw = xbmcgui.Window(10000).getProperty(_WINDOW_KEY)
+            if raw:
+                shared = json.loads(raw)
+                if shared.get('mtime') == mtime and shared.get('version') == self.version:
+                    return dict(shared.get('values', {}))
+        except Exception as e:
+            xbmc.log('plugin.audio.music: 读取设置快照失败: %s' % str(e), xbmc.LOGDEBUG)
+        return {}
+
+    def save_shared(self):
+        """将本次调用读取过的设置写入共享快照"""
+        if not self._dirty:
+            return
+        try:
+            with self._lock:
+                data = json.dumps({'mtime': self._mtime, 'version': self.version, 'values': self._values})
+                self._dirty = False
+            xbmcgui.Window(10000).setProperty(_WINDOW_KEY, data)
+        except Exception as e:
+            xbmc.log('plugin.audio.music: 保存设置快照失败: %s' % str(e), xbmc.LOGDEBUG)
+
+    def get(self, key):
+        """
+        读取设置原始字符串值
+
+        Args:
+            key: 设置 ID
+
+        Returns:
+            str: 设置值
+        """
+        self._refresh()
+        value = self._values.get(key)
+        if value is None:
+            started = time.perf_counter()
+            value = self.addon.getSetting(key)
+            get_recorder().add('settings', time.perf_counter() - started)
+            with self._lock:
+                self._values[key] = value
+                self._dirty = True
+        return value
+
+    def get_bool(self, key):
+        """读取布尔设置"""
+        return self.get(key) == 'true'
+
+    def get_int(self, key, default=0):
+        """读取整数设置，未设置或不是整数时返回 default"""
+        try:
+            return int(self.get(key))
+        except ValueError:
+            return default
+
+    def set(self, key, value):
+        """
+        修改设置并更新快照
+
+        Args:
+            key: 设置 ID
+            value: 设置值（字符串）
+        """
+        self.addon.setSetting(key, value)
+        with self._lock:
+            # 写入设置会更新 settings.xml，下次检查时整个快照失效
+            self._values[key] = value
+            self._checked_at = 0
+
+    def invalidate(self):
+        """丢弃快照"""
+        with self._lock:
+            self._values = {}
+            self._mtime = False
+            self._checked_at = 0
+
+
+_settings = None
+
+
+def get_settings():
+    """
+    获取进程内共享的设置快照
+
+    Returns:
+        SettingsSnapshot: 设置快照实例
+    """
+    global _settings
+    if _settings is None:
+        _settings = SettingsSnapshot()
+        atexit.register(_settings.save_shared)
+    return _settings
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试辅助：在临时 cache.db 中运行测试，不改动插件数据目录中的缓存
+"""
+
+import os
+import tempfile
+
+import cache
+from cache import get_cache_db
+
+
+def run_with_temp_db(test, codec=None, enabled=False, max_size=None):
+    """
+    在临时数据库中运行测试，结束后恢复原数据库路径与被替换的设置
+
+    设置在 CacheDB 类上替换，后台刷新线程新建的 CacheDB 同样生效
+
+    Args:
+        test: 测试函数，参数为临时数据库的 CacheDB
+        codec: 缓存编码（如 'json'），None 时使用默认编码
+        enabled: 为 True 时视为已启用缓存
+        max_size: 缓存容量上限（字节），None 时使用设置中的值
+    """
+    original_path, original_codec = cache.CACHE_DB_PATH, cache.CACHE_CODEC
+    original_enabled, original_max_size = cache.CacheDB.is_cache_enabled, cache.CacheDB.get_cache_max_size
+    cache.close_connection()
+    cache.CACHE_DB_PATH = os.path.join(tempfile.mkdtemp(), 'cache.db')
+    if codec is not None:
+        cache.CACHE_CODEC = codec
+    if enabled:
+        cache.CacheDB.is_cache_enabled = lambda self: True
+    if max_size is not None:
+        cache.CacheDB.get_cache_max_size = lambda self: max_size
+    try:
+        test(get_cache_db())
+    finally:
+        cache.close_connection()
+        cache.CACHE_DB_PATH, cache.CACHE_CODEC = original_path, original_codec
+        cache.CacheDB.is_cache_enabled, cache.CacheDB.get_cache_max_size = original_enabled, original_max_size
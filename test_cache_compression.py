@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试缓存数据的压缩存储与旧数据迁移
+"""
+
+import sys
+import os
+import json
+import time
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cache
+from cache import get_cache_db, encode_payload, decode_payload
+
+
+def _payload(count):
+    return {'code': 200, 'songs': [{'id': i, 'name': '测试歌曲 %d' % i, 'ar': [{'name': '歌手'}]} for i in range(count)]}
+
+
+def test_round_trip():
+    """测试各编码的编码与解码"""
+    data = _payload(200)
+    for codec in ('json', 'zlib'):
+        stored_codec, stored, raw_size = encode_payload(data, codec)
+        assert stored_codec == codec and raw_size == len(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        assert decode_payload(stored_codec, stored) == data, "%s 解码结果不一致" % codec
+    assert len(encode_payload(data, 'zlib')[1]) < raw_size / 4, "JSON 应被明显压缩"
+    assert encode_payload({'id': 1}, 'zlib')[0] == 'json', "小数据不应压缩"
+    print("✓ 编码测试成功")
+
+
+def test_set_get_stats():
+    """测试写入压缩数据并按类型统计字节数"""
+    cache_db = get_cache_db()
+    cache_db.is_cache_enabled = lambda: True
+    cache_db.delete_by_type('compression_test')
+    data = _payload(300)
+    assert cache_db.set('compression_test_1', data, cache_type='compression_test')
+    assert cache_db.get('compression_test_1') == data
+    stats = cache_db.get_stats()['type_bytes']['compression_test']
+    assert stats['raw'] > stats['stored'] > 0, stats
+    cache_db.delete_by_type('compression_test')
+    print("✓ 压缩存储测试成功")
+
+
+def test_migrate_legacy_rows():
+    """测试旧版本（TEXT 格式、无 codec 列）的缓存表迁移"""
+    import tempfile
+    import sqlite3
+    path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL, data TEXT NOT NULL,
+            timestamp INTEGER NOT NULL, expire_seconds INTEGER NOT NULL, type TEXT NOT NULL)
+    ''')
+    data = _payload(100)
+    conn.execute('INSERT INTO cache (key, data, timestamp, expire_seconds, type) VALUES (?, ?, ?, ?, ?)',
+                 ('legacy', json.dumps(data, ensure_ascii=False), int(time.time()), 3600, 'playlist_detail'))
+    conn.commit()
+    conn.close()
+
+    original_path = cache.CACHE_DB_PATH
+    cache.close_connection()
+    cache.CACHE_DB_PATH = path
+    try:
+        cache_db = get_cache_db()
+        cache_db.is_cache_enabled = lambda: True
+        assert cache_db.get('legacy') == data, "迁移后应能读取旧数据"
+        cache_db.cursor.execute('SELECT codec, raw_size, stored_size FROM cache WHERE key = ?', ('legacy',))
+        codec, raw_size, stored_size = cache_db.cursor.fetchone()
+        assert codec == cache.CACHE_CODEC and raw_size > stored_size > 0, (codec, raw_size, stored_size)
+    finally:
+        cache.close_connection()
+        cache.CACHE_DB_PATH = original_path
+    print("✓ 旧数据迁移测试成功")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_set_get_stats()
+    test_migrate_legacy_rows()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试缓存超出容量时按类型配额与总容量清理
+"""
+
+import sys
+import os
+import time
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cache
+from temp_cache_db import run_with_temp_db
+
+# 每个条目写入的 JSON 为 1002 字节（不压缩）
+ENTRY = 'x' * 1000
+ENTRY_SIZE = 1002
+
+
+def _keys(cache_db, cache_type):
+    cache_db.cursor.execute('SELECT key FROM cache WHERE type = ?', (cache_type,))
+    return set(row[0] for row in cache_db.cursor.fetchall())
+
+
+def test_type_quota():
+    """测试类型超出配额时清理最久未访问的条目，命中多次的条目保留"""
+    # song_comments 的配额为 5 个条目，清理到 4.5 个以下
+    budget = int(ENTRY_SIZE * 5 / cache.CACHE_TYPE_QUOTAS['song_comments'])
+
+    def run(cache_db):
+        now = int(time.time())
+        for i in range(10):
+            cache_db.set('comments_%d' % i, ENTRY, cache_type='song_comments')
+            cache_db.set('playlist_%d' % i, ENTRY, cache_type='playlist_detail')
+            cache_db.cursor.execute('UPDATE cache SET last_access = ? WHERE key = ?',
+                                    (now - (10 - i) * 100, 'comments_%d' % i))
+        cache_db.conn.commit()
+        # 最早写入的条目命中两次后比其他条目更有价值
+        assert cache_db.get('comments_0') == ENTRY
+        assert cache_db.get('comments_0') == ENTRY
+
+        assert cache_db.enforce_budget(force=True) == 6
+        assert _keys(cache_db, 'song_comments') == {'comments_0', 'comments_7', 'comments_8', 'comments_9'}
+        assert len(_keys(cache_db, 'playlist_detail')) == 10, "未超出配额的类型不应清理"
+        cache_db.cursor.execute('SELECT hit_count FROM cache WHERE key = ?', ('comments_0',))
+        assert cache_db.cursor.fetchone()[0] == 2
+
+    run_with_temp_db(run, codec='json', enabled=True, max_size=budget)
+    print("✓ 类型配额清理测试成功")
+
+
+def test_total_budget():
+    """测试超出总容量时先清理过期条目，再清理最久未访问的条目"""
+    def run(cache_db):
+        now = int(time.time())
+        for i in range(10):
+            cache_db.set('entry_%d' % i, ENTRY)
+            cache_db.cursor.execute('UPDATE cache SET last_access = ? WHERE key = ?',
+                                    (now - (10 - i) * 100, 'entry_%d' % i))
+        # 最近访问过但已过期
+        cache_db.cursor.execute('UPDATE cache SET timestamp = ?, expire_seconds = 60 WHERE key = ?',
+                                (now - 3600, 'entry_9'))
+        cache_db.conn.commit()
+
+        assert cache_db.enforce_budget(force=True) == 4
+        assert _keys(cache_db, 'default') == set('entry_%d' % i for i in range(3, 9))
+        assert cache_db.get_stats()['stored_bytes'] == ENTRY_SIZE * 6
+        assert cache_db.enforce_budget(force=True) == 0, "清理后不应再超出容量"
+
+    run_with_temp_db(run, codec='json', enabled=True, max_size=ENTRY_SIZE * 7)
+    print("✓ 总容量清理测试成功")
+
+
+if __name__ == "__main__":
+    test_type_quota()
+    test_total_budget()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试后端熔断器：熔断条件、冷却时间翻倍与半开状态的单个探测名额
+"""
+
+import sys
+import os
+import time
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import health
+from temp_cache_db import run_with_temp_db
+
+BACKEND = 'test_backend'
+
+
+def _record(*results):
+    for ok in results:
+        health.record_result(BACKEND, ok, 0.1)
+
+
+def _end_cooldown(cache_db):
+    """把熔断的冷却期改为已结束"""
+    cache_db.cursor.execute('UPDATE backend_health SET open_until = ? WHERE backend = ?',
+                            (int(time.time()) - 1, BACKEND))
+    cache_db.conn.commit()
+
+
+def test_trip_rules():
+    """测试连续失败与失败率两种熔断条件"""
+    def run(cache_db):
+        _record(False, False)
+        assert health.get_health(BACKEND)['state'] == health.STATE_CLOSED
+        assert health.is_available(BACKEND)
+        _record(False)
+        state = health.get_health(BACKEND)
+        assert state['state'] == health.STATE_OPEN, "连续失败 3 次应熔断"
+        assert abs(state['open_until'] - time.time() - health.HEALTH_COOLDOWN) <= 2
+        assert not health.is_available(BACKEND), "冷却期内不应放行"
+
+        # 失败与成功交替：连续失败不到 3 次，样本数达到 5 后按失败率熔断
+        cache_db.cursor.execute('DELETE FROM backend_health')
+        cache_db.conn.commit()
+        _record(False, True, False, True)
+        assert health.get_health(BACKEND)['state'] == health.STATE_CLOSED, "样本不足时不应按失败率熔断"
+        _record(False)
+        assert health.get_health(BACKEND)['state'] == health.STATE_OPEN, "失败率达到 50% 应熔断"
+
+    run_with_temp_db(run)
+    print("✓ 熔断条件测试成功")
+
+
+def test_single_probe():
+    """测试冷却结束后只放行一个探测请求，探测超时后可以重新探测"""
+    def run(cache_db):
+        _record(False, False, False)
+        _end_cooldown(cache_db)
+        assert health.is_available(BACKEND), "冷却结束后应放行一个探测请求"
+        assert health.get_health(BACKEND)['state'] == health.STATE_HALF_OPEN
+        assert not health.is_available(BACKEND), "探测进行中不应放行其他请求"
+
+        cache_db.cursor.execute('UPDATE backend_health SET probe_at = ? WHERE backend = ?',
+                                (int(time.time()) - health.HEALTH_PROBE_TIMEOUT - 1, BACKEND))
+        cache_db.conn.commit()
+        assert health.is_available(BACKEND), "探测超时后应允许重新探测"
+
+    run_with_temp_db(run)
+    print("✓ 半开探测测试成功")
+
+
+def test_cooldown_doubling():
+    """测试探测失败后冷却时间翻倍（有上限），探测成功后恢复"""
+    def run(cache_db):
+        _record(False, False, False)
+        expected = health.HEALTH_COOLDOWN
+        for _ in range(5):
+            _end_cooldown(cache_db)
+            assert health.is_available(BACKEND)
+            _record(False)
+            expected = min(expected * 2, health.HEALTH_MAX_COOLDOWN)
+            saved = cache_db.get_backend_health(BACKEND)
+            assert saved['state'] == health.STATE_OPEN and saved['cooldown'] == expected, saved
+        assert expected == health.HEALTH_MAX_COOLDOWN
+
+        _end_cooldown(cache_db)
+        assert health.is_available(BACKEND)
+        _record(True)
+        saved = cache_db.get_backend_health(BACKEND)
+        assert saved['state'] == health.STATE_CLOSED, "探测成功应恢复"
+        assert saved['cooldown'] == health.HEALTH_COOLDOWN, "恢复后冷却时间应重置"
+        assert health.get_health(BACKEND)['samples'] == 1, "恢复后应丢弃熔断前的样本"
+
+    run_with_temp_db(run)
+    print("✓ 冷却时间翻倍测试成功")
+
+
+if __name__ == "__main__":
+    test_trip_rules()
+    test_single_probe()
+    test_cooldown_doubling()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 SQLite 缓存之前的内存缓存（LRU 容量限制与失效）
+"""
+
+import sys
+import os
+import sqlite3
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cache
+from cache import get_cache_db, get_memory_cache, MemoryCache
+
+
+def test_lru_bounds():
+    """测试按条目数与字节数移除最久未使用的条目"""
+    memory = MemoryCache(max_entries=3, max_bytes=100)
+    for i in range(3):
+        memory.put('k%d' % i, i, {'i': i}, 10)
+    assert memory.get('k0', 0) == {'i': 0}
+    memory.put('k3', 3, {'i': 3}, 10)
+    assert memory.get('k1', 1) is None, "最久未使用的条目应被移除"
+    assert memory.get('k0', 0) is not None and memory.get('k3', 3) is not None
+
+    memory.put('big', 4, {}, 75)
+    assert memory.stats()['bytes'] <= 100 and memory.get('big', 4) == {}
+    assert memory.get('k2', 2) is None, "超出字节数时应移除旧条目"
+    memory.put('huge', 5, {}, 101)
+    assert memory.get('huge', 5) is None, "超出容量的条目不应缓存"
+    assert memory.get('k3', 30) is None, "行 id 不同时视为未命中"
+    print("✓ LRU 容量测试成功")
+
+
+def test_cache_db_uses_memory():
+    """测试命中时不再解码、写入与其他连接改写后失效"""
+    cache_db = get_cache_db()
+    cache_db.is_cache_enabled = lambda: True
+    memory = get_memory_cache()
+    cache_db.set('memory_test', {'songs': list(range(100))}, cache_type='memory_test')
+    first = cache_db.get('memory_test')
+    assert cache_db.get('memory_test') is first, "第二次读取应返回内存中的对象"
+
+    cache_db.set('memory_test', {'songs': [1]}, cache_type='memory_test')
+    assert cache_db.get('memory_test') == {'songs': [1]}, "写入后内存缓存应失效"
+
+    # 模拟其他进程改写同一缓存键
+    other = sqlite3.connect(cache.CACHE_DB_PATH)
+    other.execute('''
+        INSERT OR REPLACE INTO cache (key, data, timestamp, expire_seconds, type)
+        SELECT key, '{"songs": [2]}', timestamp, expire_seconds, type FROM cache WHERE key = ?
+    ''', ('memory_test',))
+    other.commit()
+    assert cache_db.get('memory_test') == {'songs': [2]}, "其他进程改写后不应读到旧数据"
+    other.execute('DELETE FROM cache WHERE key = ?', ('memory_test',))
+    other.commit()
+    other.close()
+    assert cache_db.get('memory_test') is None
+    assert memory.get('memory_test', 0) is None
+    cache_db.delete_by_type('memory_test')
+    print("✓ 内存缓存失效测试成功")
+
+
+if __name__ == "__main__":
+    test_lru_bounds()
+    test_cache_db_uses_memory()
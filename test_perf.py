@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试性能记录的统计与容量限制
+"""
+
+import sys
+import os
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import perf
+from cache import get_cache_db
+
+
+def test_summarize():
+    """测试按路由、后端接口与阶段分组统计"""
+    records = [('album', 'total', float(ms)) for ms in range(1, 101)]
+    records += [('album', 'netease /api/v1/album', 40.0), ('album', 'tunehub search', 90.0), ('album', 'imports', 12.0)]
+    summary = perf.summarize(records)
+    assert summary['routes'] == [('album', 100, 50.0, 95.0, 100.0)], summary['routes']
+    assert [row[0] for row in summary['backends']] == ['tunehub search', 'netease /api/v1/album'], "应按 p95 排序"
+    assert summary['phases'] == [('imports', 1, 12.0, 12.0, 12.0)]
+    print("✓ 性能统计测试成功")
+
+
+def test_records_bounded():
+    """测试记录表只保留最近的记录"""
+    cache_db = get_cache_db()
+    cache_db.clear_perf_records()
+    for i in range(5):
+        cache_db.add_perf_records('route%d' % i, [('total', 0.1), ('handler', 0.05)], 6)
+    routes = [route for route, _, _ in cache_db.get_perf_records()]
+    assert len(routes) == 6 and 'route0' not in routes, routes
+    cache_db.clear_perf_records()
+    print("✓ 性能记录容量测试成功")
+
+
+def test_capture():
+    """测试线程内单独收集阶段（后台服务）"""
+    perf.get_recorder().take()
+    with perf.capture() as recorder:
+        perf.get_recorder().add('netease /api/x', 0.01)
+    assert recorder.take() == [('netease /api/x', 0.01)]
+    assert perf.get_recorder().take() == [], "capture 期间不应记入进程的记录器"
+    print("✓ 阶段收集测试成功")
+
+
+if __name__ == "__main__":
+    test_summarize()
+    test_records_bounded()
+    test_capture()
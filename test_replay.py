@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试离线回放：真实路由处理函数对模拟后端的调用
+"""
+
+import sys
+import os
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_replay import ReplayBackend, ReplayServer, SCENARIOS_BY_NAME, run_scenario
+
+
+def _run(name, runs=1):
+    server = ReplayServer(ReplayBackend(latency=0)).start()
+    try:
+        scenario = SCENARIOS_BY_NAME[name]
+        results = run_scenario(server, scenario, runs)
+    finally:
+        server.stop()
+    for result in results:
+        assert scenario.check(result) is None, scenario.check(result)
+    return results
+
+
+def test_playlist_replay():
+    """测试歌单：超过 1000 首的部分分块补全，第二次运行读取缓存"""
+    cold, warm = _run('playlist', runs=2)
+    assert cold['calls'].get('music.163.com /weapi/v6/playlist/detail') == 1, cold['calls']
+    assert cold['calls'].get('music.163.com /weapi/v3/song/detail', 0) >= 1, "应补全剩余歌曲"
+    assert 'music.163.com /weapi/v6/playlist/detail' not in warm['calls'], "歌单详情应命中缓存"
+    print("✓ 歌单回放测试成功")
+
+
+def test_play_lxmusic_rejected():
+    """测试 LXMUSIC 返回 403 时回退到网易云播放地址"""
+    result, = _run('play_lxmusic_403')
+    assert result['calls'].get('music.163.com /weapi/song/enhance/player/url/v1') == 1, result['calls']
+    print("✓ 播放回退回放测试成功")
+
+
+if __name__ == "__main__":
+    test_playlist_replay()
+    test_play_lxmusic_rejected()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试进程内的请求结果缓存（RequestMemo）
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import api
+from api import RequestMemo, get_request_memo
+
+
+class FakeResponse(object):
+    def __init__(self, data):
+        self.content = json.dumps(data).encode('utf-8')
+
+
+def _fake_netease():
+    """不访问网络的 NetEase 客户端，记录每个接口实际发出的请求数"""
+    music = api.NetEase()
+    calls = {}
+
+    def raw_request(method, endpoint, data=None, use_mobile_header=False):
+        path = endpoint.replace(api.BASE_URL, '')
+        calls[path] = calls.get(path, 0) + 1
+        return FakeResponse({'code': 200, 'path': path, 'n': calls[path]})
+
+    music._raw_request = raw_request
+    get_request_memo().clear()
+    return music, calls
+
+
+def test_single_flight():
+    """测试并发的相同请求只发出一次，每个调用方得到各自的对象"""
+    memo = RequestMemo()
+    release = threading.Event()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        release.wait(10)
+        return b'{"code": 200, "songs": [1, 2]}'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(memo.call('k', '/p', fetch, json.loads)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(fetches) == 1, "并发的相同请求应只发出一次"
+    assert len(results) == 5 and all(r == {'code': 200, 'songs': [1, 2]} for r in results)
+    assert len(set(id(r) for r in results)) == 5, "每个调用方应得到各自的对象"
+    results[0]['songs'].append(3)
+    assert memo.call('k', '/p', fetch, json.loads)['songs'] == [1, 2], "修改返回值不应影响缓存"
+    assert memo.stats()['/p'] == {'hits': 1, 'shared': 4, 'misses': 1}, memo.stats()
+    print("✓ 并发请求合并测试成功")
+
+
+def test_ttl_and_failures():
+    """测试超过保留时间后重新请求，失败的响应不缓存"""
+    memo = RequestMemo(ttl=0.1)
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return b'{"code": 200}'
+
+    memo.call('k', '/p', fetch, json.loads)
+    memo.call('k', '/p', fetch, json.loads)
+    assert len(fetches) == 1
+    time.sleep(0.15)
+    memo.call('k', '/p', fetch, json.loads)
+    assert len(fetches) == 2, "超过保留时间后应重新请求"
+
+    for body in (b'{"code": 301}', None):
+        failures = []
+        memo.call('f', '/f', lambda: failures.append(1) or body, lambda b: json.loads(b) if b else {'code': -1})
+        memo.call('f', '/f', lambda: failures.append(1) or body, lambda b: json.loads(b) if b else {'code': -1})
+        assert len(failures) == 2, "失败的响应不应缓存"
+    print("✓ 保留时间测试成功")
+
+
+def test_skip_paths():
+    """测试有副作用、轮询和每次返回不同内容的接口不缓存"""
+    for path in ('/weapi/v1/radio/get', '/weapi/login/qrcode/client/login', '/weapi/playlist/manipulate/tracks',
+                 '/weapi/radio/trash/add', '/weapi/mlog/rcmd/v3', '/api/feedback/weblog'):
+        assert api._MEMO_SKIP_RE.search(path), path
+    for path in ('/weapi/v6/playlist/detail', '/weapi/v3/song/detail', '/weapi/search/get'):
+        assert not api._MEMO_SKIP_RE.search(path), path
+    print("✓ 不缓存的接口测试成功")
+
+
+def test_netease_memo():
+    """测试私人 FM 每次都请求，只读接口合并，有副作用的接口清空缓存"""
+    music, calls = _fake_netease()
+    first = music.personal_fm()
+    second = music.personal_fm()
+    assert calls['/weapi/v1/radio/get'] == 2, "私人 FM 每次都应请求"
+    assert first['n'] == 1 and second['n'] == 2
+
+    music.playlist_detail(1, use_cache=False)
+    music.playlist_detail(1, use_cache=False)
+    assert calls['/weapi/v6/playlist/detail'] == 1, "相同的只读请求应只发出一次"
+
+    music.request('POST', '/weapi/playlist/manipulate/tracks', dict(op='add', pid=1, trackIds='[2]'))
+    music.playlist_detail(1, use_cache=False)
+    assert calls['/weapi/v6/playlist/detail'] == 2, "有副作用的请求后应重新请求"
+    get_request_memo().clear()
+    print("✓ 接口缓存测试成功")
+
+
+def test_latency_per_endpoint():
+    """测试超时按接口分别统计，大请求不受普通接口耗时影响"""
+    music = api.NetEase()
+    timeouts = {}
+    recorded = []
+
+    class FakeTracker(object):
+        def timeout_for(self, endpoint, default):
+            return timeouts.get(endpoint, default)
+
+        def record(self, endpoint, seconds):
+            recorded.append(endpoint)
+
+    def post(endpoint, data=None, headers=None, timeout=None, proxies=None):
+        used.append(timeout)
+        return FakeResponse({'code': 200})
+
+    used = []
+    timeouts['netease /weapi/v3/song/detail'] = 2.0
+    original = api.get_latency_tracker
+    api.get_latency_tracker = lambda: FakeTracker()
+    music.session.post = post
+    try:
+        music._raw_request('POST', api.BASE_URL + '/weapi/v6/playlist/detail', {})
+        music._raw_request('POST', api.BASE_URL + '/weapi/v3/song/detail', {})
+        music._eapi_request_body('/api/song/enhance/player/url/v1', {})
+    finally:
+        api.get_latency_tracker = original
+    assert used[:2] == [api.DEFAULT_TIMEOUT, 2.0], used
+    assert recorded == ['netease /weapi/v6/playlist/detail', 'netease /weapi/v3/song/detail',
+                        'netease_eapi /api/song/enhance/player/url/v1'], recorded
+    print("✓ 按接口统计耗时测试成功")
+
+
+if __name__ == "__main__":
+    test_single_flight()
+    test_ttl_and_failures()
+    test_skip_paths()
+    test_netease_memo()
+    test_latency_per_endpoint()
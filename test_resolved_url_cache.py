@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试播放地址缓存功能
+"""
+
+import sys
+import os
+import time
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache import get_cache_db
+from api import get_url_expire_at, RESOLVED_URL_DEFAULT_TTL, RESOLVED_URL_EXPIRE_MARGIN
+
+
+def test_url_expire_at():
+    """测试从签名地址解析过期时间"""
+    now = 1700000000
+
+    # expires 参数
+    expire_at = get_url_expire_at('http://example.com/a.mp3?expires=%d' % (now + 3600), now)
+    assert expire_at == now + 3600 - RESOLVED_URL_EXPIRE_MARGIN, "expires 参数解析失败"
+
+    # 网易云 CDN 路径时间戳（北京时间 2023-11-15 06:33:20 = UTC 2023-11-14 22:33:20）
+    url = 'http://m701.music.126.net/20231115063320/0123456789abcdef0123456789abcdef/a.mp3'
+    assert get_url_expire_at(url, now) == now + 1200 - RESOLVED_URL_EXPIRE_MARGIN, "网易云路径时间戳解析失败"
+
+    # 已经过期的签名地址（秒与毫秒时间戳）不应使用默认过期时间
+    assert get_url_expire_at('http://example.com/a.mp3?expires=%d' % (now - 60), now) == now, "已过期的地址应立即过期"
+    assert get_url_expire_at('http://example.com/a.mp3?deadline=%d' % ((now - 60) * 1000), now) == now
+    assert get_url_expire_at('http://example.com/a.mp3?expires=%d' % now, now) == now
+
+    # 没有过期信息
+    assert get_url_expire_at('http://example.com/a.mp3', now) == now + RESOLVED_URL_DEFAULT_TTL, "默认过期时间错误"
+    print("✓ 过期时间解析成功")
+
+
+def test_resolved_url_cache():
+    """测试播放地址缓存的读写、过期和失效"""
+    cache_db = get_cache_db()
+    cache_db.is_cache_enabled = lambda: True
+    cache_db.cursor.execute('DELETE FROM resolved_urls')
+
+    url = 'http://example.com/1.mp3'
+    cache_db.set_resolved_url(1, 'lossless', 'netease', url, 'lxmusic_fallback_320k', '320k', time.time() + 600)
+    cached = cache_db.get_resolved_url(1, 'lossless', 'netease')
+    assert cached and cached['url'] == url and cached['quality'] == '320k', "读取缓存失败"
+    assert cache_db.get_resolved_url(1, 'hires', 'netease') is None, "不同音质不应命中"
+
+    # 失效
+    assert cache_db.invalidate_resolved_url(url) == 1, "失效删除失败"
+    assert cache_db.get_resolved_url(1, 'lossless', 'netease') is None, "失效后仍命中"
+
+    # 过期
+    cache_db.set_resolved_url(2, 'lossless', 'netease', url, 'netease', 'lossless', time.time() - 1)
+    assert cache_db.get_resolved_url(2, 'lossless', 'netease') is None, "过期后仍命中"
+    print("✓ 播放地址缓存测试成功")
+
+
+if __name__ == "__main__":
+    test_url_expire_at()
+    test_resolved_url_cache()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试播放地址并发解析：优先级选择与立即启动的兜底候选
+"""
+
+import sys
+import os
+import time
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from resolver import UrlResolver
+
+
+def _candidate(name, delay, ok, started):
+    def func(cancel):
+        started.append(name)
+        if cancel.wait(delay):
+            return None
+        return ('http://%s/a.mp3' % name, name, 'q') if ok else None
+    return name, func
+
+
+def test_priority_order():
+    """测试高优先级候选仍在执行时不提前返回低优先级结果"""
+    started = []
+    resolver = UrlResolver(max_workers=2, deadline=5)
+    _, used_source, _ = resolver.resolve([
+        _candidate('slow_ok', 0.2, True, started),
+        _candidate('fast_ok', 0.0, True, started),
+    ])
+    assert used_source == 'slow_ok', "应按优先级选择结果"
+    print("✓ 优先级选择测试成功")
+
+
+def test_eager_candidate():
+    """测试线程池占满时 eager 候选仍立即启动，且只在更高优先级全部失败后胜出"""
+    started = []
+    candidates = [_candidate('lx%d' % i, 0.3, False, started) for i in range(3)]
+    candidates.append(_candidate('netease', 0.0, True, started))
+    resolver = UrlResolver(max_workers=1, deadline=5)
+
+    begin = time.monotonic()
+    _, used_source, _ = resolver.resolve(candidates, eager=('netease',))
+    assert started.index('netease') <= 1, "eager 候选不应等待线程池: %s" % started
+    assert used_source == 'netease'
+    assert time.monotonic() - begin >= 0.8, "更高优先级候选失败前不应返回"
+
+    # 截止时间到达时返回已完成的最佳结果
+    resolver = UrlResolver(max_workers=1, deadline=0.5)
+    begin = time.monotonic()
+    _, used_source, _ = resolver.resolve(candidates, eager=('netease',))
+    assert used_source == 'netease' and time.monotonic() - begin < 2, "截止时间后应返回 eager 候选的结果"
+    print("✓ 兜底候选立即启动测试成功")
+
+
+if __name__ == "__main__":
+    test_priority_order()
+    test_eager_candidate()
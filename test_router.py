@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试路由表的匹配与参数提取
+"""
+
+import sys
+import os
+from urllib.parse import unquote_plus
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from router import Router
+
+PATHS = {
+    'index': '/',
+    'album': '/album/<id>/',
+    'albums': '/albums/<artist_id>/<offset>/',
+    'play': '/play/<meida_type>/<song_id>/<mv_id>/<sourceId>/<dt>/<source>/',
+    'play_album': '/play_album/<album_id>/',
+    'history': '/history/',
+    'to_artist': '/to_artist/<artists>/',
+}
+
+
+def _router(calls):
+    namespace = {name: (lambda name: lambda **kwargs: calls.append((name, kwargs)) or name)(name) for name in PATHS}
+    return Router(PATHS, namespace, converters={'to_artist': {'artists': unquote_plus}},
+                  defaults={'play': {'source': 'netease'}})
+
+
+def test_match():
+    """测试按第一段匹配，相似前缀的路由互不干扰"""
+    router = _router([])
+    assert router.match('/')[0].name == 'index'
+    assert router.match('/album/12/') == (router.match('/album/12')[0], {'id': '12'})
+    assert router.match('/albums/3/30/')[1] == {'artist_id': '3', 'offset': '30'}
+    assert router.match('/play_album/7/')[0].name == 'play_album'
+    assert router.match('/history/')[1] == {}
+    assert router.match('/history/extra/') is None, "无参数路由不应接受多余的段"
+    assert router.match('/unknown/') is None
+    print("✓ 路由匹配测试成功")
+
+
+def test_params():
+    """测试缺省参数、转换函数与含斜杠的最后一个参数"""
+    router = _router([])
+    assert router.match('/play/song/1/0/2/180/')[1]['source'] == 'netease', "缺省参数错误"
+    assert router.match('/play/song/1/0/2/180/tunehub/')[1]['source'] == 'tunehub'
+    assert router.match('/play/song/1/') is None, "缺少必需参数应不匹配"
+    assert router.match('/to_artist/AC%2FDC/')[1] == {'artists': 'AC/DC'}, "转换函数错误"
+    assert router.match('/to_artist/AC/DC/')[1] == {'artists': 'AC/DC'}, "最后一个参数应包含剩余路径"
+    print("✓ 路由参数测试成功")
+
+
+def test_dispatch_hook():
+    """测试调用处理函数与计时钩子"""
+    calls, timings = [], []
+    router = _router(calls)
+    router.add_hook(lambda name, kwargs, elapsed: timings.append((name, elapsed)))
+    assert router.dispatch(*router.match('/album/5/')) == 'album'
+    assert calls == [('album', {'id': '5'})]
+    assert timings and timings[0][0] == 'album' and timings[0][1] >= 0
+    print("✓ 路由分发测试成功")
+
+
+def test_conflicting_prefix():
+    """测试第一段相同的路由在编译时报错"""
+    try:
+        Router({'a': '/x/<id>/', 'b': '/x/'}, {})
+        assert False, "应抛出 ValueError"
+    except ValueError:
+        pass
+    print("✓ 路由冲突检测成功")
+
+
+if __name__ == "__main__":
+    test_match()
+    test_params()
+    test_dispatch_hook()
+    test_conflicting_prefix()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试后台服务的调用与回退（需要模拟的 xbmc 模块，不访问网络）
+"""
+
+import sys
+import os
+import tempfile
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from service import MusicService, ServiceClient, ServiceUnavailable, ServiceError
+
+
+class FakeNetEase(object):
+    """代替 api.NetEase，记录调用次数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def playlist_detail(self, playlist_id, offset=0):
+        self.calls += 1
+        return {'code': 200, 'id': playlist_id, 'offset': offset}
+
+    def songs_detail(self, ids):
+        return {1: 'int key'}
+
+    def fail(self):
+        raise RuntimeError('boom')
+
+
+def _start_service(profile):
+    service = MusicService(profile)
+    fake = FakeNetEase()
+    service.client = lambda: fake
+    service._remember_state = lambda: None
+    service.start()
+    return service, fake
+
+
+def test_service_call():
+    """测试通过服务调用方法"""
+    profile = tempfile.mkdtemp()
+    service, fake = _start_service(profile)
+    try:
+        client = ServiceClient(profile)
+        assert client.call('playlist_detail', [42], {'offset': 10}) == {'code': 200, 'id': 42, 'offset': 10}
+        assert fake.calls == 1, "方法应在服务中执行"
+
+        # 方法抛出异常时不回退，避免执行两次
+        try:
+            client.call('fail')
+            assert False, "应抛出 ServiceError"
+        except ServiceError:
+            pass
+
+        # 返回值经过 JSON 后类型改变、私有方法、无法传递的参数：回退到本进程
+        for method, args in (('songs_detail', [[1]]), ('_raw_request', []), ('playlist_detail', [object()])):
+            try:
+                client.call(method, args)
+                assert False, "%s 应回退" % method
+            except ServiceUnavailable:
+                pass
+
+        # 令牌错误
+        client._info = dict(client._info, token='x')
+        try:
+            client.call('playlist_detail', [1])
+            assert False, "令牌错误应回退"
+        except ServiceUnavailable:
+            pass
+    finally:
+        service.stop()
+    assert not os.path.exists(service.info_path), "停止后应删除服务地址"
+    print("✓ 服务调用测试成功")
+
+
+def test_service_down():
+    """测试服务未运行时回退"""
+    profile = tempfile.mkdtemp()
+    client = ServiceClient(profile)
+    try:
+        client.call('playlist_detail', [1])
+        assert False, "服务未运行时应回退"
+    except ServiceUnavailable:
+        pass
+
+    # 残留的服务地址（Kodi 异常退出）
+    service, _ = _start_service(profile)
+    with open(service.info_path) as f:
+        stale = f.read()
+    service.stop()
+    with open(service.info_path, 'w') as f:
+        f.write(stale)
+    client = ServiceClient(profile)
+    try:
+        client.call('playlist_detail', [1])
+        assert False, "服务已退出时应回退"
+    except ServiceUnavailable:
+        pass
+    print("✓ 服务回退测试成功")
+
+
+if __name__ == "__main__":
+    test_service_call()
+    test_service_down()
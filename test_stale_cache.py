@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试浏览页面缓存过期后返回旧数据并在后台刷新
+"""
+
+import sys
+import os
+import time
+import threading
+
+# 添加插件路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cache
+from temp_cache_db import run_with_temp_db
+
+
+def _expire(cache_db, key, seconds_past):
+    """把条目改为 seconds_past 秒前已过期"""
+    cache_db.cursor.execute('UPDATE cache SET timestamp = ?, expire_seconds = 60 WHERE key = ?',
+                            (int(time.time()) - 60 - seconds_past, key))
+    cache_db.conn.commit()
+
+
+def _wait_refresh():
+    for thread in threading.enumerate():
+        if thread.name == 'cache-refresh':
+            thread.join(10)
+
+
+def test_stale_while_revalidate():
+    """测试过期条目立即返回，只安排一次刷新，刷新后读到新数据"""
+    def run(cache_db):
+        cache_db.set('hot', {'code': 200, 'v': 1}, cache_type='hot_playlists')
+        _expire(cache_db, 'hot', 3600)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def refresh():
+            calls.append(1)
+            started.set()
+            release.wait(10)
+            return {'code': 200, 'v': 2}
+
+        assert cache_db.get('hot', refresh=refresh) == {'code': 200, 'v': 1}, "过期后应立即返回旧数据"
+        assert started.wait(10)
+        assert cache_db.get('hot', refresh=refresh) == {'code': 200, 'v': 1}
+        release.set()
+        _wait_refresh()
+        assert len(calls) == 1, "刷新进行中不应重复刷新"
+        assert cache_db.get('hot', refresh=refresh) == {'code': 200, 'v': 2}, "刷新后应读到新数据"
+
+        # 刷新失败时保留旧数据
+        _expire(cache_db, 'hot', 3600)
+        assert cache_db.get('hot', refresh=lambda: {'code': 301}) == {'code': 200, 'v': 2}
+        _wait_refresh()
+        assert cache_db.get('hot', refresh=refresh) == {'code': 200, 'v': 2}
+
+    run_with_temp_db(run, enabled=True)
+    print("✓ 过期后台刷新测试成功")
+
+
+def test_stale_limits():
+    """测试超出期限、未提供刷新函数或类型不在策略中时按未命中处理"""
+    def run(cache_db):
+        max_stale = cache.CACHE_STALE_POLICY['top_mv']
+        for key, cache_type in (('mv', 'top_mv'), ('old_mv', 'top_mv'), ('detail', 'playlist_detail')):
+            cache_db.set(key, {'code': 200}, cache_type=cache_type)
+        _expire(cache_db, 'mv', 10)
+        _expire(cache_db, 'old_mv', max_stale + 10)
+        _expire(cache_db, 'detail', 10)
+        refresh = lambda: None
+
+        assert cache_db.get('old_mv', refresh=refresh) is None, "超出期限不应返回旧数据"
+        assert cache_db.get('detail', refresh=refresh) is None, "不在策略中的类型不应返回旧数据"
+        cache_db.get_auto_clear_cache = lambda: True
+        cache_db.clear_expired()
+        assert cache_db.get('mv', refresh=refresh) == {'code': 200}, "清理过期缓存时应保留期限内的条目"
+        _wait_refresh()
+        assert cache_db.get('mv') is None, "未提供刷新函数时按过期处理"
+
+    run_with_temp_db(run, enabled=True)
+    print("✓ 旧数据期限测试成功")
+
+
+if __name__ == "__main__":
+    test_stale_while_revalidate()
+    test_stale_limits()
@@ -2,8 +2,8 @@
 import os
 import time
 import hashlib
-import sqlite3
-from api import NetEase
+from api import NetEase, get_transport
+from cache import get_cache_db
 from xbmcswift2 import Plugin, xbmcgui, xbmcplugin, xbmc, xbmcaddon # type: ignore
 import xbmcgui # type: ignore
 import xbmcvfs # type: ignore
@@ -16,31 +16,8 @@ music = NetEase()
 # =========================
 
 def get_db():
-    addon_data = xbmcvfs.translatePath(plugin.addon.getAddonInfo("profile"))
-    if not xbmcvfs.exists(addon_data):
-        xbmcvfs.mkdirs(addon_data)
-    db_path = os.path.join(addon_data, "cache.db")
-
-    conn = sqlite3.connect(db_path)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS lrc_cache (
-            source TEXT,
-            track_id TEXT,
-            text TEXT,
-            time INTEGER,
-            last_access INTEGER,
-            PRIMARY KEY (source, track_id)
-        )
-    """)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS cover_cache (
-            url TEXT PRIMARY KEY,
-            local_path TEXT,
-            time INTEGER
-        )
-    """)
-    conn.commit()
-    return conn
+    """cache.db 的连接：与 CacheDB 共用当前线程的连接（lrc_cache / cover_cache 表由 CacheDB 创建）"""
+    return get_cache_db().conn
 
 
 # =========================
@@ -126,8 +103,7 @@ def get_cached_cover(url, max_size_mb=200, max_files=2000):
 
     # 下载封面
     try:
-        import requests
-        r = requests.get(url, timeout=5)
+        r = get_transport().get(url, timeout=5)
         if r.status_code == 200:
             with xbmcvfs.File(local_path, "wb") as f:
                 f.write(r.content)
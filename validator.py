@@ -0,0 +1,138 @@
+# -*- coding:utf-8 -*-
+"""
+播放地址校验模块
+用 2 字节的 Range GET 代替 HEAD 校验播放地址（部分 CDN 对 HEAD 的响应不可靠），
+检查响应类型与文件长度；校验结果按地址缓存，按 CDN 主机记录连续成功次数，
+近期一直返回真实音频的主机直接跳过校验
+"""
+
+import time
+from urllib.parse import urlparse
+import xbmc
+
+from cache import get_cache_db
+
+# 校验请求超时上限（秒）
+VALIDATE_TIMEOUT = 5
+# 地址校验通过 / 失败结果的有效期（秒）
+URL_VERDICT_OK_TTL = 10 * 60
+URL_VERDICT_FAIL_TTL = 60
+# 主机连续校验通过该次数后视为可信，跳过校验
+HOST_TRUST_MIN_OK = 5
+# 主机可信状态的有效期（秒），过期后需要重新做一次真实校验
+HOST_TRUST_TTL = 10 * 60
+# 音频文件最小长度（字节），更小的响应通常是错误页或占位文件
+MIN_AUDIO_LENGTH = 64 * 1024
+
+# 允许的响应类型（小写前缀）
+AUDIO_CONTENT_TYPES = ('audio/', 'video/mp4', 'application/octet-stream', 'binary/octet-stream',
+                       'application/x-flac', 'application/ogg')
+
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Range': 'bytes=0-1'
+}
+
+
+class StreamValidator(object):
+    """
+    播放地址校验器
+
+    Args:
+        transport: 具有 get(url, latency_key=None, **kwargs) 方法的 HTTP 传输层（api.HttpTransport）
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def is_valid(self, url):
+        """
+        校验播放地址是否返回真实音频
+
+        Args:
+            url: 播放地址
+
+        Returns:
+            bool: 是否可用
+        """
+        if not url:
+            return False
+        host = urlparse(url).netloc.lower()
+        cache_db = get_cache_db()
+
+        verdict = cache_db.get_url_verdict(url, URL_VERDICT_OK_TTL, URL_VERDICT_FAIL_TTL)
+        if verdict is not None:
+            xbmc.log('plugin.audio.music: URL校验缓存命中 %s... 结果: %s' % (url[:50], verdict), xbmc.LOGDEBUG)
+            return verdict
+
+        if self.is_trusted_host(host):
+            xbmc.log('plugin.audio.music: 主机 %s 近期校验均通过，跳过校验' % host, xbmc.LOGDEBUG)
+            return True
+
+        ok = self.probe(url)
+        cache_db.set_url_verdict(url, host, ok)
+        return ok
+
+    def is_trusted_host(self, host):
+        """
+        判断主机是否有可靠的返回真实音频的记录
+
+        Args:
+            host: 主机名
+
+        Returns:
+            bool: 是否可信
+        """
+        record = get_cache_db().get_host_verdict(host)
+        if not record:
+            return False
+        return (record['consecutive_ok'] >= HOST_TRUST_MIN_OK
+                and record['last_ok'] > record['last_fail']
+                and time.time() - record['last_ok'] < HOST_TRUST_TTL)
+
+    def probe(self, url):
+        """
+        发送 Range GET 请求，检查状态码、响应类型和文件长度
+
+        Args:
+            url: 播放地址
+
+        Returns:
+            bool: 是否可用
+        """
+        try:
+            # 超时时间由校验请求观测到的 p99 推导，VALIDATE_TIMEOUT 为上限
+            response = self.transport.get(url, latency_key='validate', headers=_HEADERS, timeout=VALIDATE_TIMEOUT,
+                                          allow_redirects=True, stream=True)
+            try:
+                status = response.status_code
+                content_type = (response.headers.get('Content-Type') or '').lower()
+                length = self._content_length(response)
+                if status == 206:
+                    # 只有 2 字节，读完后连接可以回到连接池复用
+                    response.content
+            finally:
+                # 服务器忽略 Range 返回整个文件时不读取响应体，直接关闭
+                response.close()
+        except Exception as e:
+            xbmc.log('plugin.audio.music: URL校验失败: %s' % str(e), xbmc.LOGWARNING)
+            return False
+
+        ok = (status in (200, 206)
+              and (not content_type or content_type.startswith(AUDIO_CONTENT_TYPES))
+              and (length is None or length >= MIN_AUDIO_LENGTH))
+        xbmc.log('plugin.audio.music: URL校验 %s... 状态码: %d 类型: %s 长度: %s 结果: %s' % (
+            url[:50], status, content_type, length, ok), xbmc.LOGDEBUG)
+        return ok
+
+    @staticmethod
+    def _content_length(response):
+        """从 Content-Range（206）或 Content-Length（200）中取完整文件长度，未知返回 None"""
+        content_range = response.headers.get('Content-Range') or ''
+        if '/' in content_range:
+            total = content_range.rsplit('/', 1)[1].strip()
+            return int(total) if total.isdigit() else None
+        if response.status_code == 200:
+            length = response.headers.get('Content-Length') or ''
+            return int(length) if length.isdigit() else None
+        return None